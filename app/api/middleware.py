@@ -0,0 +1,137 @@
+"""
+ASGI middleware for request instrumentation
+"""
+
+import json
+import time
+
+from starlette.routing import Match
+
+from ..core.admission import ROUTE_CLASSES
+from ..core.metrics import registry, HTTP_REQUESTS, HTTP_IN_PROGRESS, HTTP_LATENCY
+from ..core.tracing import start_span, tracing_enabled
+from ..core.exceptions import AdmissionRejectedError
+
+def route_label(routes, scope) -> str:
+    """Route template for a request, keeping label cardinality bounded"""
+    for route in routes:
+        # Skip wrappers such as included routers that don't carry a path template
+        path = getattr(route, "path", None)
+        if path is None:
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Counts requests per route and status and tracks in-flight requests"""
+
+    def __init__(self, app, routes=()):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        started = time.perf_counter()
+        route = route_label(self.routes, scope)
+        HTTP_IN_PROGRESS.inc(route=route)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec(route=route)
+            HTTP_REQUESTS.inc(route=route, method=scope.get("method", ""), status=str(status["code"]))
+            HTTP_LATENCY.observe(time.perf_counter() - started, route=route)
+
+class TracingMiddleware:
+    """Opens a server span per request, continuing any trace propagated by the caller"""
+
+    def __init__(self, app, routes=()):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        route = route_label(self.routes, scope)
+        method = scope.get("method", "")
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        attributes = {"http.method": method, "http.route": route, "http.target": scope.get("path", "")}
+
+        with start_span(f"{method} {route}", attributes=attributes, headers=headers) as span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+class AdmissionMiddleware:
+    """Applies the admission limiter of the matched route, answering 429/503 when saturated.
+    
+    With `tenants`, requests to admission-controlled routes first take a slot of
+    their tenant's quota, so a tenant over its quota waits without holding a
+    route-class slot that other tenants could use.
+    """
+
+    def __init__(self, app, routes=(), limiters=None, tenants=None):
+        self.app = app
+        self.routes = routes
+        self.limiters = limiters or {}
+        self.tenants = tenants if tenants is not None and tenants.enabled else None
+        self._tenant_header = tenants.config.header.lower().encode("latin-1") if self.tenants else b""
+
+    async def __call__(self, scope, receive, send):
+        acquire = []
+        if scope["type"] == "http" and (self.limiters or self.tenants):
+            route = route_label(self.routes, scope)
+            if self.tenants is not None and route in ROUTE_CLASSES:
+                tenant_id = dict(scope.get("headers") or []).get(self._tenant_header, b"").decode("latin-1")
+                acquire.append(self.tenants.limiter(tenant_id))
+            acquire.append(self.limiters.get(route))
+        acquire = [limiter for limiter in acquire if limiter is not None]
+        if not acquire:
+            await self.app(scope, receive, send)
+            return
+
+        acquired = []
+        try:
+            for limiter in acquire:
+                await limiter.acquire()
+                acquired.append(limiter)
+        except AdmissionRejectedError as e:
+            for limiter in acquired:
+                limiter.release()
+            await _send_rejection(send, e)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+async def _send_rejection(send, error: AdmissionRejectedError) -> None:
+    body = json.dumps({"detail": str(error)}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": error.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(error.retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
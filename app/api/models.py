@@ -2,17 +2,78 @@
 Pydantic models for API requests and responses
 """
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictInt, model_validator
+
+from ..providers.base import MetadataFilter
 
 # Request models
+class MetadataFilterModel(BaseModel):
+    """Condition on a metadata field: `eq`, `in`, or a numeric/date range"""
+    model_config = ConfigDict(populate_by_name=True)
+    
+    key: str = Field(..., description="Metadata field", pattern=r"^[A-Za-z_][A-Za-z0-9_.-]*$", max_length=64)
+    eq: Optional[Union[StrictBool, StrictInt, str]] = Field(None, description="Field equals this value")
+    in_: Optional[List[Union[StrictInt, str]]] = Field(
+        None, alias="in", description="Field equals one of these values", min_length=1, max_length=100
+    )
+    gte: Optional[Union[float, datetime]] = Field(None, description="Lower bound (inclusive); number or ISO date")
+    gt: Optional[Union[float, datetime]] = Field(None, description="Lower bound (exclusive); number or ISO date")
+    lte: Optional[Union[float, datetime]] = Field(None, description="Upper bound (inclusive); number or ISO date")
+    lt: Optional[Union[float, datetime]] = Field(None, description="Upper bound (exclusive); number or ISO date")
+    
+    @model_validator(mode="after")
+    def _one_condition(self):
+        bounds = [value for value in (self.gte, self.gt, self.lte, self.lt) if value is not None]
+        kinds = (self.eq is not None) + (self.in_ is not None) + bool(bounds)
+        if kinds != 1:
+            raise ValueError("a filter needs exactly one of 'eq', 'in' or range bounds")
+        if bounds and len({isinstance(value, datetime) for value in bounds}) > 1:
+            raise ValueError("range bounds must be all numbers or all dates")
+        return self
+    
+    def to_filter(self) -> MetadataFilter:
+        return MetadataFilter(
+            key=self.key,
+            eq=self.eq,
+            any_of=self.in_,
+            gte=self.gte,
+            gt=self.gt,
+            lte=self.lte,
+            lt=self.lt
+        )
+
 class SearchFileRequest(BaseModel):
     """Request model for file search"""
     query: str = Field(..., description="Search query text", min_length=1, max_length=1000)
+    filters: List[MetadataFilterModel] = Field(
+        default_factory=list, description="Metadata conditions, all of which must match", max_length=16
+    )
+    snippet_length: int = Field(
+        240, description="Return a query-highlighted window of about this many characters (0 = full content)", ge=0, le=5000
+    )
+    top_files: int = Field(5, description="Files per page", ge=1, le=50)
+    cursor: Optional[str] = Field(
+        None, description="next_cursor of the previous page, to load the next files for the same query", max_length=16384
+    )
+    score_threshold: Optional[float] = Field(None, description="Ignore chunks scoring below this similarity")
 
 class IndexDocumentsRequest(BaseModel):
     """Request model for indexing documents"""
     documents: List[Dict[str, Any]] = Field(..., description="List of documents to index")
+    priority: int = Field(0, description="Jobs with higher priority are indexed first", ge=-10, le=10)
+
+class CollectionRebuildRequest(BaseModel):
+    """Request model for building a new collection version"""
+    hnsw_m: int = Field(0, description="HNSW graph degree (0 = database default)", ge=0, le=128)
+    hnsw_ef_construct: int = Field(0, description="HNSW build beam width (0 = database default)", ge=0, le=1024)
+    quantization: str = Field("", description="'' or 'scalar'")
+    shard_number: int = Field(0, description="Shards per collection, or per shard key (0 = database default)", ge=0, le=256)
+    replication_factor: int = Field(0, description="Copies of each shard (0 = database default)", ge=0, le=16)
+    write_consistency_factor: int = Field(0, description="Replicas that must acknowledge a write (0 = database default)", ge=0, le=16)
+    shard_keys: int = Field(0, description="Custom shard keys files are hashed to (0 = automatic sharding)", ge=0, le=256)
+    swap: bool = Field(True, description="Swap the alias as soon as the build is done")
 
 class DeleteDocumentsRequest(BaseModel):
     """Request model for deleting documents"""
@@ -23,19 +84,26 @@ class ChatWithFilesRequest(BaseModel):
     file_ids: List[str] = Field(..., description="List of file IDs to chat with", min_items=1)
     message: str = Field(..., description="User message/question", min_length=1, max_length=2000)
     max_chunks: Optional[int] = Field(5, description="Maximum number of chunks to retrieve", ge=1, le=20)
+    session_id: Optional[str] = Field(None, description="Continue an existing chat session")
+    start_session: bool = Field(False, description="Start a chat session that keeps model state across turns")
+    filters: List[MetadataFilterModel] = Field(
+        default_factory=list, description="Metadata conditions, all of which must match", max_length=16
+    )
 
 # Response models
 class SearchResultItem(BaseModel):
     """Individual search result item"""
     file_id: str = Field(..., description="File identifier")
     score: float = Field(..., description="Similarity score")
-    content: str = Field(..., description="Document content")
+    content: str = Field(..., description="Snippet of the best matching chunk, or its full content")
+    highlights: Optional[List[List[int]]] = Field(None, description="[start, end) offsets of query terms in content")
 
 class FileSearchResponse(BaseModel):
     """Response model for file search"""
     query: str = Field(..., description="Original search query")
     results: List[SearchResultItem] = Field(..., description="Search results")
     total_results: int = Field(..., description="Total number of results")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
 
 class HealthResponse(BaseModel):
     """Response model for health check"""
@@ -43,6 +111,18 @@ class HealthResponse(BaseModel):
     message: str = Field(..., description="Health status message")
     services: Optional[Dict[str, bool]] = Field(None, description="Individual service health")
 
+class ReadinessResponse(BaseModel):
+    """Response model for readiness check"""
+    status: str = Field(
+        ..., description="'ready' once search is initialized ('degraded' while chat is not), otherwise 'starting'"
+    )
+    ready: bool = Field(..., description="Whether the service accepts traffic")
+    startup_seconds: Optional[float] = Field(None, description="Seconds from process start until ready")
+    uptime_seconds: float = Field(..., description="Seconds since process start")
+    phases: Dict[str, float] = Field(default_factory=dict, description="Duration of each startup phase in seconds")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Last error of phases that failed")
+    degraded: Dict[str, str] = Field(default_factory=dict, description="Components not available yet, with the reason")
+
 class APIInfoResponse(BaseModel):
     """Response model for API information"""
     message: str = Field(..., description="API welcome message")
@@ -52,6 +132,7 @@ class APIInfoResponse(BaseModel):
 class CollectionInfoResponse(BaseModel):
     """Response model for collection information"""
     name: str = Field(..., description="Collection name")
+    target: Optional[str] = Field(None, description="Physical collection the name resolves to")
     status: str = Field(..., description="Collection status")
     vectors_count: Optional[int] = Field(None, description="Number of vectors in collection")
     config: Dict[str, Any] = Field(..., description="Collection configuration")
@@ -61,6 +142,60 @@ class IndexResponse(BaseModel):
     message: str = Field(..., description="Operation result message")
     documents_processed: int = Field(..., description="Number of documents processed")
 
+class IndexJobAcceptedResponse(BaseModel):
+    """Response model for a queued indexing job"""
+    message: str = Field(..., description="Operation result message")
+    job_id: str = Field(..., description="Job identifier to poll at /jobs/{job_id}")
+    status: str = Field(..., description="Job status")
+    documents_queued: int = Field(..., description="Number of documents queued")
+
+class IndexJobStatusResponse(BaseModel):
+    """Progress of an indexing job"""
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="queued, running, completed, completed_with_errors or failed")
+    priority: int = Field(..., description="Job priority")
+    total_chunks: int = Field(..., description="Chunks submitted")
+    embedded: int = Field(..., description="Chunks embedded so far")
+    upserted: int = Field(..., description="Chunks written to the vector database so far")
+    failed: int = Field(..., description="Chunks that failed")
+    errors: List[str] = Field(default_factory=list, description="First errors encountered")
+    created_at: float = Field(..., description="Submission time (unix seconds)")
+    started_at: Optional[float] = Field(None, description="Processing start time (unix seconds)")
+    finished_at: Optional[float] = Field(None, description="Completion time (unix seconds)")
+
+class CollectionBuildResponse(BaseModel):
+    """Progress of a collection rebuild"""
+    build_id: str = Field(..., description="Build identifier")
+    alias: str = Field(..., description="Logical collection name")
+    status: str = Field(..., description="building, ready (waiting for swap), swapped or failed")
+    source: Optional[str] = Field(None, description="Collection the alias pointed to")
+    target: Optional[str] = Field(None, description="Collection being built")
+    settings: Dict[str, Any] = Field(..., description="Index settings of the new collection")
+    total_points: int = Field(..., description="Points in the source collection")
+    copied_points: int = Field(..., description="Points copied so far")
+    error: Optional[str] = Field(None, description="Failure reason")
+    started_at: float = Field(..., description="Start time (unix seconds)")
+    finished_at: Optional[float] = Field(None, description="Completion time (unix seconds)")
+
+class StreamIndexLineError(BaseModel):
+    """Error for one NDJSON line, or for a range of lines indexed as one batch"""
+    line: int = Field(..., description="1-based line number")
+    end_line: Optional[int] = Field(None, description="Last line of a failed batch")
+    error: str = Field(..., description="Error message")
+
+class StreamIndexResponse(BaseModel):
+    """Summary of a streaming NDJSON ingest"""
+    job_id: str = Field(..., description="Job identifier, pollable at /jobs/{job_id} during the upload")
+    status: str = Field(..., description="completed, completed_with_errors or failed")
+    lines: int = Field(..., description="Lines read")
+    rejected_lines: int = Field(..., description="Lines that were not valid documents")
+    documents: int = Field(..., description="Valid documents parsed")
+    embedded: int = Field(..., description="Documents embedded")
+    indexed: int = Field(..., description="Documents written to the vector database")
+    failed: int = Field(..., description="Valid documents that failed to index")
+    errors: List[StreamIndexLineError] = Field(default_factory=list, description="Errors with their line positions")
+    errors_truncated: bool = Field(False, description="Whether more errors occurred than are listed")
+
 class DeleteResponse(BaseModel):
     """Response model for delete operations"""
     message: str = Field(..., description="Operation result message")
@@ -77,6 +212,14 @@ class ChatWithFilesResponse(BaseModel):
     response: str = Field(..., description="Chat response from LLM")
     source_chunks: List[ChatChunk] = Field(..., description="Source chunks used for response")
     total_chunks: int = Field(..., description="Total number of chunks found")
+    context_tokens: Optional[int] = Field(None, description="Prompt tokens used by the packed document context")
+    session_id: Optional[str] = Field(None, description="Chat session ID for follow-up turns")
+    reused_tokens: Optional[int] = Field(None, description="Tokens reused from the session state instead of re-processed")
+
+class ChatSessionDeleteResponse(BaseModel):
+    """Response model for ending a chat session"""
+    message: str = Field(..., description="Operation result message")
+    session_id: str = Field(..., description="Ended chat session ID")
 
 # Error response models
 class ErrorResponse(BaseModel):
@@ -0,0 +1,35 @@
+"""
+Fast JSON responses.
+Routes return plain dicts built from trusted service data through
+`FastJSONResponse`, which skips FastAPI's response-model validation and
+`jsonable_encoder` pass and serializes with orjson.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def _default(value: Any) -> Any:
+    # Types orjson does not serialize natively
+    if isinstance(value, Mapping):
+        # Read-only views such as lazily decoded payload metadata
+        return dict(value)
+    if hasattr(value, "value"):
+        return value.value
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
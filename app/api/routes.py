@@ -3,34 +3,81 @@ FastAPI routes for the document search API
 """
 
 import logging
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from .responses import FastJSONResponse
 from .models import (
     SearchFileRequest, 
     FileSearchResponse, 
     HealthResponse, 
+    ReadinessResponse,
     APIInfoResponse,
     CollectionInfoResponse,
     IndexDocumentsRequest,
-    IndexResponse,
+    IndexJobAcceptedResponse,
+    IndexJobStatusResponse,
+    StreamIndexResponse,
+    CollectionRebuildRequest,
+    CollectionBuildResponse,
     DeleteDocumentsRequest,
     DeleteResponse,
     ErrorResponse,
     ChatWithFilesRequest,
-    ChatWithFilesResponse
+    ChatWithFilesResponse,
+    ChatSessionDeleteResponse
 )
 from ..services.search_service import get_search_service, SearchService
 from ..services.chat_service import get_chat_service, ChatService
-from ..providers.base import Document
-from ..core.exceptions import SearchError, ProviderError, ConfigurationError, ChatError
+from ..services.indexing_jobs import get_job_manager, IndexJobManager
+from ..services.streaming_ingest import StreamIngestor
+from ..services.collection_versions import get_version_manager, CollectionVersionManager
+from ..services.tenancy import get_tenant_registry
+from ..services.query_log import get_query_log
+from ..core.config import get_config
+from ..providers.base import Document, CollectionSettings
+from ..core.metrics import registry as metrics_registry
+from ..core.startup import startup_state
+from ..core.exceptions import (
+    SearchError,
+    ProviderError,
+    ConfigurationError,
+    ChatError,
+    ChatSessionNotFoundError,
+    ValidationError,
+    JobNotFoundError,
+    JobQueueFullError,
+    TenantNotFoundError,
+    VectorDBError
+)
 
 logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter()
 
+async def get_tenant(request: Request) -> Optional[str]:
+    """Tenant named by the tenancy header, None when tenancy is disabled"""
+    registry = get_tenant_registry()
+    if not registry.enabled:
+        return None
+    try:
+        return registry.resolve(request.headers.get(registry.config.header))
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TenantNotFoundError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+async def get_tenant_search_service(
+    tenant: Optional[str] = Depends(get_tenant),
+    search_service: SearchService = Depends(get_search_service)
+) -> SearchService:
+    """Search service over the collection of the request's tenant"""
+    if tenant is None:
+        return search_service
+    return await get_tenant_registry().search_service(tenant, search_service)
+
 @router.get("/", response_model=APIInfoResponse)
 async def root():
     """Root endpoint with API information"""
@@ -39,11 +86,18 @@ async def root():
         version="2.0.0",
         endpoints={
             "health": "/health",
+            "live": "/live",
+            "ready": "/ready",
             "search": "/search-files",
             "chat": "/chat-with-files",
+            "chat_sessions": "/chat-sessions/{session_id}",
             "index": "/index-documents",
+            "index_stream": "/index-documents/stream",
+            "jobs": "/jobs/{job_id}",
             "delete": "/delete-documents",
             "collection": "/collection-info",
+            "collection_rebuild": "/collection/rebuild",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     )
@@ -72,10 +126,31 @@ async def health_check(search_service: SearchService = Depends(get_search_servic
             services={}
         )
 
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@router.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness():
+    """Readiness probe: 200 once providers are initialized, 503 while starting up"""
+    return FastJSONResponse(startup_state.to_dict(), status_code=200 if startup_state.ready else 503)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    if not metrics_registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @router.post("/search-files", response_model=FileSearchResponse)
 async def search_files(
     request: SearchFileRequest,
-    search_service: SearchService = Depends(get_search_service)
+    search_service: SearchService = Depends(get_tenant_search_service)
 ):
     """
     Search for documents grouped by file_id
@@ -88,22 +163,34 @@ async def search_files(
     """
     try:
         logger.info(f"Searching for query: {request.query}")
+        if request.cursor is None:
+            # Later pages are not separate searches
+            get_query_log().record(search_service.config.vector_db.collection, request.query)
         
         # Perform search
-        results = await search_service.search_by_file_id(
+        page = await search_service.search_files_page(
             query=request.query,
-            k=50,  # Search more documents to ensure we get diverse file_ids
-            top_files=5  # Return top 5 file_ids
+            top_files=request.top_files,
+            k=max(50, request.top_files * 10),  # Search more documents to ensure we get diverse file_ids
+            filters=[item.to_filter() for item in request.filters],
+            snippet_length=request.snippet_length,
+            cursor=request.cursor,
+            score_threshold=request.score_threshold
         )
+        results = page.results
         
         logger.info(f"Found {len(results)} file_id results")
         
-        return FileSearchResponse(
-            query=request.query,
-            results=results,
-            total_results=len(results)
-        )
+        # Results come from our own service, so skip response-model re-validation
+        return FastJSONResponse({
+            "query": request.query,
+            "results": results,
+            "total_results": len(results),
+            "next_cursor": page.next_cursor
+        })
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SearchError as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -111,23 +198,23 @@ async def search_files(
         logger.error(f"Unexpected error during search: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@router.post("/index-documents", response_model=IndexResponse)
+@router.post("/index-documents", response_model=IndexJobAcceptedResponse, status_code=202)
 async def index_documents(
     request: IndexDocumentsRequest,
-    search_service: SearchService = Depends(get_search_service)
+    tenant: Optional[str] = Depends(get_tenant),
+    search_service: SearchService = Depends(get_tenant_search_service),
+    job_manager: IndexJobManager = Depends(get_job_manager)
 ):
     """
-    Index documents into the vector database
+    Queue documents for indexing into the vector database
     
     Args:
         request: IndexDocumentsRequest containing documents to index
         
     Returns:
-        IndexResponse with operation result
+        IndexJobAcceptedResponse with the job ID to poll at /jobs/{job_id}
     """
     try:
-        logger.info(f"Indexing {len(request.documents)} documents")
-        
         # Convert to Document objects
         documents = []
         for doc_data in request.documents:
@@ -138,26 +225,76 @@ async def index_documents(
             )
             documents.append(doc)
         
-        # Index documents
-        await search_service.index_documents(documents)
+        # Queue for the background workers; a tenant's jobs write to the tenant's collection
+        job = job_manager.submit(documents, priority=request.priority, search_service=search_service, tenant=tenant)
         
-        logger.info(f"Successfully indexed {len(documents)} documents")
+        logger.info(f"Queued indexing job {job.job_id} with {len(documents)} documents")
         
-        return IndexResponse(
-            message="Documents indexed successfully",
-            documents_processed=len(documents)
+        return IndexJobAcceptedResponse(
+            message="Documents queued for indexing",
+            job_id=job.job_id,
+            status=job.status,
+            documents_queued=len(documents)
         )
         
-    except SearchError as e:
-        logger.error(f"Indexing failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
+    except JobQueueFullError as e:
+        logger.warning(f"Indexing rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Unexpected error during indexing: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/index-documents/stream", response_model=StreamIndexResponse)
+async def index_documents_stream(
+    request: Request,
+    job_id: Optional[str] = None,
+    tenant: Optional[str] = Depends(get_tenant),
+    search_service: SearchService = Depends(get_tenant_search_service),
+    job_manager: IndexJobManager = Depends(get_job_manager)
+):
+    """
+    Index documents sent as newline-delimited JSON, one document per line
+    
+    Each line is {"content": ..., "file_id": ..., "metadata": {...}}. Lines are indexed in
+    batches while the body is still uploading; pass `job_id` to follow progress at /jobs/{job_id}.
+    
+    Returns:
+        StreamIndexResponse with counts and per-line errors
+    """
+    try:
+        job = job_manager.track(job_id, tenant=tenant)
+    except ValidationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    try:
+        ingestor = StreamIngestor(search_service, job, batch_size=get_config().indexing.batch_size)
+        result = await ingestor.ingest(request.stream())
+        return FastJSONResponse(result.to_dict())
+        
+    except Exception as e:
+        logger.error(f"Streaming ingest {job.job_id} failed: {e}")
+        # Aborted uploads (client disconnect, server error) end the job as failed
+        job.fail(0, e)
+        job.finish("failed")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=IndexJobStatusResponse)
+async def get_index_job(
+    job_id: str,
+    tenant: Optional[str] = Depends(get_tenant),
+    job_manager: IndexJobManager = Depends(get_job_manager)
+):
+    """Progress of a background indexing job"""
+    try:
+        return IndexJobStatusResponse(**job_manager.get(job_id, tenant=tenant).to_dict())
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.post("/chat-with-files", response_model=ChatWithFilesResponse)
 async def chat_with_files(
     request: ChatWithFilesRequest,
+    tenant: Optional[str] = Depends(get_tenant),
+    search_service: SearchService = Depends(get_tenant_search_service),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """
@@ -176,13 +313,22 @@ async def chat_with_files(
         result = await chat_service.chat_with_files(
             file_ids=request.file_ids,
             message=request.message,
-            max_chunks=request.max_chunks
+            max_chunks=request.max_chunks,
+            session_id=request.session_id,
+            start_session=request.start_session,
+            filters=[item.to_filter() for item in request.filters],
+            search_service=search_service,
+            tenant=tenant
         )
         
         logger.info(f"Chat completed with {result['total_chunks']} chunks")
         
-        return ChatWithFilesResponse(**result)
+        return FastJSONResponse({"session_id": None, "reused_tokens": None, **result})
         
+    except ChatSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ChatError as e:
         logger.error(f"Chat failed: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
@@ -190,10 +336,34 @@ async def chat_with_files(
         logger.error(f"Unexpected error during chat: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.delete("/chat-sessions/{session_id}", response_model=ChatSessionDeleteResponse)
+async def delete_chat_session(
+    session_id: str,
+    tenant: Optional[str] = Depends(get_tenant),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """
+    End a chat session and release its server-side state
+    
+    Args:
+        session_id: ID returned by /chat-with-files
+        
+    Returns:
+        ChatSessionDeleteResponse with operation result
+    """
+    try:
+        chat_service.end_session(session_id, tenant=tenant)
+        return ChatSessionDeleteResponse(
+            message="Chat session ended",
+            session_id=session_id
+        )
+    except ChatSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.delete("/delete-documents", response_model=DeleteResponse)
 async def delete_documents(
     request: DeleteDocumentsRequest,
-    search_service: SearchService = Depends(get_search_service)
+    search_service: SearchService = Depends(get_tenant_search_service)
 ):
     """
     Delete documents by file IDs
@@ -225,7 +395,7 @@ async def delete_documents(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/collection-info", response_model=CollectionInfoResponse)
-async def get_collection_info(search_service: SearchService = Depends(get_search_service)):
+async def get_collection_info(search_service: SearchService = Depends(get_tenant_search_service)):
     """
     Get information about the vector database collection
     
@@ -237,7 +407,7 @@ async def get_collection_info(search_service: SearchService = Depends(get_search
         
         collection_info = await search_service.get_collection_info()
         
-        return CollectionInfoResponse(**collection_info)
+        return FastJSONResponse(collection_info)
         
     except SearchError as e:
         logger.error(f"Failed to get collection info: {e}")
@@ -245,3 +415,50 @@ async def get_collection_info(search_service: SearchService = Depends(get_search
     except Exception as e:
         logger.error(f"Unexpected error getting collection info: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/collection/rebuild", response_model=CollectionBuildResponse, status_code=202)
+async def rebuild_collection(
+    request: CollectionRebuildRequest,
+    version_manager: CollectionVersionManager = Depends(get_version_manager)
+):
+    """
+    Build a new version of the collection with different index settings
+    
+    Stored vectors are copied in the background while searches keep using the
+    current version; the alias is swapped when the copy is done (or by
+    POST /collection/rebuild/swap when `swap` is false).
+    """
+    settings = CollectionSettings(
+        hnsw_m=request.hnsw_m,
+        hnsw_ef_construct=request.hnsw_ef_construct,
+        quantization=request.quantization,
+        shard_number=request.shard_number,
+        replication_factor=request.replication_factor,
+        write_consistency_factor=request.write_consistency_factor,
+        shard_keys=request.shard_keys
+    )
+    try:
+        build = version_manager.start(settings, swap=request.swap)
+        logger.info(f"Started collection build {build.build_id}")
+        return CollectionBuildResponse(**build.to_dict())
+    except ValidationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/collection/rebuild", response_model=CollectionBuildResponse)
+async def get_collection_rebuild(version_manager: CollectionVersionManager = Depends(get_version_manager)):
+    """Progress of the latest collection build"""
+    if version_manager.build is None:
+        raise HTTPException(status_code=404, detail="No collection build has been started")
+    return CollectionBuildResponse(**version_manager.build.to_dict())
+
+@router.post("/collection/rebuild/swap", response_model=CollectionBuildResponse)
+async def swap_collection_rebuild(version_manager: CollectionVersionManager = Depends(get_version_manager)):
+    """Point the alias at a build that finished with swap=false"""
+    try:
+        build = await version_manager.swap()
+        return CollectionBuildResponse(**build.to_dict())
+    except ValidationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except VectorDBError as e:
+        logger.error(f"Alias swap failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Alias swap failed: {str(e)}")
@@ -0,0 +1,93 @@
+"""
+Admission control: bounded concurrency with a bounded wait queue per route class.
+Requests beyond the queue are shed immediately instead of piling up behind a
+slow backend, so one busy route class cannot drive latency up for the others.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from .config import AdmissionConfig
+from .exceptions import AdmissionRejectedError
+from .metrics import registry, ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT
+
+ROUTE_CLASSES = {
+    "/search-files": "search",
+    "/index-documents": "index",
+    "/index-documents/stream": "index",
+    "/chat-with-files": "chat",
+}
+
+class AdmissionLimiter:
+    """At most `concurrency` requests in flight and `queue_size` waiting for a slot"""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, queue_timeout: float, retry_after: int = 1):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raises AdmissionRejectedError"""
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                ADMISSION_REJECTED.inc(route_class=self.name, reason="queue_full")
+                raise AdmissionRejectedError(
+                    f"Too many {self.name} requests in progress", retry_after=self.retry_after, status_code=429
+                )
+
+            started = time.perf_counter()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                ADMISSION_REJECTED.inc(route_class=self.name, reason="queue_timeout")
+                raise AdmissionRejectedError(
+                    f"Timed out waiting for a {self.name} slot", retry_after=self.retry_after, status_code=503
+                )
+            finally:
+                self.waiting -= 1
+            ADMISSION_WAIT.observe(time.perf_counter() - started, route_class=self.name)
+        else:
+            await self._semaphore.acquire()
+            ADMISSION_WAIT.observe(0.0, route_class=self.name)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+# Limiters of the running app, exported as gauges on scrape
+_active_limiters: Dict[str, AdmissionLimiter] = {}
+
+def build_limiters(config: AdmissionConfig) -> Dict[str, AdmissionLimiter]:
+    """Limiters keyed by route template"""
+    _active_limiters.clear()
+    _active_limiters.update({
+        "search": AdmissionLimiter(
+            "search", config.search_concurrency, config.search_queue, config.queue_timeout_seconds, config.retry_after_seconds
+        ),
+        "index": AdmissionLimiter(
+            "index", config.index_concurrency, config.index_queue, config.queue_timeout_seconds, config.retry_after_seconds
+        ),
+        "chat": AdmissionLimiter(
+            "chat", config.chat_concurrency, config.chat_queue, config.queue_timeout_seconds, config.retry_after_seconds
+        ),
+    })
+    return {route: _active_limiters[route_class] for route, route_class in ROUTE_CLASSES.items()}
+
+def track_limiter(limiter: AdmissionLimiter) -> None:
+    """Export a limiter created outside build_limiters (e.g. per tenant)"""
+    _active_limiters[limiter.name] = limiter
+
+def _collect_admission() -> None:
+    for limiter in _active_limiters.values():
+        ADMISSION_IN_FLIGHT.set(limiter.in_flight, route_class=limiter.name)
+        ADMISSION_QUEUE_DEPTH.set(limiter.waiting, route_class=limiter.name)
+
+registry.add_collector(_collect_admission)
@@ -5,6 +5,7 @@ Priority: environment variables > config file > defaults
 """
 
 import os
+import re
 import yaml
 import json
 from typing import Optional, Dict, Any, Union
@@ -12,6 +13,9 @@ from pathlib import Path
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
+# Tenant ids end up in collection names and metric labels
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
 @dataclass
 class VectorDBConfig:
     """Vector database configuration"""
@@ -20,6 +24,15 @@ class VectorDBConfig:
     api_key: str = ""
     collection: str = "TestCollection6"
     timeout: int = 30
+    use_alias: bool = True
+    hnsw_m: int = 0
+    hnsw_ef_construct: int = 0
+    quantization: str = ""
+    payload_indexes: dict = field(default_factory=dict)
+    shard_number: int = 0
+    replication_factor: int = 0
+    write_consistency_factor: int = 0
+    shard_keys: int = 0
 
 @dataclass
 class EmbeddingConfig:
@@ -27,8 +40,51 @@ class EmbeddingConfig:
     provider: str = "ollama"
     model: str = "bge-m3"
     base_url: str = "http://localhost:11434"
+    base_urls: list = field(default_factory=list)
     api_key: str = ""
     dimensions: int = 1024
+    max_retries: int = 2
+    eject_seconds: float = 30.0
+    concurrency_per_endpoint: int = 4
+    # Permits per endpoint that bulk embedding (indexing, warm-up) may not take, kept for queries
+    query_reserved_per_endpoint: int = 1
+    metadata_cache_path: str = ".model-metadata.json"
+    query_cache_size: int = 1024
+
+@dataclass
+class MultiVectorConfig:
+    """Late-interaction (ColBERT-style) token vectors that rescore dense candidates with MaxSim"""
+    enabled: bool = False
+    provider: str = "bge_m3"
+    model: str = "BAAI/bge-m3"
+    device: str = ""
+    use_fp16: bool = True
+    batch_size: int = 16
+    max_length: int = 512
+    candidates: int = 50
+
+@dataclass
+class DedupConfig:
+    """Near-duplicate chunk detection at ingest: MinHash over word shingles, banded for lookup"""
+    enabled: bool = False
+    threshold: float = 0.7
+    shingle_size: int = 3
+    num_perm: int = 64
+    bands: int = 16
+    min_words: int = 5
+    embedding_threshold: float = 0.0
+
+@dataclass
+class QueryLogConfig:
+    """Log of normalized search queries, used to pre-embed the most frequent ones at startup"""
+    path: str = ".query-log.jsonl"
+    flush_seconds: float = 10.0
+    max_queries: int = 50000
+    warmup_top_n: int = 1000
+    warmup_batch_size: int = 32
+    warmup_search: bool = False
+    warmup_timeout_seconds: float = 60.0
+    warmup_interval_seconds: float = 0.0
 
 @dataclass
 class APIConfig:
@@ -38,6 +94,8 @@ class APIConfig:
     reload: bool = False
     log_level: str = "INFO"
     cors_origins: list = field(default_factory=lambda: ["*"])
+    gzip_min_size: int = 1024
+    gzip_level: int = 1
 
 @dataclass
 class ChatConfig:
@@ -45,16 +103,85 @@ class ChatConfig:
     provider: str = "ollama"
     model: str = "qwen2.5:1.5b"
     base_url: str = "http://localhost:11434"
+    base_urls: list = field(default_factory=list)
+    eject_seconds: float = 30.0
     context_limit: int = 3000
     max_chunks: int = 5
+    tokenizer: str = "Qwen/Qwen2.5-1.5B-Instruct"
+    keep_alive: str = "30m"
+    num_ctx: int = 4096
+    num_predict: int = 512
+    num_thread: int = 0
+    temperature: float = 0.1
+    top_p: float = 0.9
+    warmup: bool = True
+    session_ttl_seconds: int = 1800
+    max_sessions: int = 1000
+
+@dataclass
+class IndexingConfig:
+    """Background indexing job configuration"""
+    workers: int = 2
+    batch_size: int = 32
+    max_queued_jobs: int = 100
+    job_ttl_seconds: int = 3600
+    max_jobs: int = 1000
+
+@dataclass
+class AdmissionConfig:
+    """Per route class concurrency limits and queue lengths"""
+    enabled: bool = True
+    search_concurrency: int = 32
+    search_queue: int = 128
+    index_concurrency: int = 8
+    index_queue: int = 32
+    chat_concurrency: int = 4
+    chat_queue: int = 8
+    queue_timeout_seconds: float = 10.0
+    retry_after_seconds: int = 2
+
+@dataclass
+class TenancyConfig:
+    """Tenant routing: one collection, query cache and request quota per tenant"""
+    enabled: bool = False
+    header: str = "X-Tenant-ID"
+    default_tenant: str = "default"
+    tenants: dict = field(default_factory=dict)
+    # Serve ids missing from `tenants` too (each gets a collection), up to max_tenants
+    allow_unlisted: bool = False
+    max_tenants: int = 64
+    concurrency: int = 8
+    queue: int = 32
+
+@dataclass
+class MetricsConfig:
+    """Metrics configuration"""
+    enabled: bool = True
+
+@dataclass
+class TracingConfig:
+    """OpenTelemetry tracing configuration"""
+    enabled: bool = False
+    exporter: str = "console"
+    file_path: str = "traces.jsonl"
+    otlp_endpoint: str = ""
+    service_name: str = "document-search-api"
 
 @dataclass
 class AppConfig:
     """Main application configuration"""
     vector_db: VectorDBConfig = field(default_factory=VectorDBConfig)
     embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
+    multivector: MultiVectorConfig = field(default_factory=MultiVectorConfig)
+    query_log: QueryLogConfig = field(default_factory=QueryLogConfig)
+    dedup: DedupConfig = field(default_factory=DedupConfig)
     api: APIConfig = field(default_factory=APIConfig)
     chat: ChatConfig = field(default_factory=ChatConfig)
+    indexing: IndexingConfig = field(default_factory=IndexingConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+    tenancy: TenancyConfig = field(default_factory=TenancyConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
     environment: str = "development"
 
 class ConfigManager:
@@ -141,28 +268,125 @@ class ConfigManager:
                 "url": "",
                 "api_key": "",
                 "collection": "TestCollection6",
-                "timeout": 30
+                "timeout": 30,
+                "use_alias": True,
+                "hnsw_m": 0,
+                "hnsw_ef_construct": 0,
+                "quantization": "",
+                "payload_indexes": {},
+                "shard_number": 0,
+                "replication_factor": 0,
+                "write_consistency_factor": 0,
+                "shard_keys": 0
             },
             "embedding": {
                 "provider": "ollama",
                 "model": "bge-m3",
                 "base_url": "http://localhost:11434",
+                "base_urls": [],
                 "api_key": "",
-                "dimensions": 1024
+                "dimensions": 1024,
+                "max_retries": 2,
+                "eject_seconds": 30.0,
+                "concurrency_per_endpoint": 4,
+                "query_reserved_per_endpoint": 1,
+                "metadata_cache_path": ".model-metadata.json",
+                "query_cache_size": 1024
+            },
+            "multivector": {
+                "enabled": False,
+                "provider": "bge_m3",
+                "model": "BAAI/bge-m3",
+                "device": "",
+                "use_fp16": True,
+                "batch_size": 16,
+                "max_length": 512,
+                "candidates": 50
+            },
+            "dedup": {
+                "enabled": False,
+                "threshold": 0.7,
+                "shingle_size": 3,
+                "num_perm": 64,
+                "bands": 16,
+                "min_words": 5,
+                "embedding_threshold": 0.0
+            },
+            "query_log": {
+                "path": ".query-log.jsonl",
+                "flush_seconds": 10.0,
+                "max_queries": 50000,
+                "warmup_top_n": 1000,
+                "warmup_batch_size": 32,
+                "warmup_search": False,
+                "warmup_timeout_seconds": 60.0,
+                "warmup_interval_seconds": 0.0
             },
             "api": {
                 "host": "0.0.0.0",
                 "port": 8001,
                 "reload": False,
                 "log_level": "INFO",
-                "cors_origins": ["*"]
+                "cors_origins": ["*"],
+                "gzip_min_size": 1024,
+                "gzip_level": 1
             },
             "chat": {
                 "provider": "ollama",
                 "model": "qwen2.5:1.5b",
                 "base_url": "http://localhost:11434",
+                "base_urls": [],
+                "eject_seconds": 30.0,
                 "context_limit": 3000,
-                "max_chunks": 5
+                "max_chunks": 5,
+                "tokenizer": "Qwen/Qwen2.5-1.5B-Instruct",
+                "keep_alive": "30m",
+                "num_ctx": 4096,
+                "num_predict": 512,
+                "num_thread": 0,
+                "temperature": 0.1,
+                "top_p": 0.9,
+                "warmup": True,
+                "session_ttl_seconds": 1800,
+                "max_sessions": 1000
+            },
+            "indexing": {
+                "workers": 2,
+                "batch_size": 32,
+                "max_queued_jobs": 100,
+                "job_ttl_seconds": 3600,
+                "max_jobs": 1000
+            },
+            "admission": {
+                "enabled": True,
+                "search_concurrency": 32,
+                "search_queue": 128,
+                "index_concurrency": 8,
+                "index_queue": 32,
+                "chat_concurrency": 4,
+                "chat_queue": 8,
+                "queue_timeout_seconds": 10.0,
+                "retry_after_seconds": 2
+            },
+            "tenancy": {
+                "enabled": False,
+                "header": "X-Tenant-ID",
+                "default_tenant": "default",
+                "tenants": {},
+                "allow_unlisted": False,
+                "max_tenants": 64,
+                "concurrency": 8,
+                "queue": 32
+            },
+            "metrics": {
+                "enabled": True
+            },
+            "tracing": {
+                "enabled": False,
+                "exporter": "console",
+                "file_path": "traces.jsonl",
+                "otlp_endpoint": "",
+                "service_name": "document-search-api"
             },
             "environment": "development"
         }
@@ -192,6 +416,23 @@ class ConfigManager:
             config_data["vector_db"]["collection"] = os.getenv("QDRANT_COLLECTION")
         if os.getenv("VECTOR_DB_PROVIDER"):
             config_data["vector_db"]["provider"] = os.getenv("VECTOR_DB_PROVIDER")
+        if os.getenv("QDRANT_USE_ALIAS"):
+            config_data["vector_db"]["use_alias"] = os.getenv("QDRANT_USE_ALIAS").lower() in ("1", "true", "yes")
+        if os.getenv("QDRANT_PAYLOAD_INDEXES"):
+            # "category:keyword,year:integer"
+            config_data["vector_db"]["payload_indexes"] = dict(
+                item.strip().split(":", 1) for item in os.getenv("QDRANT_PAYLOAD_INDEXES").split(",") if ":" in item
+            )
+        if os.getenv("QDRANT_QUANTIZATION"):
+            config_data["vector_db"]["quantization"] = os.getenv("QDRANT_QUANTIZATION")
+        for option, env_name in (
+            ("shard_number", "QDRANT_SHARD_NUMBER"),
+            ("replication_factor", "QDRANT_REPLICATION_FACTOR"),
+            ("write_consistency_factor", "QDRANT_WRITE_CONSISTENCY_FACTOR"),
+            ("shard_keys", "QDRANT_SHARD_KEYS"),
+        ):
+            if os.getenv(env_name):
+                config_data["vector_db"][option] = int(os.getenv(env_name))
         
         # Embedding config
         if os.getenv("EMBEDDING_PROVIDER"):
@@ -200,8 +441,44 @@ class ConfigManager:
             config_data["embedding"]["model"] = os.getenv("EMBEDDING_MODEL")
         if os.getenv("OLLAMA_BASE_URL"):
             config_data["embedding"]["base_url"] = os.getenv("OLLAMA_BASE_URL")
+        if os.getenv("OLLAMA_BASE_URLS"):
+            config_data["embedding"]["base_urls"] = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS").split(",") if u.strip()]
         if os.getenv("OPENAI_API_KEY"):
             config_data["embedding"]["api_key"] = os.getenv("OPENAI_API_KEY")
+        if os.getenv("EMBEDDING_METADATA_CACHE") is not None:
+            config_data["embedding"]["metadata_cache_path"] = os.getenv("EMBEDDING_METADATA_CACHE")
+        if os.getenv("QUERY_CACHE_SIZE"):
+            config_data["embedding"]["query_cache_size"] = int(os.getenv("QUERY_CACHE_SIZE"))
+        if os.getenv("EMBEDDING_QUERY_RESERVED"):
+            config_data["embedding"]["query_reserved_per_endpoint"] = int(os.getenv("EMBEDDING_QUERY_RESERVED"))
+        
+        # Multi-vector config
+        if os.getenv("MULTIVECTOR_ENABLED"):
+            config_data["multivector"]["enabled"] = os.getenv("MULTIVECTOR_ENABLED").lower() in ("1", "true", "yes")
+        if os.getenv("MULTIVECTOR_MODEL"):
+            config_data["multivector"]["model"] = os.getenv("MULTIVECTOR_MODEL")
+        if os.getenv("MULTIVECTOR_DEVICE"):
+            config_data["multivector"]["device"] = os.getenv("MULTIVECTOR_DEVICE")
+        if os.getenv("MULTIVECTOR_CANDIDATES"):
+            config_data["multivector"]["candidates"] = int(os.getenv("MULTIVECTOR_CANDIDATES"))
+        
+        # Dedup config
+        if os.getenv("DEDUP_ENABLED"):
+            config_data["dedup"]["enabled"] = os.getenv("DEDUP_ENABLED").lower() in ("1", "true", "yes")
+        if os.getenv("DEDUP_THRESHOLD"):
+            config_data["dedup"]["threshold"] = float(os.getenv("DEDUP_THRESHOLD"))
+        if os.getenv("DEDUP_EMBEDDING_THRESHOLD"):
+            config_data["dedup"]["embedding_threshold"] = float(os.getenv("DEDUP_EMBEDDING_THRESHOLD"))
+        
+        # Query log config
+        if os.getenv("QUERY_LOG_PATH") is not None:
+            config_data["query_log"]["path"] = os.getenv("QUERY_LOG_PATH")
+        if os.getenv("QUERY_WARMUP_TOP_N"):
+            config_data["query_log"]["warmup_top_n"] = int(os.getenv("QUERY_WARMUP_TOP_N"))
+        if os.getenv("QUERY_WARMUP_SEARCH"):
+            config_data["query_log"]["warmup_search"] = os.getenv("QUERY_WARMUP_SEARCH").lower() in ("1", "true", "yes")
+        if os.getenv("QUERY_WARMUP_INTERVAL"):
+            config_data["query_log"]["warmup_interval_seconds"] = float(os.getenv("QUERY_WARMUP_INTERVAL"))
         
         # API config
         if os.getenv("API_HOST"):
@@ -210,6 +487,8 @@ class ConfigManager:
             config_data["api"]["port"] = int(os.getenv("API_PORT"))
         if os.getenv("LOG_LEVEL"):
             config_data["api"]["log_level"] = os.getenv("LOG_LEVEL")
+        if os.getenv("API_GZIP_MIN_SIZE"):
+            config_data["api"]["gzip_min_size"] = int(os.getenv("API_GZIP_MIN_SIZE"))
         if os.getenv("ENVIRONMENT"):
             config_data["environment"] = os.getenv("ENVIRONMENT")
         # Chat config
@@ -219,10 +498,75 @@ class ConfigManager:
             config_data["chat"]["model"] = os.getenv("CHAT_MODEL")
         if os.getenv("CHAT_BASE_URL"):
             config_data["chat"]["base_url"] = os.getenv("CHAT_BASE_URL")
+        if os.getenv("CHAT_BASE_URLS"):
+            config_data["chat"]["base_urls"] = [u.strip() for u in os.getenv("CHAT_BASE_URLS").split(",") if u.strip()]
         if os.getenv("CHAT_CONTEXT_LIMIT"):
             config_data["chat"]["context_limit"] = int(os.getenv("CHAT_CONTEXT_LIMIT"))
         if os.getenv("CHAT_MAX_CHUNKS"):
             config_data["chat"]["max_chunks"] = int(os.getenv("CHAT_MAX_CHUNKS"))
+        if os.getenv("CHAT_TOKENIZER") is not None:
+            config_data["chat"]["tokenizer"] = os.getenv("CHAT_TOKENIZER")
+        if os.getenv("CHAT_KEEP_ALIVE"):
+            config_data["chat"]["keep_alive"] = os.getenv("CHAT_KEEP_ALIVE")
+        if os.getenv("CHAT_NUM_CTX"):
+            config_data["chat"]["num_ctx"] = int(os.getenv("CHAT_NUM_CTX"))
+        if os.getenv("CHAT_NUM_PREDICT"):
+            config_data["chat"]["num_predict"] = int(os.getenv("CHAT_NUM_PREDICT"))
+        if os.getenv("CHAT_NUM_THREAD"):
+            config_data["chat"]["num_thread"] = int(os.getenv("CHAT_NUM_THREAD"))
+        if os.getenv("CHAT_WARMUP"):
+            config_data["chat"]["warmup"] = os.getenv("CHAT_WARMUP").lower() in ("1", "true", "yes")
+        
+        # Indexing config
+        if os.getenv("INDEX_WORKERS"):
+            config_data["indexing"]["workers"] = int(os.getenv("INDEX_WORKERS"))
+        if os.getenv("INDEX_BATCH_SIZE"):
+            config_data["indexing"]["batch_size"] = int(os.getenv("INDEX_BATCH_SIZE"))
+        if os.getenv("INDEX_MAX_QUEUED_JOBS"):
+            config_data["indexing"]["max_queued_jobs"] = int(os.getenv("INDEX_MAX_QUEUED_JOBS"))
+        
+        # Admission control config
+        if os.getenv("ADMISSION_ENABLED"):
+            config_data["admission"]["enabled"] = os.getenv("ADMISSION_ENABLED").lower() in ("1", "true", "yes")
+        for route_class in ("search", "index", "chat"):
+            concurrency = os.getenv(f"{route_class.upper()}_MAX_CONCURRENCY")
+            if concurrency:
+                config_data["admission"][f"{route_class}_concurrency"] = int(concurrency)
+            queue = os.getenv(f"{route_class.upper()}_MAX_QUEUE")
+            if queue:
+                config_data["admission"][f"{route_class}_queue"] = int(queue)
+        
+        # Tenancy config
+        if os.getenv("TENANCY_ENABLED"):
+            config_data["tenancy"]["enabled"] = os.getenv("TENANCY_ENABLED").lower() in ("1", "true", "yes")
+        if os.getenv("TENANTS"):
+            # "acme:acme_docs,globex" -> acme uses collection acme_docs, globex the derived name
+            tenants = {}
+            for item in os.getenv("TENANTS").split(","):
+                tenant, _, collection = item.strip().partition(":")
+                if tenant:
+                    tenants[tenant] = collection.strip()
+            config_data["tenancy"]["tenants"] = tenants
+        if os.getenv("TENANCY_ALLOW_UNLISTED"):
+            config_data["tenancy"]["allow_unlisted"] = os.getenv("TENANCY_ALLOW_UNLISTED").lower() in ("1", "true", "yes")
+        if os.getenv("TENANT_MAX_CONCURRENCY"):
+            config_data["tenancy"]["concurrency"] = int(os.getenv("TENANT_MAX_CONCURRENCY"))
+        if os.getenv("TENANT_MAX_QUEUE"):
+            config_data["tenancy"]["queue"] = int(os.getenv("TENANT_MAX_QUEUE"))
+        
+        # Metrics config
+        if os.getenv("METRICS_ENABLED"):
+            config_data["metrics"]["enabled"] = os.getenv("METRICS_ENABLED").lower() in ("1", "true", "yes")
+        
+        # Tracing config
+        if os.getenv("TRACING_ENABLED"):
+            config_data["tracing"]["enabled"] = os.getenv("TRACING_ENABLED").lower() in ("1", "true", "yes")
+        if os.getenv("TRACING_EXPORTER"):
+            config_data["tracing"]["exporter"] = os.getenv("TRACING_EXPORTER")
+        if os.getenv("TRACING_FILE"):
+            config_data["tracing"]["file_path"] = os.getenv("TRACING_FILE")
+        if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            config_data["tracing"]["otlp_endpoint"] = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
         
         return config_data
     
@@ -230,14 +574,30 @@ class ConfigManager:
         """Create AppConfig object from dictionary"""
         vector_db_config = VectorDBConfig(**config_data["vector_db"])
         embedding_config = EmbeddingConfig(**config_data["embedding"])
+        multivector_config = MultiVectorConfig(**config_data["multivector"])
+        query_log_config = QueryLogConfig(**config_data["query_log"])
+        dedup_config = DedupConfig(**config_data["dedup"])
         api_config = APIConfig(**config_data["api"])
         chat_config = ChatConfig(**config_data["chat"])
+        indexing_config = IndexingConfig(**config_data["indexing"])
+        admission_config = AdmissionConfig(**config_data["admission"])
+        tenancy_config = TenancyConfig(**config_data["tenancy"])
+        metrics_config = MetricsConfig(**config_data["metrics"])
+        tracing_config = TracingConfig(**config_data["tracing"])
         
         return AppConfig(
             vector_db=vector_db_config,
             embedding=embedding_config,
+            multivector=multivector_config,
+            query_log=query_log_config,
+            dedup=dedup_config,
             api=api_config,
             chat=chat_config,
+            indexing=indexing_config,
+            admission=admission_config,
+            tenancy=tenancy_config,
+            metrics=metrics_config,
+            tracing=tracing_config,
             environment=config_data["environment"]
         )
     
@@ -248,12 +608,62 @@ class ConfigManager:
         # Validate vector DB config
         if not config.vector_db.url:
             errors.append("Vector DB URL is required (set QDRANT_URL or config file)")
-        if not config.vector_db.api_key and "localhost" not in config.vector_db.url:
+        is_local = "localhost" in config.vector_db.url or config.vector_db.url == ":memory:"
+        if not config.vector_db.api_key and not is_local:
             errors.append("Vector DB API key is required for cloud instances")
+        for field_name, schema in config.vector_db.payload_indexes.items():
+            if schema not in ("keyword", "integer", "float", "bool", "datetime"):
+                errors.append(f"Unsupported payload index type for {field_name}: {schema}")
+        if config.vector_db.quantization not in ("", "scalar"):
+            errors.append(f"Vector DB quantization must be '' or 'scalar', got {config.vector_db.quantization}")
+        for option in ("shard_number", "replication_factor", "write_consistency_factor", "shard_keys"):
+            if getattr(config.vector_db, option) < 0:
+                errors.append(f"Vector DB {option} must not be negative")
+        if config.vector_db.write_consistency_factor > max(1, config.vector_db.replication_factor):
+            errors.append("Vector DB write_consistency_factor cannot exceed replication_factor")
         
         # Validate embedding config
         if config.embedding.provider == "openai" and not config.embedding.api_key:
             errors.append("OpenAI API key is required for OpenAI embedding provider")
+        if config.embedding.query_reserved_per_endpoint < 0:
+            errors.append("Embedding query_reserved_per_endpoint must not be negative")
+        
+        # Validate multi-vector config
+        if config.multivector.enabled:
+            if config.multivector.provider != "bge_m3":
+                errors.append(f"Unsupported multi-vector provider: {config.multivector.provider}")
+            if config.multivector.candidates < 1:
+                errors.append("Multi-vector candidates must be at least 1")
+        
+        # Validate dedup config
+        if config.dedup.enabled:
+            if not 0 < config.dedup.threshold <= 1:
+                errors.append(f"Dedup threshold must be in (0, 1], got {config.dedup.threshold}")
+            if config.dedup.bands < 1 or config.dedup.num_perm % config.dedup.bands:
+                errors.append("Dedup num_perm must be a multiple of bands")
+            if config.dedup.shingle_size < 1:
+                errors.append("Dedup shingle_size must be at least 1")
+            if config.vector_db.shard_keys:
+                # A shared chunk lives in one file's shard, so other owners' filtered searches would miss it
+                errors.append("Dedup cannot be combined with vector_db.shard_keys")
+        
+        # Validate query log config
+        if config.query_log.warmup_top_n < 0 or config.query_log.max_queries < 1:
+            errors.append("Query log warmup_top_n must not be negative and max_queries must be at least 1")
+        if config.query_log.warmup_batch_size < 1:
+            errors.append("Query log warmup_batch_size must be at least 1")
+        
+        # Validate tenancy config
+        if config.tenancy.enabled:
+            if not config.tenancy.header:
+                errors.append("Tenancy header name is required when tenancy is enabled")
+            for tenant in [config.tenancy.default_tenant, *config.tenancy.tenants]:
+                if not TENANT_ID_PATTERN.match(tenant):
+                    errors.append(f"Invalid tenant id: {tenant!r}")
+            if not config.tenancy.tenants and not config.tenancy.allow_unlisted:
+                errors.append("Tenancy needs tenancy.tenants (the allowed tenant ids) or allow_unlisted: true")
+            if config.tenancy.allow_unlisted and config.tenancy.max_tenants < 1:
+                errors.append(f"Tenancy max_tenants must be positive, got {config.tenancy.max_tenants}")
         
         # Validate API config
         if not (1024 <= config.api.port <= 65535):
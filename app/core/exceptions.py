@@ -6,6 +6,10 @@ class ConfigurationError(Exception):
     """Raised when there's a configuration error"""
     pass
 
+class EmbeddingDimensionMismatchError(ConfigurationError):
+    """Raised when the embedding model's dimension differs from the collection's vector size"""
+    pass
+
 class ProviderError(Exception):
     """Raised when there's an error with a provider"""
     pass
@@ -18,6 +22,10 @@ class ChatError(Exception):
     """Chat provider related errors"""
     pass
 
+class ChatSessionNotFoundError(ChatError):
+    """Raised when a chat session does not exist or has expired"""
+    pass
+
 class EmbeddingError(ProviderError):
     """Raised when there's an error with embedding operations"""
     pass
@@ -29,3 +37,23 @@ class SearchError(Exception):
 class ValidationError(Exception):
     """Raised when data validation fails"""
     pass
+
+class JobNotFoundError(Exception):
+    """Raised when an indexing job does not exist or has expired"""
+    pass
+
+class JobQueueFullError(Exception):
+    """Raised when the indexing queue cannot accept more jobs"""
+    pass
+
+class TenantNotFoundError(Exception):
+    """Raised when a request names a tenant that is not configured"""
+    pass
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is shed because its route class is saturated"""
+    
+    def __init__(self, message: str, retry_after: int = 1, status_code: int = 429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
@@ -0,0 +1,346 @@
+"""
+Lightweight Prometheus metrics registry.
+Implements counters, gauges and histograms with labels and the Prometheus text
+exposition format. When metrics are disabled every recording call returns after
+a single flag check, so instrumentation can stay in hot paths.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _NullTimer:
+    """Timer used when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram._observe(self._labels, time.perf_counter() - self._start)
+        return False
+
+class _InProgress:
+    def __init__(self, gauge: "Gauge", labels: Tuple[str, ...]):
+        self._gauge = gauge
+        self._labels = labels
+
+    def __enter__(self):
+        self._gauge._add(self._labels, 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._gauge._add(self._labels, -1)
+        return False
+
+class Metric:
+    """Base class for labelled metrics"""
+    type_name = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def label_values(self) -> List[Tuple[str, ...]]:
+        """Label value tuples recorded so far"""
+        return list(self._values)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        self._add(self._key(labels), amount)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        self._add(self._key(labels), -amount)
+
+    def track_inprogress(self, **labels: str):
+        """Context manager that counts the enclosed block as in flight"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _InProgress(self, self._key(labels))
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _add(self, key: Tuple[str, ...], amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Histogram(Metric):
+    """Cumulative histogram of observations"""
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        self._observe(self._key(labels), value)
+
+    def time(self, **labels: str):
+        """Context manager observing the duration of the enclosed block"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, self._key(labels))
+
+    def count(self, **labels: str) -> int:
+        counts = self._counts.get(self._key(labels))
+        return counts[-1] if counts else 0
+
+    def _observe(self, key: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._sums[key] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets=buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before rendering"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+# Global registry and application metrics
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status", ["route", "method", "status"]
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ["route"]
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["route"]
+)
+EMBEDDING_LATENCY = registry.histogram(
+    "embedding_duration_seconds", "Latency of embedding calls", ["provider", "operation"]
+)
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "embedding_batch_size", "Texts per embedding call", ["provider"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+VECTOR_DB_LATENCY = registry.histogram(
+    "vector_db_duration_seconds", "Latency of vector database operations", ["provider", "operation"]
+)
+SEARCH_GROUPING_LATENCY = registry.histogram(
+    "search_grouping_duration_seconds", "Time spent grouping search hits by file",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+CHAT_STAGE_LATENCY = registry.histogram(
+    "chat_stage_duration_seconds", "Time spent in each chat pipeline stage", ["stage"]
+)
+LLM_TIME_TO_FIRST_TOKEN = registry.histogram(
+    "llm_time_to_first_token_seconds", "Model load plus prompt processing time before the first token", ["model"]
+)
+LLM_GENERATION_LATENCY = registry.histogram(
+    "llm_generation_duration_seconds", "Total generation request time", ["model"]
+)
+LLM_IN_PROGRESS = registry.gauge(
+    "llm_requests_in_progress", "Generation requests currently running", ["model"]
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens processed by the chat model", ["model", "kind"]
+)
+INDEX_JOBS = registry.counter(
+    "index_jobs_total", "Indexing jobs by lifecycle status", ["status"]
+)
+INDEX_CHUNKS = registry.counter(
+    "index_chunks_total", "Chunks processed by background indexing", ["stage"]
+)
+DEDUP_CHUNKS = registry.counter(
+    "dedup_chunks_total", "Chunks checked for near-duplicates at ingest", ["result"]
+)
+INDEX_QUEUE_DEPTH = registry.gauge(
+    "index_jobs_queued", "Indexing jobs waiting for a worker"
+)
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "admission_in_flight", "Requests holding an admission slot", ["route_class"]
+)
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", ["route_class"]
+)
+ADMISSION_REJECTED = registry.counter(
+    "admission_rejected_total", "Requests shed by admission control", ["route_class", "reason"]
+)
+ADMISSION_WAIT = registry.histogram(
+    "admission_wait_seconds", "Time spent waiting for an admission slot", ["route_class"]
+)
+STARTUP_PHASE_SECONDS = registry.gauge(
+    "startup_phase_seconds", "Duration of each startup phase", ["phase"]
+)
+STARTUP_READY = registry.gauge(
+    "startup_ready", "1 once the service has finished initializing"
+)
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+CACHE_HIT_RATIO = registry.gauge(
+    "cache_hit_ratio", "Hit ratio per cache since startup", ["cache"]
+)
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def _collect_cache_ratios() -> None:
+    caches = {key[0] for key in CACHE_REQUESTS.label_values()}
+    for cache in caches:
+        hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+        total = hits + CACHE_REQUESTS.value(cache=cache, result="miss")
+        if total:
+            CACHE_HIT_RATIO.set(hits / total, cache=cache)
+
+registry.add_collector(_collect_cache_ratios)
+
+def configure_metrics(enabled: bool) -> None:
+    """Turn metric recording on or off"""
+    registry.enabled = enabled
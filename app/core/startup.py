@@ -0,0 +1,64 @@
+"""
+Startup tracking for liveness and readiness.
+The process is live as soon as it serves HTTP; it is ready once its providers
+are initialized. Each startup phase is timed and exported, so slow cold starts
+show which dependency they waited on.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+from .metrics import STARTUP_PHASE_SECONDS, STARTUP_READY
+
+T = TypeVar("T")
+
+# Taken when this module is first imported, i.e. early in application import
+PROCESS_STARTED = time.perf_counter()
+
+@dataclass
+class StartupState:
+    """Progress of application startup"""
+    started: float = PROCESS_STARTED
+    phases: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    # Optional components that are not up (yet) while the service is ready, e.g. chat
+    degraded: Dict[str, str] = field(default_factory=dict)
+    ready: bool = False
+    ready_after: Optional[float] = None
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = round(seconds, 4)
+        STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+
+    async def timed(self, phase: str, awaitable: Awaitable[T]) -> T:
+        """Await `awaitable`, recording its duration (and error) under `phase`"""
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            self.errors[phase] = str(e)
+            raise
+        finally:
+            self.record(phase, time.perf_counter() - started)
+        self.errors.pop(phase, None)
+        return result
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_after = round(time.perf_counter() - self.started, 4)
+        self.record("total", self.ready_after)
+        STARTUP_READY.set(1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": ("degraded" if self.degraded else "ready") if self.ready else "starting",
+            "ready": self.ready,
+            "startup_seconds": self.ready_after,
+            "uptime_seconds": round(time.perf_counter() - self.started, 3),
+            "phases": dict(self.phases),
+            "errors": dict(self.errors),
+            "degraded": dict(self.degraded)
+        }
+
+startup_state = StartupState()
@@ -0,0 +1,123 @@
+"""
+OpenTelemetry tracing helpers.
+The OpenTelemetry packages are optional: when they are missing or tracing is
+disabled, `start_span` hands out a shared no-op span.
+"""
+
+import logging
+import sys
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace, propagate
+except ImportError:  # pragma: no cover - depends on installed extras
+    trace = None
+    propagate = None
+
+class _NoopSpan:
+    """Stand-in span used when tracing is off"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+_tracer = None
+_provider = None
+_trace_file = None
+# The global provider can only be set once per process; later configurations keep their own
+_global_provider_set = False
+
+def configure_tracing(
+    enabled: bool,
+    exporter: str = "console",
+    file_path: str = "traces.jsonl",
+    service_name: str = "document-search-api",
+    otlp_endpoint: str = ""
+) -> bool:
+    """Set up the tracer provider, replacing an earlier one; returns whether tracing is active"""
+    global _tracer, _provider, _trace_file, _global_provider_set
+    shutdown_tracing()
+    if not enabled:
+        return False
+    if trace is None:
+        logger.warning("Tracing enabled but opentelemetry is not installed")
+        return False
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+            SimpleSpanProcessor,
+        )
+    except ImportError:
+        logger.warning("Tracing enabled but opentelemetry-sdk is not installed")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if exporter == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter(out=sys.stdout)))
+    elif exporter == "file":
+        # One JSON span per line, written synchronously so nothing is lost on exit
+        out = _trace_file = open(file_path, "a", encoding="utf-8")
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter(
+            out=out,
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )))
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("OTLP exporter requested but opentelemetry-exporter-otlp-proto-http is not installed")
+            return False
+        otlp_exporter = OTLPSpanExporter(endpoint=otlp_endpoint) if otlp_endpoint else OTLPSpanExporter()
+        provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
+    else:
+        logger.warning(f"Unknown trace exporter: {exporter}")
+        return False
+
+    if not _global_provider_set:
+        trace.set_tracer_provider(provider)
+        _global_provider_set = True
+    _provider = provider
+    _tracer = provider.get_tracer("app")
+    return True
+
+def shutdown_tracing() -> None:
+    """Flush and stop the tracer provider and close the trace file"""
+    global _tracer, _provider, _trace_file
+    _tracer = None
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+def tracing_enabled() -> bool:
+    """Whether spans are being recorded"""
+    return _tracer is not None
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, headers=None) -> Iterator[Any]:
+    """Open a span as the child of the current one.
+
+    `headers` lets a server span continue a trace propagated by the caller.
+    """
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    context = propagate.extract(headers) if headers is not None else None
+    with _tracer.start_as_current_span(name, context=context, attributes=attributes) as span:
+        yield span
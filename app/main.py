@@ -2,18 +2,35 @@
 Main FastAPI application
 """
 
+import asyncio
 import logging
+import time
+
+# First, so the recorded import phase covers the framework imports below
+from .core.startup import PROCESS_STARTED, startup_state
+
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from .core.config import get_config
 from .core.exceptions import ConfigurationError
 from .api.routes import router
-from .services.search_service import get_search_service
+from .api.middleware import AdmissionMiddleware, MetricsMiddleware, TracingMiddleware
+from .api.responses import FastJSONResponse
+from .core.admission import build_limiters
+from .core.metrics import configure_metrics
+from .core.tracing import configure_tracing, shutdown_tracing
+from .services.search_service import get_search_service, close_search_service
+from .services.chat_service import get_chat_service, close_chat_service
+from .services.indexing_jobs import close_job_manager
+from .services.collection_versions import close_version_manager
+from .services.tenancy import get_tenant_registry, close_tenant_registry
+from .services.query_log import close_query_log, get_query_log, start_query_log_flusher, warm_up
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +39,100 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Delay between provider initialization attempts while dependencies are down
+STARTUP_RETRY_SECONDS = (1, 2, 5, 10, 30)
+
+async def _retry_until_up(name: str, init, on_failure=None):
+    """Await `init()` until it succeeds; a ConfigurationError is raised since retrying cannot help"""
+    attempt = 0
+    while True:
+        try:
+            return await init()
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            delay = STARTUP_RETRY_SECONDS[min(attempt, len(STARTUP_RETRY_SECONDS) - 1)]
+            attempt += 1
+            logger.warning(f"⚠️ {name} initialization failed (attempt {attempt}), retrying in {delay}s: {e}")
+            if on_failure:
+                on_failure(e)
+            await asyncio.sleep(delay)
+
+async def _initialize_chat(config) -> None:
+    """Bring up chat next to search; until it is up /ready reports it as degraded"""
+    startup_state.degraded["chat"] = "initializing"
+    
+    def unavailable(error: Exception) -> None:
+        startup_state.degraded["chat"] = f"unavailable: {error}"
+    
+    try:
+        chat_service = await _retry_until_up("Chat service", get_chat_service, unavailable)
+    except ConfigurationError as e:
+        logger.error(f"❌ Chat service initialization failed, chat stays unavailable: {e}")
+        startup_state.degraded["chat"] = str(e)
+        return
+    startup_state.degraded.pop("chat", None)
+    logger.info("✅ Chat service initialized")
+    
+    # Load the chat model so the first chat request doesn't pay model load time
+    if config.chat.warmup:
+        try:
+            await startup_state.timed("chat_warmup", chat_service.warmup())
+            logger.info(f"✅ Chat model {config.chat.model} warmed up")
+        except Exception as e:
+            logger.warning(f"⚠️ Chat model warm-up failed: {e}")
+
+async def _initialize_services(config) -> None:
+    """Initialize search and chat concurrently and mark ready as soon as search is up"""
+    chat_task = asyncio.create_task(_initialize_chat(config))
+    try:
+        try:
+            search_service = await _retry_until_up("Search service", get_search_service)
+        except ConfigurationError as e:
+            # e.g. an embedding model that does not fit the collection
+            logger.error(f"❌ Service initialization failed, not ready: {e}")
+            startup_state.errors["startup"] = str(e)
+            await chat_task
+            return
+        logger.info("✅ Search service initialized")
+        
+        # Read the query log off the event loop before the first search records into it
+        await asyncio.to_thread(get_query_log)
+        start_query_log_flusher(config.query_log)
+        
+        startup_state.mark_ready()
+        phases = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in startup_state.phases.items())
+        logger.info(f"✅ Ready in {startup_state.ready_after:.2f}s ({phases})")
+        
+        # Pre-embed the most frequent queries so most of the first requests after a deploy
+        # hit the cache; readiness does not wait for it
+        await _warm_query_cache(search_service, config)
+        
+        # Re-warm on a schedule, e.g. after the cache was churned by one-off queries
+        while config.query_log.warmup_interval_seconds > 0:
+            await asyncio.sleep(config.query_log.warmup_interval_seconds)
+            for service in [search_service, *get_tenant_registry().services()]:
+                await _warm_query_cache(service, config, timed=False)
+        await chat_task
+    finally:
+        chat_task.cancel()
+
+async def _warm_query_cache(search_service, config, timed: bool = True) -> None:
+    """Warm one search service from the query log; a failure or timeout only costs cache misses"""
+    if not config.query_log.warmup_top_n:
+        return
+    warming = warm_up(search_service, config.query_log)
+    if timed:
+        warming = startup_state.timed("query_warmup", warming)
+    try:
+        warmed = await asyncio.wait_for(warming, config.query_log.warmup_timeout_seconds or None)
+        if warmed:
+            logger.info(f"✅ Pre-embedded {warmed} frequent queries for {search_service.config.vector_db.collection}")
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Query warm-up stopped after {config.query_log.warmup_timeout_seconds}s")
+    except Exception as e:
+        logger.warning(f"⚠️ Query warm-up failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan context manager"""
@@ -33,20 +144,9 @@ async def lifespan(app: FastAPI):
         config = get_config()
         logger.info(f"✅ Configuration loaded for environment: {config.environment}")
         
-        # Initialize search service
-        try:
-            search_service = await get_search_service()
-            logger.info("✅ Search service initialized")
-            
-            # Check health
-            health = await search_service.health_check()
-            if all(health.values()):
-                logger.info("✅ All services are healthy")
-            else:
-                logger.warning(f"⚠️ Some services are unhealthy: {health}")
-        except Exception as e:
-            logger.warning(f"⚠️ Search service initialization failed: {e}")
-            logger.info("✅ Continuing without search service pre-initialization")
+        # Serve /live right away; providers come up in the background and /ready
+        # reports 503 until they have
+        init_task = asyncio.create_task(_initialize_services(config))
         
         logger.info(f"🌟 FastAPI server starting on {config.api.host}:{config.api.port}")
         
@@ -62,8 +162,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🔄 Shutting down Document Search API ...")
     try:
-        search_service = await get_search_service()
-        await search_service.close()
+        init_task.cancel()
+        try:
+            await init_task
+        except asyncio.CancelledError:
+            pass
+        # Stop indexing workers before the providers they use are closed
+        await close_job_manager()
+        await close_version_manager()
+        await close_tenant_registry()
+        await close_search_service()
+        await close_chat_service()
+        await close_query_log()
+        shutdown_tracing()
         logger.info("✅ Cleanup completed")
     except Exception as e:
         logger.error(f"❌ Shutdown error: {e}")
@@ -86,6 +197,7 @@ def create_app() -> FastAPI:
         version="2.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=FastJSONResponse,
         lifespan=lifespan
     )
     
@@ -102,9 +214,42 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Compress large responses such as search results and chat source chunks
+    gzip_min_size = config.api.gzip_min_size if config else 1024
+    if gzip_min_size > 0:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=gzip_min_size,
+            compresslevel=config.api.gzip_level if config else 1
+        )
+    
     # Include routes
     app.include_router(router)
     
+    # Admission control per tenant and route class; innermost so shed requests still show up in metrics
+    if config and (config.admission.enabled or config.tenancy.enabled):
+        app.add_middleware(
+            AdmissionMiddleware,
+            routes=[*app.router.routes, *router.routes],
+            limiters=build_limiters(config.admission) if config.admission.enabled else {},
+            tenants=get_tenant_registry()
+        )
+    
+    # Request metrics (a no-op pass-through when metrics are disabled)
+    configure_metrics(config.metrics.enabled if config else True)
+    app.add_middleware(MetricsMiddleware, routes=[*app.router.routes, *router.routes])
+    
+    # Request tracing (pass-through unless tracing is enabled)
+    if config:
+        configure_tracing(
+            config.tracing.enabled,
+            exporter=config.tracing.exporter,
+            file_path=config.tracing.file_path,
+            service_name=config.tracing.service_name,
+            otlp_endpoint=config.tracing.otlp_endpoint
+        )
+    app.add_middleware(TracingMiddleware, routes=[*app.router.routes, *router.routes])
+    
     # Global exception handlers
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -131,6 +276,10 @@ def create_app() -> FastAPI:
             }
         )
     
+    # Time spent importing the application and building it, before the server starts
+    if "import" not in startup_state.phases:
+        startup_state.record("import", time.perf_counter() - PROCESS_STARTED)
+    
     return app
 
 # Create the app instance
@@ -3,32 +3,81 @@ Abstract base classes for providers
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Mapping
+from dataclasses import dataclass, field
 
-@dataclass
+# Shared read-only default, so results without metadata allocate nothing
+EMPTY_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+# Payload keys written by ingest dedup: the files sharing a chunk (when more than
+# its own file_id) and the chunk's MinHash band keys
+OWNERS_KEY = "file_ids"
+DEDUP_BANDS_KEY = "dedup_bands"
+
+@dataclass(slots=True)
 class SearchResult:
-    """Search result data structure"""
+    """Search result data structure.
+    
+    Slotted because searches create one per hit (frozen would triple the
+    construction cost). `metadata` may be a lazy, read-only view over the
+    stored payload rather than a dict.
+    """
     file_id: str
     score: float
     content: str
-    metadata: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    metadata: Mapping[str, Any] = field(default_factory=lambda: EMPTY_METADATA)
+    id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Document:
     """Document data structure for indexing"""
     content: str
     file_id: str
-    metadata: Dict[str, Any] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
     
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
 
+@dataclass
+class MetadataFilter:
+    """Condition on one payload field; a list of filters is combined with AND.
+    
+    Exactly one of `eq`, `any_of` or the range bounds is set. Range bounds are
+    numbers or datetimes.
+    """
+    key: str
+    eq: Any = None
+    any_of: Optional[List[Any]] = None
+    gte: Any = None
+    gt: Any = None
+    lte: Any = None
+    lt: Any = None
+
+@dataclass
+class CollectionSettings:
+    """Index settings for a new collection; zero/empty values keep the database defaults"""
+    hnsw_m: int = 0
+    hnsw_ef_construct: int = 0
+    quantization: str = ""
+    shard_number: int = 0
+    replication_factor: int = 0
+    write_consistency_factor: int = 0
+    # Number of custom shard keys files are hashed onto; 0 = automatic sharding
+    shard_keys: int = 0
+    # Size of the late-interaction token vectors stored next to the dense vector; 0 = none
+    multivector_size: int = 0
+
+@dataclass
+class ChatTurn:
+    """Result of one stateful chat generation"""
+    response: str
+    state: Optional[List[int]] = None
+    endpoint: Optional[str] = None
+    prompt_tokens: int = 0
+    reused_tokens: int = 0
+
 class VectorDBProvider(ABC):
     """Abstract base class for vector database providers"""
     
@@ -43,22 +92,77 @@ class VectorDBProvider(ABC):
         pass
     
     @abstractmethod
-    async def create_collection(self, collection_name: str, dimension: int) -> None:
+    async def create_collection(
+        self,
+        collection_name: str,
+        dimension: int,
+        settings: Optional[CollectionSettings] = None
+    ) -> None:
         """Create a collection in the vector database"""
         pass
     
+    async def ensure_collection(self, collection_name: str, dimension: int, multivector_size: int = 0) -> None:
+        """Make `collection_name` usable for reads and writes; providers with aliases override this"""
+        await self.create_collection(collection_name, dimension, CollectionSettings(multivector_size=multivector_size))
+    
+    async def get_vector_size(self, collection_name: str) -> Optional[int]:
+        """Vector size of an existing collection, or None if unknown"""
+        return None
+    
+    async def get_multivector_size(self, collection_name: str) -> Optional[int]:
+        """Size of the token vectors an existing collection stores, or None if it has none"""
+        return None
+    
     @abstractmethod
-    async def upsert_documents(self, collection_name: str, documents: List[Document], embeddings: List[List[float]]) -> None:
-        """Insert or update documents with their embeddings"""
+    async def upsert_documents(
+        self,
+        collection_name: str,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        multivectors: Optional[List[List[List[float]]]] = None
+    ) -> None:
+        """Insert or update documents with their embeddings (and token vectors for rescoring)"""
         pass
     
     @abstractmethod
-    async def search(self, collection_name: str, query_embedding: List[float], limit: int = 10) -> List[SearchResult]:
-        """Search for similar documents"""
+    async def search(
+        self,
+        collection_name: str,
+        query_embedding: List[float],
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None,
+        with_content: bool = True,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        rescore_query: Optional[List[List[float]]] = None,
+        rescore_candidates: int = 0
+    ) -> List[SearchResult]:
+        """Search for similar documents matching all `filters`.
+        
+        With `with_content=False` only ids, file_ids and scores are returned.
+        `offset` skips that many top hits; hits scoring below `score_threshold` are dropped.
+        With `rescore_query` (query token vectors) the top `rescore_candidates` dense
+        hits are re-ranked by late-interaction MaxSim averaged over the query tokens,
+        which then is the score that `score_threshold` applies to.
+        """
         pass
     
     @abstractmethod
-    async def search_with_filter(self, collection_name: str, query_embedding: List[float], file_ids: List[str], limit: int = 10) -> List[SearchResult]:
+    async def retrieve(self, collection_name: str, ids: List[str]) -> List[SearchResult]:
+        """Fetch full results for point ids returned by a search (score is 0)"""
+        pass
+    
+    @abstractmethod
+    async def search_with_filter(
+        self,
+        collection_name: str,
+        query_embedding: List[float],
+        file_ids: List[str],
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None,
+        rescore_query: Optional[List[List[float]]] = None,
+        rescore_candidates: int = 0
+    ) -> List[SearchResult]:
         """Search for similar documents within specified files"""
         pass
     
@@ -67,6 +171,22 @@ class VectorDBProvider(ABC):
         """Delete documents by file IDs"""
         pass
     
+    @abstractmethod
+    async def find_by_payload(
+        self,
+        collection_name: str,
+        key: str,
+        values: List[str],
+        limit: Optional[int] = None
+    ) -> List[SearchResult]:
+        """Points whose payload `key` matches any of `values`, at most `limit` (score is 0)"""
+        pass
+    
+    @abstractmethod
+    async def update_payloads(self, collection_name: str, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Set payload keys per point id, skipping ids that are absent"""
+        pass
+    
     @abstractmethod
     async def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """Get information about a collection"""
@@ -105,6 +225,34 @@ class EmbeddingProvider(ABC):
         """Get information about the embedding model"""
         pass
 
+class MultiVectorProvider(ABC):
+    """Abstract base class for late-interaction encoders producing one vector per token"""
+    
+    @abstractmethod
+    async def initialize(self) -> None:
+        """Load the encoder"""
+        pass
+    
+    @abstractmethod
+    async def embed_documents(self, texts: List[str]) -> List[List[List[float]]]:
+        """Token vectors of each text"""
+        pass
+    
+    @abstractmethod
+    async def embed_query(self, text: str) -> List[List[float]]:
+        """Token vectors of a query"""
+        pass
+    
+    @abstractmethod
+    def get_dimension(self) -> int:
+        """Size of each token vector"""
+        pass
+    
+    @abstractmethod
+    def get_model_info(self) -> Dict[str, Any]:
+        """Get information about the encoder"""
+        pass
+
 class ChatProvider(ABC):
     """Abstract base class for chat providers"""
     
@@ -123,6 +271,21 @@ class ChatProvider(ABC):
         """Generate chat response given context and message"""
         pass
     
+    @abstractmethod
+    async def generate_turn(
+        self,
+        context: str,
+        message: str,
+        state: Optional[List[int]] = None,
+        endpoint: Optional[str] = None
+    ) -> ChatTurn:
+        """Generate a conversation turn, continuing from a previous turn's state"""
+        pass
+    
+    async def warmup(self) -> None:
+        """Preload the chat model; providers without a warm-up step keep this no-op"""
+        pass
+    
     @abstractmethod
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the chat model"""
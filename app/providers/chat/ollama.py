@@ -2,103 +2,223 @@
 Ollama chat provider implementation
 """
 
-import asyncio
-import aiohttp
-import json
-from typing import Dict, Any
-from ...core.config import EmbeddingConfig
+from typing import Dict, Any, List, Optional, Tuple
+from ...core.config import ChatConfig
 from ...core.exceptions import ChatError
-from ..base import ChatProvider
+from ..base import ChatProvider, ChatTurn
+from ..ollama_pool import OllamaEndpoint, OllamaEndpointPool, parse_endpoint_urls
+from ...core.metrics import LLM_GENERATION_LATENCY, LLM_IN_PROGRESS, LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS
+from ...core.tracing import start_span
+
+PROMPT_INSTRUCTIONS = (
+    "Hãy trả lời câu hỏi dựa trên các thông tin được cung cấp từ tài liệu. "
+    "Nếu không tìm thấy thông tin liên quan, hãy trả lời "
+    "\"Không tìm thấy thông tin liên quan trong tài liệu.\""
+)
 
 class OllamaChatProvider(ChatProvider):
     """Ollama chat provider"""
     
-    def __init__(self, config: EmbeddingConfig):
+    def __init__(self, config: ChatConfig):
         self.config = config
-        self.session: aiohttp.ClientSession = None
-        self.chat_model = "qwen2.5:1.5b"  # Fixed chat model
+        self.chat_model = config.model
+        # Generations are not retried and vary too much in length for latency outlier detection
+        self.pool = OllamaEndpointPool(
+            parse_endpoint_urls(config.base_url, config.base_urls),
+            max_retries=0,
+            eject_seconds=config.eject_seconds,
+            latency_outlier_factor=0
+        )
+        self._initialized = False
         
     async def initialize(self) -> None:
         """Initialize Ollama chat provider"""
         try:
-            self.session = aiohttp.ClientSession()
-            
             # Test connection
             if not await self.health_check():
                 raise ChatError("Ollama chat health check failed")
+            self._initialized = True
                 
         except Exception as e:
             raise ChatError(f"Failed to initialize Ollama chat provider: {e}")
     
     async def health_check(self) -> bool:
-        """Check if Ollama chat is healthy"""
+        """Check if at least one Ollama endpoint serves the chat model"""
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-                
-            async with self.session.get(f"{self.config.base_url}/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Check if our chat model is available
-                    models = [model["name"] for model in data.get("models", [])]
-                    return any(self.chat_model in model for model in models)
-                return False
+            responses = await self.pool.get_each("/api/tags")
+            for data in responses.values():
+                # Check if our chat model is available
+                models = [model["name"] for model in (data or {}).get("models", [])]
+                if any(self.chat_model in model for model in models):
+                    return True
+            return False
         except Exception as e:
             print(f"Ollama chat health check failed: {e}")
             return False
     
     async def generate_response(self, context: str, message: str) -> str:
         """Generate chat response given context and message"""
-        if not self.session:
+        if not self._initialized:
             await self.initialize()
         
         try:
             # Build prompt template
             prompt = self._build_prompt(context, message)
-            
-            payload = {
-                "model": self.chat_model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "top_p": 0.9,
-                    "max_tokens": 1000
-                }
-            }
-            
-            async with self.session.post(
-                f"{self.config.base_url}/api/generate",
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    raise ChatError(f"Ollama API returned status {response.status}")
-                
-                data = await response.json()
-                response_text = data.get("response", "")
-                
-                if not response_text:
-                    return "Không thể tạo phản hồi từ mô hình."
-                
-                return response_text.strip()
+            data, _ = await self._generate(prompt)
+            return self._response_text(data)
                 
         except Exception as e:
             raise ChatError(f"Failed to generate chat response: {e}")
     
+    async def generate_turn(
+        self,
+        context: str,
+        message: str,
+        state: Optional[List[int]] = None,
+        endpoint: Optional[str] = None
+    ) -> ChatTurn:
+        """Generate a conversation turn, continuing from Ollama's `context` state.
+        
+        The first turn sends the full prompt. Follow-up turns send only the new
+        documents and question together with the previous state, and stick to the
+        endpoint that holds the conversation's KV cache, so only new tokens are evaluated.
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            if state:
+                prompt = self._build_followup_prompt(context, message)
+            else:
+                prompt = self._build_prompt(context, message)
+            
+            data, served_by = await self._generate(prompt, state=state, prefer=endpoint)
+            return ChatTurn(
+                response=self._response_text(data),
+                state=data.get("context") or None,
+                endpoint=served_by.url,
+                prompt_tokens=data.get("prompt_eval_count", 0),
+                reused_tokens=len(state) if state else 0
+            )
+                
+        except Exception as e:
+            raise ChatError(f"Failed to generate chat turn: {e}")
+    
+    async def _generate(
+        self,
+        prompt: str,
+        state: Optional[List[int]] = None,
+        prefer: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], OllamaEndpoint]:
+        """Call /api/generate on the pool"""
+        payload = {
+            "model": self.chat_model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.config.keep_alive,
+            "options": self._build_options()
+        }
+        if state:
+            payload["context"] = state
+        
+        span_attributes = {
+            "llm.model": self.chat_model,
+            "llm.prompt_chars": len(prompt),
+            "llm.reused_state_tokens": len(state) if state else 0
+        }
+        with LLM_IN_PROGRESS.track_inprogress(model=self.chat_model), \
+                LLM_GENERATION_LATENCY.time(model=self.chat_model), \
+                start_span("llm.generate", span_attributes) as span:
+            data, endpoint = await self.pool.post_json("/api/generate", payload, prefer=prefer)
+            span.set_attributes({
+                "llm.endpoint": endpoint.url,
+                "llm.prompt_tokens": data.get("prompt_eval_count", 0),
+                "llm.completion_tokens": data.get("eval_count", 0)
+            })
+        
+        self._record_timings(data)
+        return data, endpoint
+    
+    def _record_timings(self, data: Dict[str, Any]) -> None:
+        """Record time to first token and token counts reported by Ollama (durations in ns)"""
+        first_token_ns = data.get("load_duration", 0) + data.get("prompt_eval_duration", 0)
+        if first_token_ns:
+            LLM_TIME_TO_FIRST_TOKEN.observe(first_token_ns / 1e9, model=self.chat_model)
+        LLM_TOKENS.inc(data.get("prompt_eval_count", 0), model=self.chat_model, kind="prompt")
+        LLM_TOKENS.inc(data.get("eval_count", 0), model=self.chat_model, kind="completion")
+    
+    @staticmethod
+    def _response_text(data: Dict[str, Any]) -> str:
+        response_text = data.get("response", "")
+        
+        if not response_text:
+            return "Không thể tạo phản hồi từ mô hình."
+        
+        return response_text.strip()
+    
+    async def warmup(self) -> None:
+        """Load the chat model on every endpoint so the first request skips model load time"""
+        # An empty prompt only loads the model. The options must match real requests,
+        # otherwise Ollama reloads the model with a different context size later.
+        payload = {
+            "model": self.chat_model,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": self.config.keep_alive,
+            "options": self._build_options()
+        }
+        responses = await self.pool.request_each("POST", "/api/generate", payload)
+        failed = [url for url, data in responses.items() if data is None]
+        if len(failed) == len(responses):
+            raise ChatError(f"Failed to warm up chat model {self.chat_model}")
+        for url in failed:
+            print(f"Chat model warm-up failed on {url}")
+    
+    def _build_options(self) -> Dict[str, Any]:
+        """Build Ollama generation options from config"""
+        options = {
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "num_ctx": self.config.num_ctx,
+            "num_predict": self.config.num_predict
+        }
+        if self.config.num_thread > 0:
+            options["num_thread"] = self.config.num_thread
+        return options
+    
     def _build_prompt(self, context: str, message: str) -> str:
-        """Build prompt template for chat"""
+        """Build prompt template for chat.
+        
+        Instructions come first and the question last, so prompts for the same
+        documents share a stable prefix that the model server can keep cached.
+        """
         if not context.strip():
             return f"""Câu hỏi: {message}
 
 Trả lời: Không tìm thấy thông tin liên quan trong tài liệu."""
         
-        return f"""Dựa trên các thông tin sau đây từ tài liệu:
+        return f"""{PROMPT_INSTRUCTIONS}
+
+Thông tin từ tài liệu:
 
 {context}
 
 Câu hỏi: {message}
 
-Hãy trả lời câu hỏi dựa trên thông tin được cung cấp. Nếu không tìm thấy thông tin liên quan, hãy trả lời "Không tìm thấy thông tin liên quan trong tài liệu."
+Trả lời:"""
+    
+    def _build_followup_prompt(self, context: str, message: str) -> str:
+        """Build the incremental prompt for a follow-up turn in a conversation"""
+        if not context.strip():
+            return f"""Câu hỏi: {message}
+
+Trả lời:"""
+        
+        return f"""Thông tin bổ sung từ tài liệu:
+
+{context}
+
+Câu hỏi: {message}
 
 Trả lời:"""
     
@@ -108,10 +228,12 @@ Trả lời:"""
             "provider": "ollama",
             "model": self.chat_model,
             "base_url": self.config.base_url,
+            "endpoints": self.pool.stats(),
+            "keep_alive": self.config.keep_alive,
+            "options": self._build_options(),
             "type": "chat"
         }
     
     async def close(self):
         """Close the session"""
-        if self.session:
-            await self.session.close()
+        await self.pool.close()
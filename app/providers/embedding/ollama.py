@@ -3,94 +3,154 @@ Ollama embedding provider implementation
 """
 
 import asyncio
-import aiohttp
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ...core.config import EmbeddingConfig
 from ...core.exceptions import EmbeddingError
 from ..base import EmbeddingProvider
+from ..model_metadata import ModelMetadataCache
+from ..ollama_pool import OllamaEndpointPool, parse_endpoint_urls
+from ...core.metrics import EMBEDDING_LATENCY, EMBEDDING_BATCH_SIZE
+from ...core.tracing import start_span
 
 class OllamaProvider(EmbeddingProvider):
     """Ollama embedding provider"""
     
     def __init__(self, config: EmbeddingConfig):
         self.config = config
-        self.session: aiohttp.ClientSession = None
+        self.pool = OllamaEndpointPool(
+            parse_endpoint_urls(config.base_url, config.base_urls),
+            max_retries=config.max_retries,
+            eject_seconds=config.eject_seconds
+        )
+        # Bound in-flight embedding calls so every node gets a fair share
+        per_endpoint = max(1, config.concurrency_per_endpoint)
+        endpoints = len(self.pool.endpoints)
+        self._semaphore = asyncio.Semaphore(per_endpoint * endpoints)
+        # Bulk calls (embed_texts: indexing, warm-up) also take one of these, so a large
+        # ingest leaves the reserved permits free and query embedding never waits behind it
+        reserved = min(max(0, config.query_reserved_per_endpoint), per_endpoint - 1)
+        self._bulk_semaphore = asyncio.Semaphore((per_endpoint - reserved) * endpoints)
+        self.metadata_cache = ModelMetadataCache(config.metadata_cache_path)
+        # Digest of the served model as reported by /api/tags, and its probed dimension
+        self.model_digest: Optional[str] = None
+        self._dimension: Optional[int] = None
+        self._initialized = False
         
     async def initialize(self) -> None:
         """Initialize Ollama provider"""
         try:
-            self.session = aiohttp.ClientSession()
-            
             # Test connection
             if not await self.health_check():
                 raise EmbeddingError("Ollama health check failed")
+            await self._detect_dimension()
+            self._initialized = True
                 
         except Exception as e:
             raise EmbeddingError(f"Failed to initialize Ollama provider: {e}")
     
+    async def _detect_dimension(self) -> None:
+        """Probe the model's embedding size once per model digest"""
+        cached = self.metadata_cache.get(self.model_digest)
+        if cached and cached.get("dimension"):
+            self._dimension = int(cached["dimension"])
+        else:
+            async with self._semaphore:
+                data, _ = await self.pool.post_json(
+                    "/api/embeddings", {"model": self.config.model, "prompt": "init"}, idempotent=True
+                )
+            dimension = len(data.get("embedding", []))
+            if not dimension:
+                raise EmbeddingError(f"Could not probe the embedding dimension of {self.config.model}")
+            self._dimension = dimension
+            self.metadata_cache.put(self.model_digest, {"model": self.config.model, "dimension": dimension})
+        
+        if self.config.dimensions and self.config.dimensions != self._dimension:
+            print(
+                f"Model {self.config.model} produces {self._dimension}-dimensional embeddings, "
+                f"not the configured {self.config.dimensions}; using {self._dimension}"
+            )
+    
+    def _served_model(self, models: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The /api/tags entry for our model, preferring an exact tag match"""
+        wanted = self.config.model
+        candidates = [model for model in models if wanted in model.get("name", "")]
+        for model in candidates:
+            if model["name"] in (wanted, f"{wanted}:latest"):
+                return model
+        return candidates[0] if candidates else None
+    
     async def health_check(self) -> bool:
-        """Check if Ollama is healthy"""
+        """Check if at least one Ollama endpoint serves our model"""
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-                
-            async with self.session.get(f"{self.config.base_url}/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Check if our model is available
-                    models = [model["name"] for model in data.get("models", [])]
-                    return any(self.config.model in model for model in models)
-                return False
+            responses = await self.pool.get_each("/api/tags")
+            healthy = False
+            digests = set()
+            for url, data in responses.items():
+                model = self._served_model((data or {}).get("models", []))
+                if model is not None:
+                    healthy = True
+                    if model.get("digest"):
+                        digests.add(model["digest"])
+                else:
+                    print(f"Ollama endpoint {url} is unavailable or missing model {self.config.model}")
+            if len(digests) > 1:
+                print(f"Ollama endpoints serve different versions of {self.config.model}: {sorted(digests)}")
+            # Only a digest every node agrees on identifies the model for the metadata cache
+            self.model_digest = digests.pop() if len(digests) == 1 else None
+            return healthy
         except Exception as e:
             print(f"Ollama health check failed: {e}")
             return False
     
     async def embed_text(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
-        embeddings = await self.embed_texts([text])
-        return embeddings[0] if embeddings else []
+        """Generate embedding for a single text (a query): may use the permits reserved for queries"""
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            with EMBEDDING_LATENCY.time(provider="ollama", operation="embed_text"), \
+                    start_span("embedding.embed_text", {"embedding.model": self.config.model}):
+                return await self._embed_one(text, bulk=False)
+        except Exception as e:
+            raise EmbeddingError(f"Failed to generate embedding: {e}")
     
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
-        if not self.session:
+        """Generate embeddings for multiple texts, spread across all endpoints"""
+        if not self._initialized:
             await self.initialize()
         
         try:
-            embeddings = []
-            
-            for text in texts:
-                payload = {
-                    "model": self.config.model,
-                    "prompt": text
-                }
-                
-                async with self.session.post(
-                    f"{self.config.base_url}/api/embeddings",
-                    json=payload
-                ) as response:
-                    if response.status != 200:
-                        raise EmbeddingError(f"Ollama API returned status {response.status}")
-                    
-                    data = await response.json()
-                    embedding = data.get("embedding", [])
-                    
-                    if not embedding:
-                        raise EmbeddingError("No embedding returned from Ollama")
-                    
-                    embeddings.append(embedding)
-            
-            return embeddings
-            
+            EMBEDDING_BATCH_SIZE.observe(len(texts), provider="ollama")
+            span_attributes = {"embedding.model": self.config.model, "embedding.batch_size": len(texts)}
+            with EMBEDDING_LATENCY.time(provider="ollama", operation="embed_texts"), \
+                    start_span("embedding.embed_texts", span_attributes):
+                return list(await asyncio.gather(*(self._embed_one(text, bulk=True) for text in texts)))
         except Exception as e:
             raise EmbeddingError(f"Failed to generate embeddings: {e}")
     
+    async def _embed_one(self, text: str, bulk: bool) -> List[float]:
+        """Embed one text on the least loaded endpoint, retrying on another node on failure"""
+        payload = {
+            "model": self.config.model,
+            "prompt": text
+        }
+        
+        if bulk:
+            async with self._bulk_semaphore, self._semaphore:
+                data, _ = await self.pool.post_json("/api/embeddings", payload, idempotent=True)
+        else:
+            async with self._semaphore:
+                data, _ = await self.pool.post_json("/api/embeddings", payload, idempotent=True)
+        
+        embedding = data.get("embedding", [])
+        if not embedding:
+            raise EmbeddingError("No embedding returned from Ollama")
+        return embedding
+    
     def get_dimension(self) -> int:
-        """Get the dimension of embeddings"""
-        # BGE-M3 model has 1024 dimensions
-        if "bge-m3" in self.config.model:
-            return 1024
-        # Default fallback, should be detected dynamically in real implementation
+        """Get the dimension of embeddings, as probed from the model once initialized"""
+        if self._dimension is not None:
+            return self._dimension
         return self.config.dimensions
     
     def get_model_info(self) -> Dict[str, Any]:
@@ -99,10 +159,11 @@ class OllamaProvider(EmbeddingProvider):
             "provider": "ollama",
             "model": self.config.model,
             "base_url": self.config.base_url,
+            "digest": self.model_digest,
+            "endpoints": self.pool.stats(),
             "dimensions": self.get_dimension()
         }
     
     async def close(self):
         """Close the session"""
-        if self.session:
-            await self.session.close()
+        await self.pool.close()
@@ -0,0 +1,50 @@
+"""
+On-disk cache of facts probed from embedding models, keyed by model digest.
+A digest identifies the exact weights, so a cached dimension stays valid until
+the model is re-pulled or swapped, and probing it costs one embedding call per
+model version instead of one per startup.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+class ModelMetadataCache:
+    """JSON file of {digest: {field: value}}; an empty path disables it"""
+
+    def __init__(self, path: str):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            # Missing or corrupt cache: probe again and rewrite it
+            return {}
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        if self.path is None or not digest:
+            return None
+        with self._lock:
+            return self._load().get(digest)
+
+    def put(self, digest: str, metadata: Dict[str, Any]) -> None:
+        if self.path is None or not digest:
+            return
+        with self._lock:
+            data = self._load()
+            data[digest] = metadata
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                # A read-only filesystem only costs a probe per startup
+                print(f"Could not write model metadata cache {self.path}: {e}")
@@ -0,0 +1 @@
+"""Late-interaction (multi-vector) providers"""
@@ -0,0 +1,121 @@
+"""
+BGE-M3 multi-vector (ColBERT) provider.
+
+Ollama only serves BGE-M3's dense output, so the token vectors come from the
+model loaded in-process with FlagEmbedding (optional dependency:
+`pip install FlagEmbedding`). Inference is blocking and runs in a thread, one
+call at a time. Queries go first: documents are encoded in `batch_size` slices
+and a slice only starts while no query is waiting, so a query waits for at most
+one slice of an ingest batch.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from ...core.config import MultiVectorConfig
+from ...core.exceptions import ConfigurationError, EmbeddingError
+from ...core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_LATENCY
+from ..base import MultiVectorProvider
+
+class BGEM3MultiVectorProvider(MultiVectorProvider):
+    """Token vectors from BGE-M3's ColBERT head"""
+
+    def __init__(self, config: MultiVectorConfig):
+        self.config = config
+        self._model = None
+        self._dimension: Optional[int] = None
+        # The model is not thread safe and already uses every core
+        self._lock = asyncio.Lock()
+        self._pending_queries = 0
+        self._queries_idle = asyncio.Event()
+        self._queries_idle.set()
+
+    async def initialize(self) -> None:
+        """Load the model and probe its token vector size"""
+        if self._model is not None:
+            return
+        try:
+            from FlagEmbedding import BGEM3FlagModel
+        except ImportError:
+            raise ConfigurationError("multivector.enabled needs FlagEmbedding (pip install FlagEmbedding)")
+
+        def load():
+            options = {"use_fp16": self.config.use_fp16}
+            if self.config.device:
+                options["devices"] = self.config.device
+            return BGEM3FlagModel(self.config.model, **options)
+
+        try:
+            self._model = await asyncio.to_thread(load)
+            probe = await self.embed_query("init")
+            self._dimension = len(probe[0])
+        except Exception as e:
+            self._model = None
+            raise EmbeddingError(f"Failed to load multi-vector model {self.config.model}: {e}")
+
+    def _encode(self, texts: List[str]) -> List[List[List[float]]]:
+        output = self._model.encode(
+            texts,
+            batch_size=self.config.batch_size,
+            max_length=self.config.max_length,
+            return_dense=False,
+            return_sparse=False,
+            return_colbert_vecs=True
+        )
+        return [vectors.tolist() for vectors in output["colbert_vecs"]]
+
+    async def embed_documents(self, texts: List[str]) -> List[List[List[float]]]:
+        """Token vectors of each text, at most `max_length` per text"""
+        if self._model is None:
+            await self.initialize()
+        try:
+            EMBEDDING_BATCH_SIZE.observe(len(texts), provider="bge_m3")
+            with EMBEDDING_LATENCY.time(provider="bge_m3", operation="embed_multivectors"):
+                vectors: List[List[List[float]]] = []
+                step = max(1, self.config.batch_size)
+                for start in range(0, len(texts), step):
+                    # Queries waiting for the model take it before the next slice
+                    while True:
+                        await self._queries_idle.wait()
+                        await self._lock.acquire()
+                        if self._pending_queries == 0:
+                            break
+                        self._lock.release()
+                    try:
+                        vectors.extend(await asyncio.to_thread(self._encode, texts[start:start + step]))
+                    finally:
+                        self._lock.release()
+                return vectors
+        except Exception as e:
+            raise EmbeddingError(f"Failed to generate token vectors: {e}")
+
+    async def embed_query(self, text: str) -> List[List[float]]:
+        """Token vectors of a query"""
+        if self._model is None:
+            await self.initialize()
+        try:
+            with EMBEDDING_LATENCY.time(provider="bge_m3", operation="embed_query_multivector"):
+                self._pending_queries += 1
+                self._queries_idle.clear()
+                try:
+                    async with self._lock:
+                        return (await asyncio.to_thread(self._encode, [text]))[0]
+                finally:
+                    self._pending_queries -= 1
+                    if self._pending_queries == 0:
+                        self._queries_idle.set()
+        except Exception as e:
+            raise EmbeddingError(f"Failed to generate query token vectors: {e}")
+
+    def get_dimension(self) -> int:
+        """Size of each token vector (1024 for BGE-M3 until probed)"""
+        return self._dimension or 1024
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "bge_m3",
+            "model": self.config.model,
+            "device": self.config.device or "auto",
+            "dimensions": self.get_dimension(),
+            "candidates": self.config.candidates
+        }
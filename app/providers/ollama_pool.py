@@ -0,0 +1,301 @@
+"""
+Ollama endpoint pool with health-aware, least-outstanding-requests routing
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import aiohttp
+
+from ..core.exceptions import ProviderError
+
+
+def parse_endpoint_urls(base_url: str, base_urls: Optional[Sequence[str]] = None) -> List[str]:
+    """Build the endpoint list from `base_urls`, falling back to a (comma separated) `base_url`"""
+    raw = list(base_urls or [])
+    if not raw and base_url:
+        raw = base_url.split(",")
+
+    urls = []
+    for url in raw:
+        url = url.strip().rstrip("/")
+        if url and url not in urls:
+            urls.append(url)
+
+    if not urls:
+        raise ProviderError("At least one Ollama endpoint URL is required")
+    return urls
+
+
+class OllamaEndpoint:
+    """Load and passive health state for a single Ollama node"""
+
+    def __init__(self, url: str, window: int = 20):
+        self.url = url
+        self.outstanding = 0
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+        self._outcomes: deque = deque(maxlen=window)
+
+    @property
+    def sample_count(self) -> int:
+        """Number of outcomes in the recent window"""
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        """Failure ratio over the recent outcome window"""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def is_available(self, now: float) -> bool:
+        """Whether the node is currently eligible for routing"""
+        return now >= self.ejected_until
+
+    def record_success(self, latency: float, alpha: float = 0.3) -> None:
+        """Record a successful request and its latency"""
+        self.total_requests += 1
+        self.consecutive_failures = 0
+        self._outcomes.append(True)
+        if self.ejections and self.sample_count >= 5 and self.error_rate == 0.0:
+            # Recovered after a probation period: forget previous ejections
+            self.ejections = 0
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = alpha * latency + (1 - alpha) * self.latency_ewma
+
+    def record_failure(self) -> None:
+        """Record a failed request"""
+        self.total_requests += 1
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self._outcomes.append(False)
+
+    def eject(self, base_seconds: float, now: float) -> None:
+        """Take the node out of rotation, backing off exponentially on repeat ejections"""
+        self.ejections += 1
+        backoff = base_seconds * (2 ** min(self.ejections - 1, 5))
+        self.ejected_until = now + backoff
+        # Give the node a clean slate once it is probed again
+        self._outcomes.clear()
+        self.consecutive_failures = 0
+        self.latency_ewma = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of the endpoint state"""
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "latency_ewma": self.latency_ewma,
+            "error_rate": self.error_rate,
+            "ejected": not self.is_available(time.monotonic()),
+            "ejections": self.ejections,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+        }
+
+
+class OllamaEndpointPool:
+    """Routes Ollama HTTP calls across several nodes.
+
+    Nodes are picked by least outstanding requests (ties broken by latency).
+    Health is tracked passively from real traffic: nodes with consecutive
+    failures, a high recent error rate or latency far above their peers are
+    ejected for a while and probed again once the ejection expires.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        max_retries: int = 2,
+        eject_seconds: float = 30.0,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        latency_outlier_factor: float = 5.0,
+        timeout: Optional[float] = None,
+    ):
+        if not urls:
+            raise ProviderError("At least one Ollama endpoint URL is required")
+        self.endpoints = [OllamaEndpoint(url) for url in urls]
+        self.max_retries = max_retries
+        self.eject_seconds = eject_seconds
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_outlier_factor = latency_outlier_factor
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            timeout = aiohttp.ClientTimeout(total=self.timeout) if self.timeout else None
+            self.session = aiohttp.ClientSession(timeout=timeout)
+        return self.session
+
+    def pick(self, exclude: Sequence[OllamaEndpoint] = (), prefer: Optional[str] = None) -> OllamaEndpoint:
+        """Choose the endpoint for the next request"""
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e not in exclude and e.is_available(now)]
+
+        if not candidates:
+            # Every remaining node is ejected: fall back to the one that recovers first
+            remaining = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            return min(remaining, key=lambda e: e.ejected_until)
+
+        if prefer:
+            for endpoint in candidates:
+                if endpoint.url == prefer:
+                    return endpoint
+
+        return min(candidates, key=lambda e: (e.outstanding, e.latency_ewma or 0.0))
+
+    def get_endpoint(self, url: str) -> Optional[OllamaEndpoint]:
+        """Look up an endpoint by URL"""
+        for endpoint in self.endpoints:
+            if endpoint.url == url:
+                return endpoint
+        return None
+
+    def _update_health(self, endpoint: OllamaEndpoint) -> None:
+        """Eject the endpoint if its recent behaviour makes it an outlier"""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.is_available(now)]
+        # Never eject the last node still in rotation
+        if endpoint not in available or len(available) <= 1:
+            return
+
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.eject(self.eject_seconds, now)
+            return
+
+        if endpoint.sample_count >= 5 and endpoint.error_rate >= self.error_rate_threshold:
+            endpoint.eject(self.eject_seconds, now)
+            return
+
+        if self.latency_outlier_factor and endpoint.latency_ewma is not None:
+            peers = [e.latency_ewma for e in available if e is not endpoint and e.latency_ewma is not None]
+            if peers:
+                baseline = sorted(peers)[len(peers) // 2]
+                if baseline > 0 and endpoint.latency_ewma > baseline * self.latency_outlier_factor:
+                    endpoint.eject(self.eject_seconds, now)
+
+    async def _send(
+        self,
+        endpoint: OllamaEndpoint,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        session = self._ensure_session()
+        endpoint.outstanding += 1
+        started = time.monotonic()
+        try:
+            async with session.request(method, f"{endpoint.url}{path}", json=payload) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise _RetryableError(f"{endpoint.url} returned status {response.status}")
+                if response.status != 200:
+                    raise ProviderError(f"Ollama API returned status {response.status}")
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            endpoint.record_failure()
+            self._update_health(endpoint)
+            raise _RetryableError(f"{endpoint.url} request failed: {e or type(e).__name__}")
+        except _RetryableError:
+            endpoint.record_failure()
+            self._update_health(endpoint)
+            raise
+        finally:
+            endpoint.outstanding -= 1
+
+        endpoint.record_success(time.monotonic() - started)
+        self._update_health(endpoint)
+        return data
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        idempotent: bool = False,
+        prefer: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], OllamaEndpoint]:
+        """Send a request to the best endpoint, retrying elsewhere when it is idempotent.
+
+        Returns the decoded JSON body and the endpoint that served it.
+        """
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        tried: List[OllamaEndpoint] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(attempts):
+            endpoint = self.pick(exclude=tried, prefer=prefer)
+            tried.append(endpoint)
+            try:
+                return await self._send(endpoint, method, path, payload), endpoint
+            except _RetryableError as e:
+                last_error = e
+                if len(tried) >= len(self.endpoints):
+                    # Every node has been tried once; allow another round
+                    tried = []
+
+        raise ProviderError(f"All Ollama endpoints failed: {last_error}")
+
+    async def post_json(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        idempotent: bool = False,
+        prefer: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], OllamaEndpoint]:
+        """POST a JSON payload through the pool"""
+        return await self.request("POST", path, payload, idempotent=idempotent, prefer=prefer)
+
+    async def request_each(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Send the same request to every endpoint, mapping URL to body (None on failure)"""
+        session = self._ensure_session()
+
+        async def send(endpoint: OllamaEndpoint) -> Optional[Dict[str, Any]]:
+            try:
+                async with session.request(method, f"{endpoint.url}{path}", json=payload) as response:
+                    if response.status != 200:
+                        return None
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return None
+
+        results = await asyncio.gather(*(send(e) for e in self.endpoints))
+        return {endpoint.url: result for endpoint, result in zip(self.endpoints, results)}
+
+    async def get_each(self, path: str) -> Dict[str, Optional[Dict[str, Any]]]:
+        """GET a path from every endpoint"""
+        return await self.request_each("GET", path)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint routing and health statistics"""
+        return [endpoint.to_dict() for endpoint in self.endpoints]
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+
+class _RetryableError(Exception):
+    """Node-level failure that may succeed on another endpoint"""
+    pass
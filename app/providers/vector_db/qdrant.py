@@ -3,14 +3,177 @@ Qdrant vector database provider implementation
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
+import re
+import uuid
+import zlib
+from collections.abc import Mapping
+from dataclasses import replace
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.exceptions import ResponseHandlingException
 
-from ..base import VectorDBProvider, SearchResult, Document
+from ..base import (
+    VectorDBProvider, SearchResult, Document, CollectionSettings, MetadataFilter, OWNERS_KEY, DEDUP_BANDS_KEY
+)
 from ...core.config import VectorDBConfig
 from ...core.exceptions import VectorDBError
+from ...core.metrics import VECTOR_DB_LATENCY
+from ...core.tracing import start_span
+
+# Namespace for deterministic point ids
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1d8e-3b4a-5c2e-9a7d-2f0e8b1c4d3a")
+
+def point_id(document: Document) -> str:
+    """Stable point id for a chunk, so re-indexing the same chunk overwrites it"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document.file_id}\x00{document.content}"))
+
+def shard_key_for(file_id: str, shard_keys: int) -> str:
+    """Custom shard key of a file; every chunk of a file lives under the same key"""
+    return f"file_shard_{zlib.crc32(file_id.encode('utf-8')) % shard_keys}"
+
+def group_by_shard_key(items: List[Any], file_id: Callable[[Any], str], shard_keys: int) -> Dict[str, List[Any]]:
+    """Split items into one batch per shard key"""
+    groups: Dict[str, List[Any]] = {}
+    for item in items:
+        groups.setdefault(shard_key_for(file_id(item), shard_keys), []).append(item)
+    return groups
+
+# Collection metadata key recording how many file shard keys a collection was created with
+SHARD_KEYS_METADATA = "file_shard_keys"
+
+# Named vector holding a chunk's late-interaction token vectors; the dense vector stays unnamed ("")
+MULTIVECTOR_NAME = "colbert"
+
+def dense_query(
+    query_embedding: List[float],
+    query_filter: Optional[models.Filter],
+    limit: int,
+    offset: int = 0,
+    score_threshold: Optional[float] = None,
+    rescore_query: Optional[List[List[float]]] = None,
+    rescore_candidates: int = 0
+) -> Dict[str, Any]:
+    """`query_points` arguments for a dense search, optionally rescored by MaxSim over token vectors.
+    
+    A rescored hit's score is the MaxSim sum over the query's tokens; `score_threshold`
+    applies to that sum divided by the token count (see `rescored_score`), so it keeps
+    its cosine-like meaning.
+    """
+    if not rescore_query:
+        return {"query": query_embedding, "query_filter": query_filter, "score_threshold": score_threshold}
+    # The filter selects dense candidates; only those are compared token by token
+    return {
+        "prefetch": models.Prefetch(
+            query=query_embedding,
+            filter=query_filter,
+            limit=max(rescore_candidates, offset + limit)
+        ),
+        "query": rescore_query,
+        "using": MULTIVECTOR_NAME,
+        "score_threshold": None if score_threshold is None else score_threshold * len(rescore_query)
+    }
+
+def rescored_score(score: float, rescore_query: Optional[List[List[float]]]) -> float:
+    """MaxSim sums normalised by the query's token count: the mean best cosine per query token"""
+    return score / len(rescore_query) if rescore_query else score
+
+# Payload keys holding the file id and the chunk text (several naming conventions exist)
+FILE_ID_KEYS = ("file_id", "fileID")
+CONTENT_KEYS = ("page_content", "content", "text", "Content")
+RESERVED_PAYLOAD_KEYS = frozenset(FILE_ID_KEYS + CONTENT_KEYS + (DEDUP_BANDS_KEY,))
+
+class PayloadMetadata(Mapping):
+    """Read-only view of a payload without its file id and content keys; nothing is copied"""
+    __slots__ = ("_payload",)
+    
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in RESERVED_PAYLOAD_KEYS:
+            raise KeyError(key)
+        return self._payload[key]
+    
+    def __iter__(self):
+        return (key for key in self._payload if key not in RESERVED_PAYLOAD_KEYS)
+    
+    def __len__(self) -> int:
+        return sum(1 for key in self._payload if key not in RESERVED_PAYLOAD_KEYS)
+    
+    def __repr__(self) -> str:
+        return f"PayloadMetadata({dict(self)!r})"
+
+def _decode_hit(point: Any, score: Optional[float] = None) -> SearchResult:
+    """SearchResult for a scored point or record; the one place payload layouts are handled"""
+    payload = point.payload or {}
+    file_id = payload.get("file_id") or payload.get("fileID", "")
+    content = (
+        payload.get("page_content") or payload.get("content") or payload.get("text") or payload.get("Content", "")
+    )
+    point_id = point.id
+    return SearchResult(
+        file_id=file_id,
+        score=point.score if score is None else score,
+        content=content,
+        metadata=PayloadMetadata(payload),
+        id=point_id if isinstance(point_id, str) else str(point_id)
+    )
+
+PAYLOAD_SCHEMA_TYPES = {
+    "keyword": models.PayloadSchemaType.KEYWORD,
+    "integer": models.PayloadSchemaType.INTEGER,
+    "float": models.PayloadSchemaType.FLOAT,
+    "bool": models.PayloadSchemaType.BOOL,
+    "datetime": models.PayloadSchemaType.DATETIME,
+}
+
+def _condition(metadata_filter: MetadataFilter) -> models.FieldCondition:
+    key = metadata_filter.key
+    if metadata_filter.any_of is not None:
+        return models.FieldCondition(key=key, match=models.MatchAny(any=list(metadata_filter.any_of)))
+    if metadata_filter.eq is not None:
+        return models.FieldCondition(key=key, match=models.MatchValue(value=metadata_filter.eq))
+    
+    bounds = {
+        "gte": metadata_filter.gte,
+        "gt": metadata_filter.gt,
+        "lte": metadata_filter.lte,
+        "lt": metadata_filter.lt
+    }
+    bounds = {name: value for name, value in bounds.items() if value is not None}
+    if not bounds:
+        raise VectorDBError(f"Filter on {key} has no condition")
+    if any(isinstance(value, datetime) for value in bounds.values()):
+        return models.FieldCondition(key=key, range=models.DatetimeRange(**bounds))
+    return models.FieldCondition(key=key, range=models.Range(**bounds))
+
+def build_filter(
+    filters: Optional[List[MetadataFilter]] = None,
+    file_ids: Optional[List[str]] = None
+) -> Optional[models.Filter]:
+    """Qdrant filter requiring every metadata condition (and one of `file_ids`, if given).
+    
+    A file matches the chunks it owns and the deduplicated chunks it shares.
+    """
+    conditions = []
+    if file_ids is not None:
+        conditions.append(models.Filter(should=[
+            models.FieldCondition(key="file_id", match=models.MatchAny(any=file_ids)),
+            models.FieldCondition(key=OWNERS_KEY, match=models.MatchAny(any=file_ids))
+        ]))
+    conditions.extend(_condition(metadata_filter) for metadata_filter in filters or [])
+    return models.Filter(must=conditions) if conditions else None
+
+def version_name(alias_name: str, version: int) -> str:
+    """Physical collection name for version `version` of a logical collection"""
+    return f"{alias_name}_v{version}"
+
+def next_version_name(alias_name: str, current: str) -> str:
+    """The version after `current`, e.g. docs_v2 -> docs_v3"""
+    match = re.fullmatch(re.escape(alias_name) + r"_v(\d+)", current)
+    return version_name(alias_name, int(match.group(1)) + 1 if match else 2)
 
 class QdrantProvider(VectorDBProvider):
     """Qdrant vector database provider"""
@@ -18,15 +181,25 @@ class QdrantProvider(VectorDBProvider):
     def __init__(self, config: VectorDBConfig):
         self.config = config
         self.client: Optional[QdrantClient] = None
+        # Thread pool for the blocking client; None means the loop's default pool
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Collection or alias name -> number of custom shard keys its files are routed to
+        self._shard_key_counts: Dict[str, int] = {}
         
     async def initialize(self) -> None:
         """Initialize Qdrant client"""
         try:
-            self.client = QdrantClient(
-                url=self.config.url,
-                api_key=self.config.api_key if self.config.api_key else None,
-                timeout=self.config.timeout
-            )
+            if self.config.url == ":memory:":
+                # In-process storage, used by tests and benchmarks. The local client is not
+                # thread-safe, so its calls are serialised on a single thread.
+                self.client = QdrantClient(location=":memory:")
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-local")
+            else:
+                self.client = QdrantClient(
+                    url=self.config.url,
+                    api_key=self.config.api_key if self.config.api_key else None,
+                    timeout=self.config.timeout
+                )
             
             # Test connection
             await self.health_check()
@@ -43,7 +216,7 @@ class QdrantProvider(VectorDBProvider):
             # Run in thread pool since qdrant-client is sync
             loop = asyncio.get_event_loop()
             collections = await loop.run_in_executor(
-                None, 
+                self._executor,
                 self.client.get_collections
             )
             return True
@@ -51,7 +224,91 @@ class QdrantProvider(VectorDBProvider):
             print(f"Qdrant health check failed: {e}")
             return False
     
-    async def create_collection(self, collection_name: str, dimension: int) -> None:
+    def _default_settings(self) -> CollectionSettings:
+        return CollectionSettings(
+            hnsw_m=self.config.hnsw_m,
+            hnsw_ef_construct=self.config.hnsw_ef_construct,
+            quantization=self.config.quantization,
+            shard_number=self.config.shard_number,
+            replication_factor=self.config.replication_factor,
+            write_consistency_factor=self.config.write_consistency_factor,
+            shard_keys=self.config.shard_keys
+        )
+    
+    async def _shard_keys(self, collection_name: str) -> int:
+        """Number of custom shard keys writes to this collection must be routed to (0 = none).
+        
+        Read from the collection, not the config: a collection rebuilt with other
+        shard keys, or served by a process configured differently, keeps its own.
+        """
+        count = self._shard_key_counts.get(collection_name)
+        if count is not None:
+            return count
+        
+        try:
+            target = await self.resolve_collection(collection_name)
+            count = self._shard_key_counts.get(target)
+            if count is None:
+                loop = asyncio.get_event_loop()
+                collection_info = await loop.run_in_executor(self._executor, self.client.get_collection, target)
+                count = await self._read_shard_key_count(target, collection_info)
+        except VectorDBError:
+            raise
+        except Exception as e:
+            raise VectorDBError(f"Failed to read sharding of {collection_name}: {e}")
+        self._shard_key_counts[collection_name] = count
+        return count
+    
+    async def _read_shard_key_count(self, collection_name: str, collection_info: Any) -> int:
+        if collection_info.config.params.sharding_method != models.ShardingMethod.CUSTOM:
+            return 0
+        metadata = getattr(collection_info.config, "metadata", None) or {}
+        if SHARD_KEYS_METADATA in metadata:
+            return int(metadata[SHARD_KEYS_METADATA])
+        
+        # Collections created before the count was recorded: count the keys Qdrant holds
+        loop = asyncio.get_event_loop()
+        try:
+            cluster = await loop.run_in_executor(
+                self._executor,
+                lambda: self.client.http.distributed_api.collection_cluster_info(collection_name).result
+            )
+            keys = {
+                shard.shard_key for shard in [*cluster.local_shards, *cluster.remote_shards]
+                if isinstance(shard.shard_key, str) and shard.shard_key.startswith("file_shard_")
+            }
+        except Exception as e:
+            raise VectorDBError(f"Failed to list shard keys of {collection_name}: {e}")
+        if not keys:
+            raise VectorDBError(f"{collection_name} uses custom sharding but has no file shard keys")
+        return len(keys)
+    
+    async def _create_shard_keys(self, collection_name: str, settings: CollectionSettings) -> None:
+        loop = asyncio.get_event_loop()
+        for index in range(settings.shard_keys):
+            try:
+                await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.create_shard_key(
+                        collection_name,
+                        f"file_shard_{index}",
+                        shards_number=settings.shard_number or None,
+                        replication_factor=settings.replication_factor or None
+                    )
+                )
+            except NotImplementedError:
+                # Local mode keeps everything in one segment and ignores shard key selectors
+                print(f"Qdrant in local mode has no shard keys; {collection_name} is not sharded")
+                self._shard_key_counts[collection_name] = 0
+                return
+        self._shard_key_counts[collection_name] = settings.shard_keys
+    
+    async def create_collection(
+        self,
+        collection_name: str,
+        dimension: int,
+        settings: Optional[CollectionSettings] = None
+    ) -> None:
         """Create a collection in Qdrant"""
         if not self.client:
             raise VectorDBError("Qdrant client not initialized")
@@ -60,31 +317,64 @@ class QdrantProvider(VectorDBProvider):
             loop = asyncio.get_event_loop()
             
             # Check if collection exists
-            try:
-                await loop.run_in_executor(
-                    None,
-                    self.client.get_collection,
-                    collection_name
-                )
+            exists = await loop.run_in_executor(
+                self._executor,
+                self.client.collection_exists,
+                collection_name
+            )
+            if exists:
                 print(f"Collection {collection_name} already exists")
                 return
-            except ResponseHandlingException as e:
-                # Collection doesn't exist, create it
-                if "not found" not in str(e).lower():
-                    # If error is not "not found", re-raise
-                    raise
+            
+            settings = settings or self._default_settings()
+            hnsw_config = None
+            if settings.hnsw_m or settings.hnsw_ef_construct:
+                hnsw_config = models.HnswConfigDiff(
+                    m=settings.hnsw_m or None,
+                    ef_construct=settings.hnsw_ef_construct or None
+                )
+            quantization_config = None
+            if settings.quantization == "scalar":
+                quantization_config = models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True)
+                )
+            
+            vectors_config = models.VectorParams(
+                size=dimension,
+                distance=models.Distance.COSINE
+            )
+            if settings.multivector_size:
+                vectors_config = {
+                    "": vectors_config,
+                    # Token vectors are only read for rescoring: no HNSW graph, kept on disk
+                    MULTIVECTOR_NAME: models.VectorParams(
+                        size=settings.multivector_size,
+                        distance=models.Distance.COSINE,
+                        multivector_config=models.MultiVectorConfig(comparator=models.MultiVectorComparator.MAX_SIM),
+                        hnsw_config=models.HnswConfigDiff(m=0),
+                        on_disk=True
+                    )
+                }
             
             # Create collection
             await loop.run_in_executor(
-                None,
-                self.client.create_collection,
-                collection_name,
-                models.VectorParams(
-                    size=dimension,
-                    distance=models.Distance.COSINE
+                self._executor,
+                lambda: self.client.create_collection(
+                    collection_name,
+                    vectors_config,
+                    hnsw_config=hnsw_config,
+                    quantization_config=quantization_config,
+                    shard_number=settings.shard_number or None,
+                    replication_factor=settings.replication_factor or None,
+                    write_consistency_factor=settings.write_consistency_factor or None,
+                    sharding_method=models.ShardingMethod.CUSTOM if settings.shard_keys else None,
+                    metadata={SHARD_KEYS_METADATA: settings.shard_keys} if settings.shard_keys else None
                 )
             )
             print(f"Created collection {collection_name}")
+            if settings.shard_keys:
+                await self._create_shard_keys(collection_name, settings)
+            await self.create_payload_indexes(collection_name)
             
         except Exception as e:
             # If collection already exists (409 error), ignore it
@@ -93,23 +383,77 @@ class QdrantProvider(VectorDBProvider):
                 return
             raise VectorDBError(f"Failed to create collection {collection_name}: {e}")
     
-    async def upsert_documents(self, collection_name: str, documents: List[Document], embeddings: List[List[float]]) -> None:
-        """Insert or update documents with their embeddings"""
+    async def create_payload_indexes(self, collection_name: str) -> None:
+        """Index the configured payload fields so filters are applied inside the HNSW search"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        loop = asyncio.get_event_loop()
+        for field_name, schema in self.config.payload_indexes.items():
+            try:
+                # Creating an index that already exists is a no-op in Qdrant
+                await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.create_payload_index(
+                        collection_name,
+                        field_name=field_name,
+                        field_schema=PAYLOAD_SCHEMA_TYPES[schema]
+                    )
+                )
+            except Exception as e:
+                raise VectorDBError(f"Failed to create payload index {field_name} on {collection_name}: {e}")
+    
+    async def ensure_collection(self, collection_name: str, dimension: int, multivector_size: int = 0) -> None:
+        """Create the collection, or with use_alias a first version `<name>_v1` behind alias `<name>`"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        settings = replace(self._default_settings(), multivector_size=multivector_size)
+        if not self.config.use_alias:
+            await self.create_collection(collection_name, dimension, settings)
+            await self.create_payload_indexes(collection_name)
+            return
+        
+        target = await self.get_alias_target(collection_name)
+        if target is not None:
+            await self.create_payload_indexes(target)
+            return
+        if await self.collection_exists(collection_name):
+            await self.create_payload_indexes(collection_name)
+            # Collections created before aliases were used keep working, but cannot be swapped
+            print(f"Collection {collection_name} is not behind an alias; versioned rebuilds are disabled for it")
+            return
+        
+        first_version = version_name(collection_name, 1)
+        await self.create_collection(first_version, dimension, settings)
+        await self.switch_alias(collection_name, first_version)
+        print(f"Alias {collection_name} -> {first_version}")
+    
+    async def upsert_documents(
+        self,
+        collection_name: str,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        multivectors: Optional[List[List[List[float]]]] = None
+    ) -> None:
+        """Insert or update documents with their embeddings (and token vectors for rescoring)"""
         if not self.client:
             raise VectorDBError("Qdrant client not initialized")
         
         if len(documents) != len(embeddings):
             raise VectorDBError("Number of documents must match number of embeddings")
+        if multivectors is not None and len(multivectors) != len(embeddings):
+            raise VectorDBError("Number of token vector sets must match number of embeddings")
         
         try:
             points = []
-            for i, (doc, embedding) in enumerate(zip(documents, embeddings)):
-                # Generate unique ID based on file_id and content hash
-                point_id = hash(f"{doc.file_id}:{doc.content[:100]}") % (2**31)
-                
+            for index, (doc, embedding) in enumerate(zip(documents, embeddings)):
+                vector = embedding
+                if multivectors is not None:
+                    vector = {"": embedding, MULTIVECTOR_NAME: multivectors[index]}
                 point = models.PointStruct(
-                    id=point_id,
-                    vector=embedding,
+                    id=point_id(doc),
+                    vector=vector,
                     payload={
                         "file_id": doc.file_id,
                         "content": doc.content,
@@ -118,58 +462,95 @@ class QdrantProvider(VectorDBProvider):
                 )
                 points.append(point)
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                self.client.upsert,
-                collection_name,
-                points
-            )
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="upsert"):
+                await self._upsert_points(collection_name, points)
             
         except Exception as e:
             raise VectorDBError(f"Failed to upsert documents: {e}")
     
-    async def search(self, collection_name: str, query_embedding: List[float], limit: int = 10) -> List[SearchResult]:
-        """Search for similar documents"""
+    async def _upsert_points(self, collection_name: str, points: List[models.PointStruct]) -> None:
+        """Upsert points, one request per shard key when the collection has custom sharding"""
+        loop = asyncio.get_event_loop()
+        shard_keys = await self._shard_keys(collection_name)
+        if not shard_keys:
+            await loop.run_in_executor(self._executor, self.client.upsert, collection_name, points)
+            return
+        
+        def file_id_of(point: models.PointStruct) -> str:
+            return next((point.payload[key] for key in FILE_ID_KEYS if point.payload.get(key)), "")
+        
+        await asyncio.gather(*(
+            loop.run_in_executor(
+                self._executor,
+                lambda key=key, batch=batch: self.client.upsert(collection_name, batch, shard_key_selector=key)
+            )
+            for key, batch in group_by_shard_key(points, file_id_of, shard_keys).items()
+        ))
+    
+    async def search(
+        self,
+        collection_name: str,
+        query_embedding: List[float],
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None,
+        with_content: bool = True,
+        offset: int = 0,
+        score_threshold: Optional[float] = None,
+        rescore_query: Optional[List[List[float]]] = None,
+        rescore_candidates: int = 0
+    ) -> List[SearchResult]:
+        """Search for similar documents matching all `filters`, optionally rescored by MaxSim"""
         if not self.client:
             raise VectorDBError("Qdrant client not initialized")
         
         try:
             loop = asyncio.get_event_loop()
             
-            # Use direct method call for qdrant-client
-            search_result = await loop.run_in_executor(
-                None,
-                lambda: self.client.search(
-                    collection_name=collection_name,
-                    query_vector=query_embedding,
-                    limit=limit,
-                    with_payload=True,
-                    with_vectors=False
-                )
-            )
+            # Filters run inside the HNSW traversal, so top-k is over matching points only
+            query_filter = build_filter(filters)
+            # Candidates only need their file_id; content is fetched later for the winners
+            with_payload = True if with_content else models.PayloadSelectorInclude(include=["file_id", "fileID"])
             
-            results = []
-            for hit in search_result:
-                payload = hit.payload
-                # Handle both file_id and fileID for compatibility
-                file_id = payload.get("file_id") or payload.get("fileID", "")
-                # Handle different content field names
-                content = payload.get("page_content") or payload.get("content") or payload.get("text") or payload.get("Content", "")
-                result = SearchResult(
-                    file_id=file_id,
-                    score=hit.score,
-                    content=content,
-                    metadata={k: v for k, v in payload.items() if k not in ["file_id", "fileID", "page_content", "content", "text", "Content"]}
+            # Use direct method call for qdrant-client
+            span_attributes = {
+                "db.system": "qdrant", "db.collection": collection_name, "db.limit": limit, "db.offset": offset,
+                "db.rescored": bool(rescore_query)
+            }
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="search"), \
+                    start_span("qdrant.search", span_attributes) as span:
+                search_result = await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.query_points(
+                        collection_name=collection_name,
+                        **dense_query(
+                            query_embedding, query_filter, limit, offset,
+                            score_threshold, rescore_query, rescore_candidates
+                        ),
+                        limit=limit,
+                        offset=offset or None,
+                        with_payload=with_payload,
+                        with_vectors=False
+                    ).points
                 )
-                results.append(result)
+                span.set_attribute("db.result_count", len(search_result))
             
-            return results
+            if rescore_query:
+                return [_decode_hit(hit, rescored_score(hit.score, rescore_query)) for hit in search_result]
+            return [_decode_hit(hit) for hit in search_result]
             
         except Exception as e:
             raise VectorDBError(f"Failed to search documents: {e}")
     
-    async def search_with_filter(self, collection_name: str, query_embedding: List[float], file_ids: List[str], limit: int = 10) -> List[SearchResult]:
+    async def search_with_filter(
+        self,
+        collection_name: str,
+        query_embedding: List[float],
+        file_ids: List[str],
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None,
+        rescore_query: Optional[List[List[float]]] = None,
+        rescore_candidates: int = 0
+    ) -> List[SearchResult]:
         """Search for similar documents within specified files"""
         if not self.client:
             raise VectorDBError("Qdrant client not initialized")
@@ -177,48 +558,69 @@ class QdrantProvider(VectorDBProvider):
         try:
             loop = asyncio.get_event_loop()
             
-            # Create filter for file_ids
-            file_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="file_id",
-                        match=models.MatchAny(any=file_ids)
-                    )
-                ]
-            )
+            # Create filter for file_ids and metadata conditions
+            file_filter = build_filter(filters, file_ids=file_ids)
+            # Only the shards holding these files need to be searched
+            shard_keys = await self._shard_keys(collection_name)
+            shard_key_selector = sorted({shard_key_for(file_id, shard_keys) for file_id in file_ids}) if shard_keys else None
             
             # Use direct method call for qdrant-client with filter
-            search_result = await loop.run_in_executor(
-                None,
-                lambda: self.client.search(
-                    collection_name=collection_name,
-                    query_vector=query_embedding,
-                    query_filter=file_filter,
-                    limit=limit,
-                    with_payload=True,
-                    with_vectors=False
+            span_attributes = {"db.system": "qdrant", "db.collection": collection_name, "db.limit": limit}
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="search_with_filter"), \
+                    start_span("qdrant.search_with_filter", span_attributes) as span:
+                search_result = await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.query_points(
+                        collection_name=collection_name,
+                        **dense_query(
+                            query_embedding, file_filter, limit,
+                            rescore_query=rescore_query, rescore_candidates=rescore_candidates
+                        ),
+                        limit=limit,
+                        with_payload=True,
+                        with_vectors=False,
+                        shard_key_selector=shard_key_selector
+                    ).points
                 )
-            )
+                span.set_attribute("db.result_count", len(search_result))
+            
+            if rescore_query:
+                return [_decode_hit(hit, rescored_score(hit.score, rescore_query)) for hit in search_result]
+            return [_decode_hit(hit) for hit in search_result]
             
-            results = []
-            for hit in search_result:
-                payload = hit.payload
-                # Handle both file_id and fileID for compatibility
-                file_id = payload.get("file_id") or payload.get("fileID", "")
-                # Handle different content field names
-                content = payload.get("page_content") or payload.get("content") or payload.get("text") or payload.get("Content", "")
-                result = SearchResult(
-                    file_id=file_id,
-                    score=hit.score,
-                    content=content,
-                    metadata={k: v for k, v in payload.items() if k not in ["file_id", "fileID", "page_content", "content", "text", "Content"]}
+        except Exception as e:
+            raise VectorDBError(f"Failed to search documents with filter: {e}")
+    
+    async def retrieve(self, collection_name: str, ids: List[str]) -> List[SearchResult]:
+        """Fetch payloads for point ids, in the order given"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        if not ids:
+            return []
+        
+        try:
+            loop = asyncio.get_event_loop()
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="retrieve"), \
+                    start_span("qdrant.retrieve", {"db.system": "qdrant", "db.ids": len(ids)}):
+                records = await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.retrieve(
+                        collection_name,
+                        # Points written before uuid ids have integer ids
+                        ids=[int(point_id) if point_id.isdigit() else point_id for point_id in ids],
+                        with_payload=True,
+                        with_vectors=False
+                    )
                 )
-                results.append(result)
             
-            return results
+            by_id = {}
+            for record in records:
+                result = _decode_hit(record, score=0.0)
+                by_id[result.id] = result
+            return [by_id[point_id] for point_id in ids if point_id in by_id]
             
         except Exception as e:
-            raise VectorDBError(f"Failed to search documents with filter: {e}")
+            raise VectorDBError(f"Failed to retrieve documents: {e}")
     
     async def delete_documents(self, collection_name: str, file_ids: List[str]) -> None:
         """Delete documents by file IDs"""
@@ -228,41 +630,125 @@ class QdrantProvider(VectorDBProvider):
         try:
             loop = asyncio.get_event_loop()
             
-            # Delete by filter
-            await loop.run_in_executor(
-                None,
-                self.client.delete,
-                collection_name,
-                models.Filter(
+            def file_filter(ids: List[str]) -> models.Filter:
+                return models.Filter(
                     must=[
                         models.FieldCondition(
                             key="file_id",
-                            match=models.MatchAny(any=file_ids)
+                            match=models.MatchAny(any=ids)
                         )
                     ]
                 )
-            )
+            
+            # Delete by filter, only on the shards that hold the files
+            shard_keys = await self._shard_keys(collection_name)
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="delete"):
+                if not shard_keys:
+                    await loop.run_in_executor(
+                        self._executor,
+                        self.client.delete,
+                        collection_name,
+                        file_filter(file_ids)
+                    )
+                else:
+                    await asyncio.gather(*(
+                        loop.run_in_executor(
+                            self._executor,
+                            lambda key=key, ids=ids: self.client.delete(
+                                collection_name, file_filter(ids), shard_key_selector=key
+                            )
+                        )
+                        for key, ids in group_by_shard_key(file_ids, str, shard_keys).items()
+                    ))
             
         except Exception as e:
             raise VectorDBError(f"Failed to delete documents: {e}")
     
+    async def find_by_payload(
+        self,
+        collection_name: str,
+        key: str,
+        values: List[str],
+        limit: Optional[int] = None
+    ) -> List[SearchResult]:
+        """Points whose payload `key` matches any of `values`, at most `limit` (score is 0)"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        if not values:
+            return []
+        
+        try:
+            loop = asyncio.get_event_loop()
+            scroll_filter = models.Filter(must=[models.FieldCondition(key=key, match=models.MatchAny(any=values))])
+            results: List[SearchResult] = []
+            offset = None
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="find_by_payload"):
+                while limit is None or len(results) < limit:
+                    records, offset = await loop.run_in_executor(
+                        self._executor,
+                        lambda: self.client.scroll(
+                            collection_name,
+                            scroll_filter=scroll_filter,
+                            limit=256 if limit is None else min(256, limit - len(results)),
+                            offset=offset,
+                            with_payload=True,
+                            with_vectors=False
+                        )
+                    )
+                    results.extend(_decode_hit(record, score=0.0) for record in records)
+                    if offset is None:
+                        break
+            return results
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to find points by {key}: {e}")
+    
+    async def update_payloads(self, collection_name: str, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Set payload keys per point id in one request; ids missing from the collection are skipped"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        if not payloads:
+            return
+        
+        try:
+            loop = asyncio.get_event_loop()
+            # A filter on the id (rather than a point list) makes absent points a no-op
+            operations = [
+                models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload=payload,
+                    filter=models.Filter(must=[models.HasIdCondition(has_id=[point])])
+                ))
+                for point, payload in payloads.items()
+            ]
+            with VECTOR_DB_LATENCY.time(provider="qdrant", operation="set_payload"):
+                await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.batch_update_points(collection_name, operations)
+                )
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to update payloads in {collection_name}: {e}")
+    
     async def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """Get information about a collection"""
         if not self.client:
             raise VectorDBError("Qdrant client not initialized")
         
         try:
+            target = await self.resolve_collection(collection_name)
             loop = asyncio.get_event_loop()
             collection_info = await loop.run_in_executor(
-                None,
+                self._executor,
                 self.client.get_collection,
-                collection_name
+                target
             )
             
             return {
                 "name": collection_name,
+                "target": target,
                 "status": collection_info.status,
-                "vectors_count": collection_info.vectors_count,
+                # Newer servers dropped vectors_count; with one vector per point it equals points_count
+                "vectors_count": getattr(collection_info, "vectors_count", None) or collection_info.points_count,
                 "config": {
                     "params": collection_info.config.params.dict() if collection_info.config.params else None,
                     "hnsw_config": collection_info.config.hnsw_config.dict() if collection_info.config.hnsw_config else None,
@@ -272,3 +758,215 @@ class QdrantProvider(VectorDBProvider):
             
         except Exception as e:
             raise VectorDBError(f"Failed to get collection info: {e}")
+    
+    async def resolve_collection(self, name: str) -> str:
+        """Physical collection behind `name`, which may be an alias"""
+        return await self.get_alias_target(name) or name
+    
+    async def collection_exists(self, collection_name: str) -> bool:
+        """Whether a collection or alias with this name exists"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                self.client.collection_exists,
+                collection_name
+            )
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to check collection {collection_name}: {e}")
+    
+    async def get_vector_size(self, collection_name: str) -> Optional[int]:
+        """Vector size of the collection (or alias target), None if it does not exist"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        if not await self.collection_exists(collection_name):
+            return None
+        try:
+            target = await self.resolve_collection(collection_name)
+            loop = asyncio.get_event_loop()
+            collection_info = await loop.run_in_executor(
+                self._executor,
+                self.client.get_collection,
+                target
+            )
+            vectors = collection_info.config.params.vectors
+            if isinstance(vectors, dict):
+                # Named vectors: the service writes the unnamed/default one
+                vectors = vectors.get("") or next(iter(vectors.values()), None)
+            return vectors.size if vectors is not None else None
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to get vector size of {collection_name}: {e}")
+    
+    async def get_multivector_size(self, collection_name: str) -> Optional[int]:
+        """Size of the collection's token vectors, None if it stores none or does not exist"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        if not await self.collection_exists(collection_name):
+            return None
+        try:
+            target = await self.resolve_collection(collection_name)
+            loop = asyncio.get_event_loop()
+            collection_info = await loop.run_in_executor(
+                self._executor,
+                self.client.get_collection,
+                target
+            )
+            vectors = collection_info.config.params.vectors
+            if isinstance(vectors, dict) and MULTIVECTOR_NAME in vectors:
+                return vectors[MULTIVECTOR_NAME].size
+            return None
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to get token vector size of {collection_name}: {e}")
+    
+    async def count_points(self, collection_name: str) -> int:
+        """Exact number of points in a collection"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        try:
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(
+                self._executor,
+                lambda: self.client.count(collection_name, exact=True)
+            )
+            return result.count
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to count points in {collection_name}: {e}")
+    
+    async def copy_points(
+        self,
+        source: str,
+        target: str,
+        batch_size: int = 256,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """Copy every point with its stored vector and payload; no re-embedding needed"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        copied = 0
+        offset = None
+        try:
+            loop = asyncio.get_event_loop()
+            # Token vectors are dropped when the new version has no room for them
+            keep_multivectors = await self.get_multivector_size(target) is not None
+            while True:
+                records, offset = await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.client.scroll(
+                        source,
+                        limit=batch_size,
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=True
+                    )
+                )
+                if records:
+                    points = [
+                        models.PointStruct(
+                            id=record.id,
+                            vector=record.vector if keep_multivectors or not isinstance(record.vector, dict)
+                            else record.vector[""],
+                            payload=record.payload
+                        )
+                        for record in records
+                    ]
+                    with VECTOR_DB_LATENCY.time(provider="qdrant", operation="upsert"):
+                        await self._upsert_points(target, points)
+                    copied += len(points)
+                    if progress:
+                        progress(len(points))
+                if offset is None:
+                    return copied
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to copy points from {source} to {target}: {e}")
+    
+    async def delete_collection(self, collection_name: str) -> None:
+        """Drop a collection"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                self._executor,
+                self.client.delete_collection,
+                collection_name
+            )
+            self._shard_key_counts.pop(collection_name, None)
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to delete collection {collection_name}: {e}")
+    
+    async def get_alias_target(self, alias_name: str) -> Optional[str]:
+        """Collection an alias points to, or None if the alias does not exist"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        try:
+            loop = asyncio.get_event_loop()
+            aliases = await loop.run_in_executor(self._executor, self.client.get_aliases)
+            for alias in aliases.aliases:
+                if alias.alias_name == alias_name:
+                    return alias.collection_name
+            return None
+            
+        except Exception as e:
+            raise VectorDBError(f"Failed to read alias {alias_name}: {e}")
+    
+    async def switch_alias(self, alias_name: str, collection_name: str) -> Optional[str]:
+        """Point an alias at a collection in one atomic update; returns the previous target"""
+        if not self.client:
+            raise VectorDBError("Qdrant client not initialized")
+        
+        previous = await self.get_alias_target(alias_name)
+        try:
+            loop = asyncio.get_event_loop()
+            if previous is None:
+                is_collection = await loop.run_in_executor(
+                    self._executor,
+                    self.client.collection_exists,
+                    alias_name
+                )
+                if is_collection:
+                    raise VectorDBError(
+                        f"{alias_name} is a collection, not an alias; rename it before switching"
+                    )
+            
+            operations = []
+            if previous is not None:
+                operations.append(models.DeleteAliasOperation(
+                    delete_alias=models.DeleteAlias(alias_name=alias_name)
+                ))
+            operations.append(models.CreateAliasOperation(
+                create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+            ))
+            await loop.run_in_executor(
+                self._executor,
+                lambda: self.client.update_collection_aliases(change_aliases_operations=operations)
+            )
+            # The new target may be sharded differently
+            self._shard_key_counts.pop(alias_name, None)
+            return previous
+            
+        except VectorDBError:
+            raise
+        except Exception as e:
+            raise VectorDBError(f"Failed to switch alias {alias_name} to {collection_name}: {e}")
+    
+    async def close(self) -> None:
+        """Close the client and its worker thread"""
+        if self.client:
+            self.client.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
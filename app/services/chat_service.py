@@ -2,12 +2,20 @@
 Chat service using provider pattern
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
 from ..core.config import AppConfig, get_config
-from ..core.exceptions import ChatError, SearchError
-from ..providers.base import ChatProvider, SearchResult
-from ..providers.chat.ollama import OllamaChatProvider
+from ..core.exceptions import ChatError, SearchError, ProviderError, ChatSessionNotFoundError, ValidationError
+from ..providers.base import ChatProvider, ChatTurn, SearchResult, MetadataFilter
 from .search_service import get_search_service, SearchService
+from .context_packer import ContextPacker, PackedContext
+from .chat_sessions import ChatSession, ChatSessionStore, chunk_key
+from ..core.metrics import CHAT_STAGE_LATENCY, record_cache
+from ..core.startup import startup_state
+from ..core.tracing import start_span
+
+# Tokens reserved for the prompt template around a follow-up question
+PROMPT_OVERHEAD_TOKENS = 32
 
 class ChatService:
     """Chat service that orchestrates search and chat providers"""
@@ -15,14 +23,33 @@ class ChatService:
     def __init__(self, config: Optional[AppConfig] = None):
         self.config = config or get_config()
         self.chat_provider: Optional[ChatProvider] = None
+        self.packer = ContextPacker(self.config.chat.tokenizer)
+        self.sessions = self._new_session_store()
+        # Tenants other than the default get their own store, so they can't evict each other's sessions
+        self._tenant_sessions: Dict[str, ChatSessionStore] = {}
         self._initialized = False
     
+    def _new_session_store(self) -> ChatSessionStore:
+        return ChatSessionStore(
+            ttl_seconds=self.config.chat.session_ttl_seconds,
+            max_sessions=self.config.chat.max_sessions
+        )
+    
+    def sessions_for(self, tenant: Optional[str] = None) -> ChatSessionStore:
+        """Session store of a tenant (the shared store without tenancy)"""
+        if tenant is None or tenant == self.config.tenancy.default_tenant:
+            return self.sessions
+        store = self._tenant_sessions.get(tenant)
+        if store is None:
+            store = self._tenant_sessions[tenant] = self._new_session_store()
+        return store
+    
     async def initialize(self) -> None:
         """Initialize the chat service with providers"""
         try:
-            # Initialize chat provider (using same config as embedding for Ollama)
-            self.chat_provider = self._create_chat_provider()
-            await self.chat_provider.initialize()
+            # Initialize chat provider
+            self.chat_provider = await asyncio.to_thread(self._create_chat_provider)
+            await startup_state.timed("chat", self.chat_provider.initialize())
             
             self._initialized = True
             
@@ -31,8 +58,27 @@ class ChatService:
     
     def _create_chat_provider(self) -> ChatProvider:
         """Create chat provider based on config"""
-        # For now, only Ollama is supported
-        return OllamaChatProvider(self.config.embedding)
+        provider_name = self.config.chat.provider.lower()
+        
+        if provider_name == "ollama":
+            from ..providers.chat.ollama import OllamaChatProvider
+            return OllamaChatProvider(self.config.chat)
+        else:
+            raise ProviderError(f"Unsupported chat provider: {provider_name}")
+    
+    async def warmup(self) -> None:
+        """Load the chat model ahead of the first user request"""
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            # The tokenizer may need a download, keep it off the event loop
+            await asyncio.gather(
+                self.chat_provider.warmup(),
+                asyncio.to_thread(lambda: self.packer.tokenizer)
+            )
+        except Exception as e:
+            raise ChatError(f"Failed to warm up chat model: {e}")
     
     async def health_check(self) -> Dict[str, bool]:
         """Check health of chat provider"""
@@ -53,72 +99,158 @@ class ChatService:
         self, 
         file_ids: List[str], 
         message: str, 
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        session_id: Optional[str] = None,
+        start_session: bool = False,
+        filters: Optional[List[MetadataFilter]] = None,
+        search_service: Optional[SearchService] = None,
+        tenant: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Chat with specific files using RAG approach"""
+        """Chat with specific files using RAG approach.
+        
+        With `start_session` (or an existing `session_id`) the conversation state is kept
+        server-side, so follow-up turns only send new documents and the new question.
+        `search_service` and `tenant` select the tenant's collection and sessions.
+        """
         if not self._initialized:
             await self.initialize()
         
+        sessions = self.sessions_for(tenant)
+        session = None
+        if session_id:
+            session = sessions.get(session_id)
+            record_cache("chat_session", session is not None and session.state is not None)
+            if session is None:
+                raise ChatSessionNotFoundError(f"Chat session {session_id} not found or expired")
+            if set(file_ids) != set(session.file_ids):
+                raise ValidationError("file_ids must match the files of the chat session")
+        created = None
+        
         try:
-            # Get search service
-            search_service = await get_search_service()
-            
-            # Search for relevant chunks in specified files
-            relevant_chunks = await search_service.search_with_file_filter(
-                query=message,
-                file_ids=file_ids,
-                limit=max_chunks
-            )
-            
-            # Build context from chunks
-            context = self._build_context(relevant_chunks, max_tokens=3000)
-            
-            # Generate response using chat provider
-            response = await self.chat_provider.generate_response(context, message)
-            
-            # Format chunks for response
-            source_chunks = [
-                {
-                    "file_id": chunk.file_id,
-                    "content": chunk.content,
-                    "score": chunk.score
+            span_attributes = {"chat.file_count": len(file_ids), "chat.max_chunks": max_chunks}
+            with start_span("chat.chat_with_files", span_attributes) as span:
+                # Get search service
+                if search_service is None:
+                    search_service = await get_search_service()
+                
+                # Search for relevant chunks in specified files
+                with CHAT_STAGE_LATENCY.time(stage="retrieval"), start_span("chat.retrieval"):
+                    relevant_chunks = await search_service.search_with_file_filter(
+                        query=message,
+                        file_ids=file_ids,
+                        limit=max_chunks,
+                        filters=filters
+                    )
+                
+                # Only a turn that got this far starts a session
+                if start_session and session is None:
+                    session = created = sessions.create(file_ids)
+                
+                if session is None:
+                    # Build context from chunks within the model's token budget
+                    with CHAT_STAGE_LATENCY.time(stage="packing"), start_span("chat.packing"):
+                        packed = await asyncio.to_thread(
+                            self._build_context, relevant_chunks, self.config.chat.context_limit
+                        )
+                    
+                    # Generate response using chat provider
+                    with CHAT_STAGE_LATENCY.time(stage="generation"), start_span("chat.generation"):
+                        response = await self.chat_provider.generate_response(packed.text, message)
+                    used_chunks = packed.chunks
+                    session_info = {}
+                else:
+                    # Turns of one conversation must not interleave
+                    async with session.lock:
+                        packed, turn, used_chunks = await self._session_turn(session, relevant_chunks, message)
+                    response = turn.response
+                    session_info = {
+                        "session_id": session.session_id,
+                        "reused_tokens": turn.reused_tokens
+                    }
+                
+                # Format the chunks that made it into the prompt
+                source_chunks = [
+                    {
+                        "file_id": chunk.file_id,
+                        "content": chunk.content,
+                        "score": chunk.score
+                    }
+                    for chunk in used_chunks
+                ]
+                span.set_attributes({
+                    "chat.chunks_retrieved": len(relevant_chunks),
+                    "chat.chunks_used": len(used_chunks),
+                    "chat.context_tokens": packed.tokens
+                })
+                
+                return {
+                    "response": response,
+                    "source_chunks": source_chunks,
+                    "total_chunks": len(relevant_chunks),
+                    "context_tokens": packed.tokens,
+                    **session_info
                 }
-                for chunk in relevant_chunks
-            ]
-            
-            return {
-                "response": response,
-                "source_chunks": source_chunks,
-                "total_chunks": len(source_chunks)
-            }
             
         except Exception as e:
+            # A failed first turn must not leave an unusable session behind
+            if created is not None:
+                sessions.delete(created.session_id)
             raise ChatError(f"Failed to chat with files: {e}")
     
-    def _build_context(self, chunks: List[SearchResult], max_tokens: int = 3000) -> str:
-        """Build context string from search results with token limit"""
-        if not chunks:
-            return ""
+    async def _session_turn(
+        self,
+        session: ChatSession,
+        chunks: List[SearchResult],
+        message: str
+    ) -> Tuple[PackedContext, ChatTurn, List[SearchResult]]:
+        """Run one turn of a session, sending only chunks the model has not seen yet"""
+        chat_config = self.config.chat
         
-        context_parts = []
-        current_tokens = 0
+        # Room left in the model context once the answer and question are reserved
+        remaining = (
+            chat_config.num_ctx
+            - chat_config.num_predict
+            - session.state_tokens
+            - self.packer.count_tokens(message)
+            - PROMPT_OVERHEAD_TOKENS
+        )
+        if session.state and remaining <= 0:
+            # The conversation outgrew the context window: start over with a fresh prompt
+            session.reset()
+            remaining = chat_config.context_limit
         
-        for chunk in chunks:
-            # Rough token estimation (1 token ≈ 4 characters for Vietnamese)
-            chunk_tokens = len(chunk.content) // 4
-            
-            if current_tokens + chunk_tokens > max_tokens:
-                # Truncate the chunk to fit
-                remaining_tokens = max_tokens - current_tokens
-                if remaining_tokens > 50:  # Only add if meaningful content
-                    truncated_content = chunk.content[:remaining_tokens * 4]
-                    context_parts.append(f"[File: {chunk.file_id}]\n{truncated_content}...")
-                break
-            
-            context_parts.append(f"[File: {chunk.file_id}]\n{chunk.content}")
-            current_tokens += chunk_tokens
+        already_seen = [chunk for chunk in chunks if chunk_key(chunk) in session.seen_chunks]
+        new_chunks = [chunk for chunk in chunks if chunk_key(chunk) not in session.seen_chunks]
+        with CHAT_STAGE_LATENCY.time(stage="packing"), start_span("chat.packing"):
+            packed = await asyncio.to_thread(
+                self._build_context, new_chunks, min(chat_config.context_limit, remaining)
+            )
         
-        return "\n\n".join(context_parts)
+        with CHAT_STAGE_LATENCY.time(stage="generation"), start_span("chat.generation") as span:
+            span.set_attribute("chat.session_turn", session.turns)
+            turn = await self.chat_provider.generate_turn(
+                packed.text,
+                message,
+                state=session.state,
+                endpoint=session.endpoint
+            )
+        
+        session.state = turn.state
+        session.endpoint = turn.endpoint
+        session.turns += 1
+        session.seen_chunks.update(chunk_key(chunk) for chunk in packed.chunks)
+        
+        used_chunks = sorted(already_seen + packed.chunks, key=lambda chunk: chunk.score, reverse=True)
+        return packed, turn, used_chunks
+    
+    def end_session(self, session_id: str, tenant: Optional[str] = None) -> None:
+        """Discard a chat session and its model state"""
+        if not self.sessions_for(tenant).delete(session_id):
+            raise ChatSessionNotFoundError(f"Chat session {session_id} not found or expired")
+    
+    def _build_context(self, chunks: List[SearchResult], max_tokens: int = 3000) -> PackedContext:
+        """Pack search results into a context that fits the token limit exactly"""
+        return self.packer.pack(chunks, max_tokens)
     
     async def close(self) -> None:
         """Close all connections"""
@@ -128,10 +260,26 @@ class ChatService:
 # Global chat service instance
 _chat_service: Optional[ChatService] = None
 
+_chat_service_lock = asyncio.Lock()
+
 async def get_chat_service() -> ChatService:
     """Get or create global chat service instance"""
     global _chat_service
     if _chat_service is None:
-        _chat_service = ChatService()
-        await _chat_service.initialize()
+        async with _chat_service_lock:
+            if _chat_service is None:
+                service = ChatService()
+                try:
+                    await service.initialize()
+                except Exception:
+                    await service.close()
+                    raise
+                _chat_service = service
     return _chat_service
+
+async def close_chat_service() -> None:
+    """Close the global chat service if it was created"""
+    global _chat_service
+    if _chat_service is not None:
+        await _chat_service.close()
+        _chat_service = None
@@ -0,0 +1,90 @@
+"""
+Server-side chat session state for multi-turn conversations over the same files
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+from ..providers.base import SearchResult
+
+def chunk_key(chunk: SearchResult) -> str:
+    """Stable identity of a chunk for tracking what a session has already seen"""
+    digest = hashlib.sha1(chunk.content.encode("utf-8")).hexdigest()
+    return f"{chunk.file_id}:{digest}"
+
+@dataclass
+class ChatSession:
+    """Conversation state reused across turns"""
+    session_id: str
+    file_ids: Tuple[str, ...]
+    state: Optional[List[int]] = None
+    endpoint: Optional[str] = None
+    seen_chunks: Set[str] = field(default_factory=set)
+    turns: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def state_tokens(self) -> int:
+        """Number of tokens already held in the model state"""
+        return len(self.state) if self.state else 0
+
+    def reset(self) -> None:
+        """Forget the model state; the next turn starts a fresh prompt"""
+        self.state = None
+        self.endpoint = None
+        self.seen_chunks.clear()
+
+class ChatSessionStore:
+    """In-memory session store with idle eviction and an LRU size cap"""
+
+    def __init__(self, ttl_seconds: float = 1800, max_sessions: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, file_ids: List[str]) -> ChatSession:
+        """Start a new session for a set of files"""
+        self.evict_idle()
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        session = ChatSession(session_id=uuid.uuid4().hex, file_ids=tuple(sorted(set(file_ids))))
+        self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return a live session and mark it as recently used"""
+        self.evict_idle()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session, returning whether it existed"""
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """Remove sessions idle for longer than the TTL"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        evicted = 0
+        # Sessions are kept in least-recently-used order
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
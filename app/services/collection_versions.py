@@ -0,0 +1,191 @@
+"""
+Collection versioning behind a Qdrant alias.
+Searches and writes address the logical collection name, which is an alias for
+a physical `<name>_vN` collection. A rebuild copies the current version's
+stored vectors into a new collection with different index settings (HNSW,
+quantization) in the background, mirrors live writes into it while it is
+built, then swaps the alias atomically. Qdrant resolves the alias on every
+request, so the running service serves the new version without a restart.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..core.config import DedupConfig, get_config
+from ..core.exceptions import ValidationError, VectorDBError
+from ..providers.base import CollectionSettings
+from .search_service import SearchService, get_search_service
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CollectionBuild:
+    """Progress of one shadow build"""
+    build_id: str
+    alias: str
+    settings: CollectionSettings
+    swap: bool = True
+    status: str = "building"
+    source: Optional[str] = None
+    target: Optional[str] = None
+    total_points: int = 0
+    copied_points: int = 0
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("swapped", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "build_id": self.build_id,
+            "alias": self.alias,
+            "status": self.status,
+            "source": self.source,
+            "target": self.target,
+            "settings": asdict(self.settings),
+            "total_points": self.total_points,
+            "copied_points": self.copied_points,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class CollectionVersionManager:
+    """Runs at most one shadow build at a time and swaps the alias when it is done"""
+
+    def __init__(
+        self,
+        search_service_factory: Optional[Callable[[], Awaitable[SearchService]]] = None,
+        dedup: Optional[DedupConfig] = None
+    ):
+        self._search_service_factory = search_service_factory or get_search_service
+        self.dedup = dedup or DedupConfig()
+        self.build: Optional[CollectionBuild] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, settings: CollectionSettings, swap: bool = True) -> CollectionBuild:
+        """Start building a new version in the background"""
+        if self.build is not None and self.build.status in ("building", "ready"):
+            raise ValidationError(f"Build {self.build.build_id} is still {self.build.status}")
+        if settings.quantization not in ("", "scalar"):
+            raise ValidationError(f"Unsupported quantization: {settings.quantization}")
+        if settings.shard_keys and self.dedup.enabled:
+            # A shared chunk lives in one file's shard, so other owners' filtered searches would miss it
+            raise ValidationError("Dedup cannot be combined with shard_keys")
+
+        self.build = CollectionBuild(build_id=uuid.uuid4().hex, alias="", settings=settings, swap=swap)
+        self._task = asyncio.create_task(self._run(self.build))
+        return self.build
+
+    async def wait(self) -> Optional[CollectionBuild]:
+        """Wait for the running build task, if any"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.build
+
+    async def swap(self) -> CollectionBuild:
+        """Swap the alias to a build that finished with swap=False"""
+        build = self.build
+        if build is None or build.status != "ready":
+            raise ValidationError("No finished build is waiting to be swapped")
+        search_service = await self._search_service_factory()
+        await self._swap(search_service, build)
+        return build
+
+    async def _run(self, build: CollectionBuild) -> None:
+        from ..providers.vector_db.qdrant import next_version_name
+        search_service: Optional[SearchService] = None
+        vector_db = None
+        try:
+            search_service = await self._search_service_factory()
+            vector_db = search_service.vector_db
+            build.alias = search_service.config.vector_db.collection
+            build.source = await vector_db.get_alias_target(build.alias)
+            if build.source is None:
+                raise VectorDBError(
+                    f"{build.alias} is not an alias; rebuilds need vector_db.use_alias and an aliased collection"
+                )
+
+            target = next_version_name(build.alias, build.source)
+            while await vector_db.collection_exists(target):
+                target = next_version_name(build.alias, target)
+            build.target = target
+
+            if search_service.rescoring:
+                # Token vectors are copied along, so the new version keeps rescoring
+                build.settings = replace(build.settings, multivector_size=search_service.multivector.get_dimension())
+            await vector_db.create_collection(target, search_service.embedding.get_dimension(), build.settings)
+            # Mirror writes before copying: anything written after the copy's scroll
+            # passed its position still reaches the new version
+            search_service.add_shadow_collection(target)
+            build.total_points = await vector_db.count_points(build.source)
+            logger.info(f"Building {target} from {build.source} ({build.total_points} points)")
+
+            def record(count: int) -> None:
+                build.copied_points += count
+
+            await vector_db.copy_points(build.source, target, progress=record)
+
+            if build.swap:
+                await self._swap(search_service, build)
+            else:
+                build.status = "ready"
+                logger.info(f"Build {target} is ready; writes are mirrored until it is swapped")
+
+        except Exception as e:
+            logger.error(f"Collection build {build.build_id} failed: {e}")
+            build.status = "failed"
+            build.error = str(e)
+            build.finished_at = time.time()
+            if build.target and search_service is not None:
+                search_service.remove_shadow_collection(build.target)
+                try:
+                    await vector_db.delete_collection(build.target)
+                except VectorDBError as cleanup_error:
+                    logger.warning(f"Could not drop partial build {build.target}: {cleanup_error}")
+
+    async def _swap(self, search_service: SearchService, build: CollectionBuild) -> None:
+        vector_db = search_service.vector_db
+        # Deletes that ran while the copy was in progress may have been re-copied afterwards;
+        # writes stay mirrored until the alias has moved, so none fall in between
+        deleted = search_service.shadow_deletes(build.target)
+        if deleted:
+            await vector_db.delete_documents(build.target, sorted(deleted))
+        await vector_db.switch_alias(build.alias, build.target)
+        search_service.remove_shadow_collection(build.target)
+        build.status = "swapped"
+        build.finished_at = time.time()
+        logger.info(f"Alias {build.alias} now points to {build.target} (was {build.source})")
+
+    async def close(self) -> None:
+        """Cancel a running build"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+# Global collection version manager instance
+_version_manager: Optional[CollectionVersionManager] = None
+
+def get_version_manager() -> CollectionVersionManager:
+    """Get or create global collection version manager"""
+    global _version_manager
+    if _version_manager is None:
+        _version_manager = CollectionVersionManager(dedup=get_config().dedup)
+    return _version_manager
+
+async def close_version_manager() -> None:
+    """Cancel any running build"""
+    global _version_manager
+    if _version_manager is not None:
+        await _version_manager.close()
+        _version_manager = None
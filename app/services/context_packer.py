@@ -0,0 +1,209 @@
+"""
+Token-budgeted context packing for RAG prompts
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Protocol
+
+from ..providers.base import SearchResult
+from .dedup import jaccard, shingles
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SEPARATOR = "\n\n"
+TRUNCATION_MARKER = "..."
+
+class TokenCounter(Protocol):
+    """Minimal tokenizer interface used by the packer"""
+
+    def count(self, text: str) -> int:
+        ...
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        ...
+
+class HuggingFaceTokenCounter:
+    """Token counter backed by a Hugging Face `tokenizers` tokenizer"""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        encoding = self._tokenizer.encode(text, add_special_tokens=False)
+        if len(encoding.ids) <= max_tokens:
+            return text
+        # Cut on the character offset of the last kept token so no token is split
+        end = encoding.offsets[max_tokens - 1][1]
+        return text[:end]
+
+class ApproximateTokenCounter:
+    """Fallback counter used when the model tokenizer is unavailable.
+
+    Counts words and punctuation, splitting long words the way BPE vocabularies
+    usually do. It overestimates rather than underestimates, so prompts still fit.
+    """
+
+    _pattern = re.compile(r"\w{1,4}|[^\w\s]", re.UNICODE)
+
+    def count(self, text: str) -> int:
+        return len(self._pattern.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        for index, match in enumerate(self._pattern.finditer(text)):
+            if index == max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+_tokenizer_cache = {}
+_tokenizer_lock = threading.Lock()
+
+def load_token_counter(name: str) -> TokenCounter:
+    """Load (once per process) the tokenizer for `name`.
+
+    `name` is a path to a `tokenizer.json` or a Hugging Face model id. Failures are
+    cached too, so an offline host does not retry the download on every request.
+    """
+    if not name:
+        return ApproximateTokenCounter()
+
+    with _tokenizer_lock:
+        if name in _tokenizer_cache:
+            return _tokenizer_cache[name]
+
+        counter: TokenCounter
+        try:
+            from tokenizers import Tokenizer
+
+            if Path(name).exists():
+                tokenizer = Tokenizer.from_file(name)
+            else:
+                tokenizer = Tokenizer.from_pretrained(name)
+            counter = HuggingFaceTokenCounter(tokenizer)
+            logger.info(f"Loaded tokenizer {name}")
+        except Exception as e:
+            logger.warning(f"Tokenizer {name} unavailable, using approximate token counts: {e}")
+            counter = ApproximateTokenCounter()
+
+        _tokenizer_cache[name] = counter
+        return counter
+
+@dataclass
+class PackedContext:
+    """Result of packing chunks into a token budget"""
+    text: str
+    tokens: int
+    chunks: List[SearchResult] = field(default_factory=list)
+    duplicates_dropped: int = 0
+    truncated: bool = False
+
+class ContextPacker:
+    """Packs retrieved chunks into a prompt context using the model tokenizer"""
+
+    def __init__(
+        self,
+        tokenizer_name: str = "",
+        duplicate_threshold: float = 0.85,
+        min_fill_tokens: int = 32,
+        tokenizer: Optional[TokenCounter] = None
+    ):
+        self.tokenizer_name = tokenizer_name
+        self.duplicate_threshold = duplicate_threshold
+        self.min_fill_tokens = min_fill_tokens
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self) -> TokenCounter:
+        """Model tokenizer, loaded lazily on first use"""
+        if self._tokenizer is None:
+            self._tokenizer = load_token_counter(self.tokenizer_name)
+        return self._tokenizer
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text with the model tokenizer"""
+        return self.tokenizer.count(text)
+
+    def pack(self, chunks: List[SearchResult], max_tokens: int) -> PackedContext:
+        """Fill up to `max_tokens` with the most relevant non-duplicate chunks"""
+        if not chunks or max_tokens <= 0:
+            return PackedContext(text="", tokens=0)
+
+        unique, duplicates = self._drop_near_duplicates(chunks)
+        separator_tokens = self.count_tokens(CHUNK_SEPARATOR)
+
+        # Greedy by relevance: take every chunk that fits whole, skipping the ones that
+        # don't so smaller lower-ranked chunks can still use the remaining budget
+        selected = []
+        skipped = []
+        used = 0
+        for chunk in unique:
+            cost = self.count_tokens(self._format(chunk, chunk.content))
+            extra = cost + (separator_tokens if selected else 0)
+            if used + extra <= max_tokens:
+                selected.append((chunk, chunk.content))
+                used += extra
+            else:
+                skipped.append(chunk)
+
+        # Fill what is left with the best chunk that didn't fit, cut on a token boundary
+        truncated = False
+        if skipped:
+            chunk = skipped[0]
+            header_tokens = self.count_tokens(self._format(chunk, ""))
+            marker_tokens = self.count_tokens(TRUNCATION_MARKER)
+            remaining = max_tokens - used - header_tokens - marker_tokens - (separator_tokens if selected else 0)
+            if remaining >= self.min_fill_tokens:
+                partial = self.tokenizer.truncate(chunk.content, remaining)
+                if partial:
+                    selected.append((chunk, partial + TRUNCATION_MARKER))
+                    truncated = True
+
+        # Keep the prompt in relevance order
+        order = {id(chunk): index for index, chunk in enumerate(unique)}
+        selected.sort(key=lambda item: order[id(item[0])])
+
+        text = CHUNK_SEPARATOR.join(self._format(chunk, content) for chunk, content in selected)
+        tokens = self.count_tokens(text)
+
+        # Token merges across chunk boundaries can shift the total slightly; trim to fit
+        while selected and tokens > max_tokens:
+            selected.pop()
+            text = CHUNK_SEPARATOR.join(self._format(chunk, content) for chunk, content in selected)
+            tokens = self.count_tokens(text)
+
+        return PackedContext(
+            text=text,
+            tokens=tokens,
+            chunks=[chunk for chunk, _ in selected],
+            duplicates_dropped=duplicates,
+            truncated=truncated
+        )
+
+    def _drop_near_duplicates(self, chunks: List[SearchResult]):
+        """Drop chunks whose text nearly repeats a higher scoring chunk"""
+        ranked = sorted(chunks, key=lambda chunk: chunk.score, reverse=True)
+        kept = []
+        kept_shingles = []
+        duplicates = 0
+        for chunk in ranked:
+            chunk_shingles = shingles(chunk.content)
+            if any(jaccard(chunk_shingles, other) >= self.duplicate_threshold for other in kept_shingles):
+                duplicates += 1
+                continue
+            kept.append(chunk)
+            kept_shingles.append(chunk_shingles)
+        return kept, duplicates
+
+    @staticmethod
+    def _format(chunk: SearchResult, content: str) -> str:
+        return f"[File: {chunk.file_id}]\n{content}"
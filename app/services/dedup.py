@@ -0,0 +1,257 @@
+"""
+Near-duplicate chunk detection at ingest.
+
+Boilerplate (headers, footers, disclaimers, license text) repeats with small
+edits across many files. Each chunk gets a MinHash signature over its word
+shingles; the signature is cut into bands, and chunks sharing a band key are
+candidates whose shingle Jaccard similarity is then checked exactly. A chunk
+within `threshold` of one already stored (or earlier in the batch) is not
+embedded or stored: its file joins the owners (`file_ids`) of the canonical
+chunk instead, so filtered chat over that file still finds it while searches
+see the text once instead of once per file.
+
+The band keys are stored in the payload, so candidate lookup is one filtered
+scroll per batch rather than a scan.
+"""
+
+import asyncio
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..core.config import DedupConfig
+from ..providers.base import DEDUP_BANDS_KEY, OWNERS_KEY, Document, VectorDBProvider
+
+# Stored chunks fetched per batch as candidates; band collisions beyond this are ignored
+MAX_STORED_CANDIDATES = 1000
+# Nearest-neighbour searches in flight at once for the embedding check
+EMBEDDING_LOOKUP_CONCURRENCY = 8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+")
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Lowercased word n-grams of `text` (the whole text when it is shorter than `size`).
+
+    Shared with the chat context packer, so near-duplicate means the same at
+    ingest and in prompts.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash functions over crc32 shingle hashes"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set)
+        )
+        # Products wrap modulo 2^64, which keeps the hash family good enough for MinHash
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+def band_keys(signature: np.ndarray, bands: int) -> List[str]:
+    """One key per band of rows; two chunks sharing any key are candidates"""
+    return [
+        f"{index}:{hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()}"
+        for index, rows in enumerate(signature.reshape(bands, -1))
+    ]
+
+@dataclass
+class _Canonical:
+    """A chunk others may be folded into: stored already, or kept from the current batch"""
+    file_id: str
+    content: str
+    shingles: Set[str]
+    owners: List[str]
+    id: Optional[str] = None
+    stored: bool = False
+
+@dataclass
+class DedupResult:
+    """Outcome of deduplicating one batch"""
+    # Chunks to embed and store, with their owners and band keys in the metadata
+    documents: List[Document]
+    # Stored point id -> complete owner list after this batch
+    owners: Dict[str, List[str]] = field(default_factory=dict)
+    duplicates: int = 0
+
+class Deduplicator:
+    """Folds near-duplicate chunks into the canonical chunk stored first"""
+
+    def __init__(self, config: DedupConfig):
+        self.config = config
+        self.hasher = MinHasher(config.num_perm)
+
+    def fingerprint(self, text: str) -> Tuple[Set[str], List[str]]:
+        """Shingles and band keys of a chunk; chunks under `min_words` words get no band keys"""
+        shingle_set = shingles(text, self.config.shingle_size)
+        if len(_WORD.findall(text)) < self.config.min_words:
+            return shingle_set, []
+        return shingle_set, band_keys(self.hasher.signature(shingle_set), self.config.bands)
+
+    def _match(
+        self,
+        index: Dict[str, List[_Canonical]],
+        document: Document,
+        shingle_set: Set[str],
+        bands: List[str]
+    ) -> Optional[_Canonical]:
+        """The most similar candidate at or above the threshold.
+
+        Chunks the document's own file already owns only match with identical
+        text: an edited chunk of a re-indexed file must be stored, not folded
+        into its old version.
+        """
+        best, best_score = None, self.config.threshold
+        seen: Set[int] = set()
+        for band in bands:
+            for candidate in index.get(band, ()):
+                if id(candidate) in seen:
+                    continue
+                seen.add(id(candidate))
+                if document.file_id in candidate.owners and candidate.content != document.content:
+                    continue
+                score = jaccard(shingle_set, candidate.shingles)
+                if score >= best_score:
+                    best, best_score = candidate, score
+        return best
+
+    async def split(self, vector_db: VectorDBProvider, collection: str, documents: List[Document]) -> DedupResult:
+        """Separate the chunks to store from the near-duplicates of stored or earlier chunks"""
+        from ..providers.vector_db.qdrant import point_id
+        prepared = [(document, *self.fingerprint(document.content)) for document in documents]
+        index: Dict[str, List[_Canonical]] = {}
+
+        all_bands = sorted({band for _, _, bands in prepared for band in bands})
+        for hit in await vector_db.find_by_payload(collection, DEDUP_BANDS_KEY, all_bands, limit=MAX_STORED_CANDIDATES):
+            # The stored band keys are not exposed as metadata; recomputing them is cheap
+            shingle_set, bands = self.fingerprint(hit.content)
+            canonical = _Canonical(
+                file_id=hit.file_id,
+                content=hit.content,
+                shingles=shingle_set,
+                owners=list(hit.metadata.get(OWNERS_KEY) or [hit.file_id]),
+                id=hit.id,
+                stored=True
+            )
+            for band in bands:
+                index.setdefault(band, []).append(canonical)
+
+        kept: List[Tuple[Document, _Canonical, List[str]]] = []
+        updated: Dict[str, _Canonical] = {}
+        duplicates = 0
+        for document, shingle_set, bands in prepared:
+            match = self._match(index, document, shingle_set, bands) if bands else None
+            # A handover changes a point's file_id but not its id, so compare ids
+            same_point = match is not None and match.id == point_id(document)
+            if match is not None and (not same_point or not match.stored):
+                if document.file_id not in match.owners:
+                    match.owners.append(document.file_id)
+                if match.stored:
+                    updated[match.id] = match
+                duplicates += 1
+                continue
+
+            # Re-indexing a canonical chunk keeps the files sharing it
+            if match is not None:
+                match.stored = False
+                updated.pop(match.id, None)
+                if document.file_id not in match.owners:
+                    match.owners.append(document.file_id)
+            canonical = match or _Canonical(document.file_id, document.content, shingle_set, [document.file_id])
+            for band in bands:
+                index.setdefault(band, []).append(canonical)
+            kept.append((document, canonical, bands))
+
+        unique = []
+        for document, canonical, bands in kept:
+            metadata = dict(document.metadata)
+            if bands:
+                metadata[DEDUP_BANDS_KEY] = bands
+            if len(canonical.owners) > 1:
+                metadata[OWNERS_KEY] = canonical.owners
+            unique.append(Document(content=document.content, file_id=document.file_id, metadata=metadata))
+
+        return DedupResult(
+            documents=unique,
+            owners={point: canonical.owners for point, canonical in updated.items() if canonical.stored},
+            duplicates=duplicates
+        )
+
+    async def split_by_embedding(
+        self,
+        vector_db: VectorDBProvider,
+        collection: str,
+        result: DedupResult,
+        embeddings: List[List[float]]
+    ) -> List[int]:
+        """Indexes of `result.documents` to store after comparing embeddings with stored chunks.
+
+        Chunks whose nearest stored neighbour (from another file or with other
+        text) scores at least `embedding_threshold` are folded into it like
+        MinHash duplicates; `result` is updated in place.
+        """
+        from ..providers.vector_db.qdrant import point_id
+        nearest = []
+        for start in range(0, len(embeddings), EMBEDDING_LOOKUP_CONCURRENCY):
+            nearest.extend(await asyncio.gather(*(
+                vector_db.search(collection, embedding, limit=1)
+                for embedding in embeddings[start:start + EMBEDDING_LOOKUP_CONCURRENCY]
+            )))
+        kept = []
+        for position, (document, hits) in enumerate(zip(result.documents, nearest)):
+            top = hits[0] if hits else None
+            own_files = document.metadata.get(OWNERS_KEY) or [document.file_id]
+            if (
+                top is None
+                or top.score < self.config.embedding_threshold
+                or top.id == point_id(document)
+                # Like MinHash matches, never fold a chunk into another chunk of its own file
+                or document.file_id in (top.metadata.get(OWNERS_KEY) or [top.file_id])
+            ):
+                kept.append(position)
+                continue
+            owners = result.owners.get(top.id) or list(top.metadata.get(OWNERS_KEY) or [top.file_id])
+            for file_id in own_files:
+                if file_id not in owners:
+                    owners.append(file_id)
+            result.owners[top.id] = owners
+            result.duplicates += 1
+
+        return kept
+
+    async def release(self, vector_db: VectorDBProvider, collection: str, file_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Payload updates that hand shared chunks of deleted files to their remaining owners.
+
+        Applied before the delete, a shared chunk whose file_id is deleted moves
+        to the next owner instead of disappearing for every file.
+        """
+        removed = set(file_ids)
+        payloads = {}
+        for hit in await vector_db.find_by_payload(collection, OWNERS_KEY, list(file_ids)):
+            remaining = [file_id for file_id in hit.metadata.get(OWNERS_KEY) or () if file_id not in removed]
+            if remaining:
+                primary = remaining[0] if hit.file_id in removed else hit.file_id
+                payloads[hit.id] = {"file_id": primary, OWNERS_KEY: remaining}
+        return payloads
@@ -0,0 +1,259 @@
+"""
+Background indexing jobs.
+Requests to index documents are queued by priority and processed in batches by
+a fixed number of workers, so large ingests neither hold HTTP connections open
+nor take over the embedding servers from search traffic.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..core.config import IndexingConfig, get_config
+from ..core.exceptions import JobNotFoundError, JobQueueFullError, ValidationError
+from ..core.metrics import registry, INDEX_JOBS, INDEX_CHUNKS, INDEX_QUEUE_DEPTH
+from ..providers.base import Document
+from .search_service import SearchService, get_search_service
+
+logger = logging.getLogger(__name__)
+
+MAX_JOB_ERRORS = 10
+
+@dataclass
+class IndexJob:
+    """Progress of one indexing request"""
+    job_id: str
+    total_chunks: int
+    priority: int = 0
+    status: str = "queued"
+    embedded: int = 0
+    upserted: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    documents: List[Document] = field(default_factory=list, repr=False)
+    # Tenant that owns the job and the search service (collection) it writes to
+    tenant: Optional[str] = None
+    search_service: Optional[SearchService] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "completed_with_errors", "failed")
+
+    def record(self, stage: str, count: int) -> None:
+        """Progress callback for SearchService.index_documents"""
+        if stage == "embedded":
+            self.embedded += count
+        elif stage == "upserted":
+            self.upserted += count
+        INDEX_CHUNKS.inc(count, stage=stage)
+
+    def fail(self, count: int, error: Any) -> None:
+        """Count chunks that could not be indexed"""
+        self.failed += count
+        INDEX_CHUNKS.inc(count, stage="failed")
+        if len(self.errors) < MAX_JOB_ERRORS:
+            self.errors.append(str(error))
+
+    def finish(self, status: Optional[str] = None, rejected: int = 0) -> None:
+        """Set the final status, by default from the chunk counts and `rejected` invalid inputs"""
+        if status is not None:
+            self.status = status
+        elif self.failed == 0 and rejected == 0:
+            self.status = "completed"
+        elif self.upserted == 0:
+            self.status = "failed"
+        else:
+            self.status = "completed_with_errors"
+        self.finished_at = time.time()
+        INDEX_JOBS.inc(status=self.status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "total_chunks": self.total_chunks,
+            "embedded": self.embedded,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class IndexJobManager:
+    """Priority queue of indexing jobs drained by a bounded worker pool"""
+
+    def __init__(
+        self,
+        config: IndexingConfig,
+        search_service_factory: Callable[[], Awaitable[SearchService]] = get_search_service
+    ):
+        self.config = config
+        self._get_search_service = search_service_factory
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, IndexJob]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(
+        self,
+        documents: List[Document],
+        priority: int = 0,
+        search_service: Optional[SearchService] = None,
+        tenant: Optional[str] = None
+    ) -> IndexJob:
+        """Queue documents for indexing; higher priority jobs run first.
+        
+        `search_service` overrides the factory's service, e.g. with a tenant's.
+        """
+        self._ensure_workers()
+        if self._queue.qsize() >= self.config.max_queued_jobs:
+            INDEX_JOBS.inc(status="rejected")
+            raise JobQueueFullError(f"Indexing queue is full ({self.config.max_queued_jobs} jobs waiting)")
+
+        self._evict_finished()
+        job = IndexJob(
+            job_id=uuid.uuid4().hex,
+            total_chunks=len(documents),
+            priority=priority,
+            documents=list(documents),
+            tenant=tenant,
+            search_service=search_service
+        )
+        self._jobs[job.job_id] = job
+        # FIFO within a priority level
+        self._queue.put_nowait((-priority, next(self._sequence), job.job_id))
+        INDEX_JOBS.inc(status="queued")
+        return job
+
+    def track(self, job_id: Optional[str] = None, tenant: Optional[str] = None) -> IndexJob:
+        """Register a job processed by the caller (e.g. a streaming upload) so it can be polled"""
+        if job_id in self._jobs:
+            raise ValidationError(f"Indexing job {job_id} already exists")
+        self._evict_finished()
+        job = IndexJob(
+            job_id=job_id or uuid.uuid4().hex, total_chunks=0, status="running", started_at=time.time(), tenant=tenant
+        )
+        self._jobs[job.job_id] = job
+        INDEX_JOBS.inc(status="tracked")
+        return job
+
+    def get(self, job_id: str, tenant: Optional[str] = None) -> IndexJob:
+        job = self._jobs.get(job_id)
+        # Other tenants' jobs look like missing ones
+        if job is None or job.tenant != tenant:
+            raise JobNotFoundError(f"Indexing job {job_id} not found or expired")
+        return job
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Stop the workers; queued jobs are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def _ensure_workers(self) -> None:
+        # Created lazily so the queue and tasks belong to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"index-worker-{index}")
+                for index in range(max(1, self.config.workers))
+            ]
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            except Exception as e:
+                logger.error(f"Indexing job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IndexJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        documents, job.documents = job.documents, []
+        search_service, job.search_service = job.search_service, None
+
+        try:
+            if search_service is None:
+                search_service = await self._get_search_service()
+        except Exception as e:
+            self._fail_batch(job, len(documents), e)
+            documents = []
+
+        batch_size = max(1, self.config.batch_size)
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            try:
+                await search_service.index_documents(batch, progress=job.record)
+            except Exception as e:
+                # Keep going: one bad batch shouldn't lose the rest of the job
+                self._fail_batch(job, len(batch), e)
+
+        job.finish()
+
+    @staticmethod
+    def _fail_batch(job: IndexJob, count: int, error: Exception) -> None:
+        job.fail(count, error)
+        logger.warning(f"Indexing job {job.job_id}: {count} chunks failed: {error}")
+
+    def _evict_finished(self) -> None:
+        """Forget finished jobs past their TTL, then the oldest finished ones over the cap"""
+        cutoff = time.time() - self.config.job_ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+        excess = len(self._jobs) - self.config.max_jobs + 1
+        if excess > 0:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done][:excess]
+            for job_id in finished:
+                del self._jobs[job_id]
+
+# Global job manager instance
+_job_manager: Optional[IndexJobManager] = None
+
+def get_job_manager() -> IndexJobManager:
+    """Get or create global indexing job manager"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = IndexJobManager(get_config().indexing)
+    return _job_manager
+
+async def close_job_manager() -> None:
+    """Stop the indexing workers"""
+    global _job_manager
+    if _job_manager is not None:
+        await _job_manager.close()
+        _job_manager = None
+
+def _collect_queue_depth() -> None:
+    if _job_manager is not None:
+        INDEX_QUEUE_DEPTH.set(_job_manager.queued)
+
+registry.add_collector(_collect_queue_depth)
@@ -0,0 +1,69 @@
+"""
+Opaque cursors for paging through file-grouped search results.
+A cursor records how far into the ranked hit list the previous page read and
+the boundary score of its last file (with the files returned at exactly that
+score, to break ties), so the next page resumes with a Qdrant `offset` instead
+of re-running a bigger query, and the cursor stays small however deep the
+paging goes. Files whose best chunk scores above the boundary belong to
+earlier pages and are skipped, which keeps pages disjoint when new points
+shift the offsets.
+"""
+
+import base64
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from ..core.exceptions import ValidationError
+
+CURSOR_VERSION = 2
+
+@dataclass
+class PageCursor:
+    """Continuation state of a file-grouped search"""
+    offset: int = 0
+    score: Optional[float] = None
+    # Files already returned whose best chunk scores exactly `score`
+    ties: List[str] = field(default_factory=list)
+
+    def returned(self, file_id: str, best_score: float) -> bool:
+        """Whether a file whose best chunk scores `best_score` was on an earlier page"""
+        if self.score is None:
+            return False
+        return best_score > self.score or (best_score == self.score and file_id in self.ties)
+
+@dataclass
+class FileSearchPage:
+    """One page of file-grouped results and the cursor for the next one"""
+    results: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+def query_fingerprint(query: str, *parts: Any) -> str:
+    """Short digest of everything that shapes the ranking, so cursors can't be replayed on another query"""
+    digest = hashlib.blake2b(orjson.dumps([query, *parts], default=repr), digest_size=8)
+    return digest.hexdigest()
+
+def encode_cursor(cursor: PageCursor, fingerprint: str) -> str:
+    data = {"v": CURSOR_VERSION, "q": fingerprint, "o": cursor.offset, "s": cursor.score, "t": cursor.ties}
+    return base64.urlsafe_b64encode(orjson.dumps(data)).decode().rstrip("=")
+
+def decode_cursor(token: str, fingerprint: str) -> PageCursor:
+    """Parse a cursor from `encode_cursor`; raises ValidationError if it is malformed or for another query"""
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if data["v"] != CURSOR_VERSION:
+            raise ValueError(f"unsupported cursor version {data['v']}")
+        cursor = PageCursor(
+            offset=int(data["o"]),
+            score=None if data["s"] is None else float(data["s"]),
+            ties=[str(file_id) for file_id in data["t"]]
+        )
+    except Exception as e:
+        raise ValidationError(f"Invalid cursor: {e}")
+    if data.get("q") != fingerprint:
+        raise ValidationError("Cursor belongs to a different query")
+    if cursor.offset < 0:
+        raise ValidationError("Invalid cursor: negative offset")
+    return cursor
@@ -0,0 +1,45 @@
+"""
+LRU cache of query embeddings.
+Each search service (one per tenant) owns its own cache, so one tenant's
+traffic cannot evict another tenant's hot queries.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional
+
+from ..core.metrics import record_cache
+
+class QueryEmbeddingCache:
+    """At most `max_entries` query -> embedding pairs; 0 disables caching"""
+
+    def __init__(self, max_entries: int = 1024, name: str = "query_embedding"):
+        self.max_entries = max(0, max_entries)
+        self.name = name
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, query: str) -> bool:
+        """Whether `query` is cached, without counting a hit or refreshing it"""
+        return query in self._entries
+
+    def get(self, query: str) -> Optional[List[float]]:
+        if not self.max_entries:
+            return None
+        embedding = self._entries.get(query)
+        record_cache(self.name, embedding is not None)
+        if embedding is not None:
+            self._entries.move_to_end(query)
+        return embedding
+
+    def put(self, query: str, embedding: List[float]) -> None:
+        if not self.max_entries:
+            return
+        self._entries[query] = embedding
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,215 @@
+"""
+Append-only log of normalized search queries with their frequencies.
+Recording a query only appends it to an in-memory buffer, so the event loop
+never waits for counting, pruning or disk I/O. Every few seconds a worker thread
+folds the buffer into the counts and appends them as
+`{"c": collection, "q": query, "n": delta}` lines. Loading
+sums the deltas; when the file holds several lines per distinct query it is
+rewritten with one line each. The most frequent queries of a collection are
+what the startup warm-up pre-embeds, so a new pod starts with a hot query
+embedding cache instead of a p99 spike.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+import orjson
+
+from ..core.config import QueryLogConfig, get_config
+
+if TYPE_CHECKING:
+    from .search_service import SearchService
+
+logger = logging.getLogger(__name__)
+
+# Rewrite the file once it holds this many lines per distinct query
+COMPACT_RATIO = 4
+# Without a flusher, `record` folds the buffer itself once it holds this many searches
+MAX_BUFFERED = 10000
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query: NFKC with runs of whitespace collapsed.
+
+    Case is kept, since the embedding models distinguish it; queries that
+    normalize to the same text share one cache entry and one log entry.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+
+class QueryLog:
+    """Query frequencies per collection, persisted to `path`; an empty path keeps them in memory"""
+
+    def __init__(self, path: str, max_queries: int = 50000):
+        self.path = Path(path) if path else None
+        self.max_queries = max(1, max_queries)
+        self._counts: Counter = Counter()
+        self._pending: Counter = Counter()
+        self._lines = 0
+        # Appends and pops of a deque are atomic, so `record` takes no lock
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        # Serialises writers; never taken on the event loop
+        self._flush_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._fold()
+        return len(self._counts)
+
+    def load(self) -> None:
+        """Read the counts written by earlier processes; unreadable lines are skipped"""
+        if self.path is None or not self.path.exists():
+            return
+        counts: Counter = Counter()
+        lines = 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = orjson.loads(line)
+                        counts[(entry["c"], entry["q"])] += int(entry["n"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            logger.warning(f"Could not read query log {self.path}: {e}")
+            return
+        with self._lock:
+            counts.update(self._counts)
+            self._counts = counts
+            self._lines = lines
+            self._prune()
+
+    def record(self, collection: str, query: str) -> None:
+        """Count one search for `query` on `collection`"""
+        query = normalize_query(query)
+        if not query:
+            return
+        self._buffer.append((collection, query))
+        if len(self._buffer) >= MAX_BUFFERED:
+            self._fold()
+
+    def _fold(self) -> None:
+        """Move the buffered searches into the counts"""
+        searches = Counter(self._buffer.popleft() for _ in range(len(self._buffer)))
+        if not searches:
+            return
+        with self._lock:
+            self._counts.update(searches)
+            self._pending.update(searches)
+            if len(self._counts) > self.max_queries * 1.1:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Forget the rarest queries beyond `max_queries`; called with the lock held"""
+        if len(self._counts) <= self.max_queries:
+            return
+        self._counts = Counter(dict(self._counts.most_common(self.max_queries)))
+        self._pending = Counter({key: count for key, count in self._pending.items() if key in self._counts})
+
+    def top(self, collection: str, n: int) -> List[str]:
+        """The `n` most frequent queries of `collection`, most frequent first"""
+        self._fold()
+        with self._lock:
+            ranked = [(count, query) for (name, query), count in self._counts.items() if name == collection]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [query for _, query in ranked[:n]]
+
+    def flush(self) -> None:
+        """Fold the buffered searches and append the counts recorded since the last flush.
+
+        The file is compacted when it has grown; the disk is written without
+        holding the counts' lock. Blocking: call it from a worker thread.
+        """
+        self._fold()
+        if self.path is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                if not pending:
+                    return
+                compact = self._lines + len(pending) > COMPACT_RATIO * max(len(self._counts), 1000)
+                entries = list(self._counts.items()) if compact else list(pending.items())
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._write(entries, mode="wb" if compact else "ab")
+            except OSError as e:
+                # Keep the counts for the next attempt
+                with self._lock:
+                    self._pending.update(pending)
+                logger.warning(f"Could not write query log {self.path}: {e}")
+                return
+            with self._lock:
+                self._lines = len(entries) if compact else self._lines + len(entries)
+
+    def _write(self, entries, mode: str) -> None:
+        data = b"".join(
+            orjson.dumps({"c": collection, "q": query, "n": count}) + b"\n"
+            for (collection, query), count in entries
+        )
+        if mode == "ab":
+            with open(self.path, "ab") as f:
+                f.write(data)
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+# Global query log instance
+_query_log: Optional[QueryLog] = None
+_flush_task: Optional[asyncio.Task] = None
+
+def get_query_log() -> QueryLog:
+    """Get or create the global query log, loading earlier counts"""
+    global _query_log
+    if _query_log is None:
+        config = get_config().query_log
+        _query_log = QueryLog(config.path, config.max_queries)
+        _query_log.load()
+    return _query_log
+
+def start_query_log_flusher(config: QueryLogConfig) -> None:
+    """Fold and flush the global query log every `flush_seconds` in a worker thread"""
+    global _flush_task
+    if _flush_task is not None or config.flush_seconds <= 0:
+        return
+    query_log = get_query_log()
+
+    async def flush_periodically():
+        while True:
+            await asyncio.sleep(config.flush_seconds)
+            await asyncio.to_thread(query_log.flush)
+
+    _flush_task = asyncio.create_task(flush_periodically())
+
+async def close_query_log() -> None:
+    """Stop the flusher and write the remaining counts"""
+    global _query_log, _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    if _query_log is not None:
+        await asyncio.to_thread(_query_log.flush)
+        _query_log = None
+
+async def warm_up(service: "SearchService", config: QueryLogConfig, query_log: Optional[QueryLog] = None) -> int:
+    """Pre-embed (and with `warmup_search` pre-search) the top queries of the service's collection"""
+    query_log = query_log or get_query_log()
+    limit = min(config.warmup_top_n, service.query_cache.max_entries) if service.query_cache.max_entries else 0
+    queries = await asyncio.to_thread(query_log.top, service.config.vector_db.collection, limit)
+    if not queries:
+        return 0
+    return await service.warm_queries(queries, batch_size=config.warmup_batch_size, search=config.warmup_search)
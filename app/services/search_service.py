@@ -3,14 +3,29 @@ Search service using provider pattern
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+from dataclasses import replace
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple
 
 from ..core.config import AppConfig, get_config
-from ..core.exceptions import SearchError, ProviderError
-from ..providers.base import VectorDBProvider, EmbeddingProvider, SearchResult, Document
-from ..providers.vector_db.qdrant import QdrantProvider
-from ..providers.embedding.ollama import OllamaProvider
+from ..core.exceptions import SearchError, ProviderError, ConfigurationError, EmbeddingDimensionMismatchError
+from ..providers.base import (
+    VectorDBProvider, EmbeddingProvider, MultiVectorProvider, SearchResult, Document, MetadataFilter,
+    OWNERS_KEY, DEDUP_BANDS_KEY
+)
+from ..core.metrics import DEDUP_CHUNKS, SEARCH_GROUPING_LATENCY
+from ..core.startup import startup_state
+from ..core.tracing import start_span
+from .dedup import Deduplicator
+from .pagination import FileSearchPage, PageCursor, decode_cursor, encode_cursor, query_fingerprint
+from .query_cache import QueryEmbeddingCache
+from .query_log import normalize_query
+from .snippets import make_snippet
+
+# Candidate slices fetched for one page before returning a short page with a cursor,
+# so a query dominated by a few files can't scan the whole collection
+MAX_PAGE_FETCHES = 4
+# Slack below a page boundary when asking the database for chunks at or above it
+BOUNDARY_MARGIN = 1e-6
 
 class SearchService:
     """Search service that orchestrates vector DB and embedding providers"""
@@ -19,37 +34,175 @@ class SearchService:
         self.config = config or get_config()
         self.vector_db: Optional[VectorDBProvider] = None
         self.embedding: Optional[EmbeddingProvider] = None
+        # Late-interaction encoder; set when multivector.enabled
+        self.multivector: Optional[MultiVectorProvider] = None
+        # Whether the collection stores token vectors, so dense hits can be rescored
+        self.rescoring = False
         self._initialized = False
+        # False for per-tenant services that borrow another service's providers
+        self._owns_providers = True
+        # Shadow collections being built -> file_ids deleted while they were built
+        self._shadow_collections: Dict[str, Set[str]] = {}
+        self.query_cache = QueryEmbeddingCache(self.config.embedding.query_cache_size)
+        self.rescore_cache = QueryEmbeddingCache(self.config.embedding.query_cache_size, name="query_multivector")
+        # Folds near-duplicate chunks into one stored chunk at ingest; set when dedup.enabled
+        self.deduplicator = Deduplicator(self.config.dedup) if self.config.dedup.enabled else None
+        # Held while dedup decides which chunks to store and writes owner lists, so concurrent
+        # batches and deletes never overwrite each other's owners
+        self._owners_lock = asyncio.Lock()
     
     async def initialize(self) -> None:
         """Initialize the search service with providers"""
         try:
-            # Initialize vector DB provider
-            self.vector_db = self._create_vector_db_provider()
-            await self.vector_db.initialize()
-            
-            # Initialize embedding provider
-            self.embedding = self._create_embedding_provider()
-            await self.embedding.initialize()
-            
-            # Ensure collection exists
-            dimension = self.embedding.get_dimension()
-            await self.vector_db.create_collection(
-                self.config.vector_db.collection, 
-                dimension
+            # Provider modules import heavy clients, so create them off the event loop,
+            # then connect to the vector DB and the embedding servers concurrently
+            self.vector_db, self.embedding = await asyncio.gather(
+                asyncio.to_thread(self._create_vector_db_provider),
+                asyncio.to_thread(self._create_embedding_provider)
             )
+            initializations = [
+                startup_state.timed("vector_db", self.vector_db.initialize()),
+                startup_state.timed("embedding", self.embedding.initialize())
+            ]
+            if self.config.multivector.enabled:
+                self.multivector = await asyncio.to_thread(self._create_multivector_provider)
+                initializations.append(startup_state.timed("multivector", self.multivector.initialize()))
+            await asyncio.gather(*initializations)
+            
+            await startup_state.timed("collection", self.prepare_collection())
             
             self._initialized = True
             
+        except ConfigurationError:
+            raise
         except Exception as e:
             raise SearchError(f"Failed to initialize search service: {e}")
     
+    async def prepare_collection(self) -> None:
+        """Ensure the collection (or its alias) exists and fits the embedding model"""
+        dimension = self.embedding.get_dimension()
+        multivector_size = self.multivector.get_dimension() if self.multivector else 0
+        await self.vector_db.ensure_collection(self.config.vector_db.collection, dimension, multivector_size)
+        await self._check_dimension(dimension)
+        if self.multivector:
+            await self._check_multivectors(multivector_size)
+        if self.config.dedup.enabled:
+            await self._check_sharding()
+    
+    async def for_collection(self, collection: str) -> "SearchService":
+        """A ready service over another collection that shares this service's providers.
+        
+        It has its own query cache and shadow builds; closing it leaves the
+        providers open.
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        config = replace(self.config, vector_db=replace(self.config.vector_db, collection=collection))
+        service = SearchService(config)
+        service.vector_db = self.vector_db
+        service.embedding = self.embedding
+        service.multivector = self.multivector
+        service._owns_providers = False
+        await service.prepare_collection()
+        service._initialized = True
+        return service
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Embedding of the normalized query, served from this service's cache when possible"""
+        query = normalize_query(query)
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = await self.embedding.embed_text(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    async def rescore_query(self, query: str) -> Optional[List[List[float]]]:
+        """Query token vectors when results are rescored, else None"""
+        if not self.rescoring:
+            return None
+        query = normalize_query(query)
+        vectors = self.rescore_cache.get(query)
+        if vectors is None:
+            vectors = await self.multivector.embed_query(query)
+            self.rescore_cache.put(query, vectors)
+        return vectors
+    
+    async def warm_queries(self, queries: List[str], batch_size: int = 32, search: bool = False) -> int:
+        """Embed the queries missing from the cache in batches; returns how many were embedded.
+        
+        With `search` the first result page of each query is fetched as well,
+        which pulls its part of the collection into the vector DB's page cache.
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        queries = list(dict.fromkeys(normalize_query(query) for query in queries))
+        missing = [query for query in queries if query not in self.query_cache]
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            embeddings = await self.embedding.embed_texts(batch)
+            for query, embedding in zip(batch, embeddings):
+                self.query_cache.put(query, embedding)
+            for query in batch:
+                await self.rescore_query(query)
+        
+        if search:
+            for query in queries:
+                await self.search_files_page(query)
+        return len(missing)
+    
+    async def _check_multivectors(self, size: int) -> None:
+        """Rescore only collections built with matching token vectors; others stay dense-only"""
+        collection = self.config.vector_db.collection
+        stored = await self.vector_db.get_multivector_size(collection)
+        self.rescoring = stored == size
+        if stored is None:
+            print(
+                f"Collection {collection} has no token vectors; searches are not rescored until it is "
+                f"rebuilt with tools/backfill.py"
+            )
+        elif stored != size:
+            raise EmbeddingDimensionMismatchError(
+                f"Collection {collection} stores {stored}-dimensional token vectors but "
+                f"{self.config.multivector.model} produces {size}"
+            )
+    
+    async def _check_sharding(self) -> None:
+        """Refuse dedup on a collection with custom shard keys, whatever the config says"""
+        collection = self.config.vector_db.collection
+        if await self.vector_db._shard_keys(collection):
+            # A shared chunk lives in one file's shard, so other owners' filtered searches would miss it
+            raise ConfigurationError(
+                f"Collection {collection} uses custom shard keys, which dedup cannot be combined with; "
+                f"rebuild it with shard_keys=0 or disable dedup"
+            )
+    
+    async def _check_dimension(self, dimension: int) -> None:
+        """Refuse to start against a collection built with a different embedding model"""
+        collection = self.config.vector_db.collection
+        vector_size = await self.vector_db.get_vector_size(collection)
+        if vector_size is not None and vector_size != dimension:
+            model = self.embedding.get_model_info().get("model")
+            raise EmbeddingDimensionMismatchError(
+                f"Collection {collection} stores {vector_size}-dimensional vectors but embedding model "
+                f"{model} produces {dimension}; rebuild the collection or switch back to the model it was built with"
+            )
+    
     def _create_vector_db_provider(self) -> VectorDBProvider:
         """Create vector DB provider based on config"""
         provider_name = self.config.vector_db.provider.lower()
         
         if provider_name == "qdrant":
-            return QdrantProvider(self.config.vector_db)
+            # Imported here: qdrant_client takes most of the application's import time
+            from ..providers.vector_db.qdrant import QdrantProvider
+            vector_db_config = self.config.vector_db
+            if self.deduplicator:
+                # Candidate lookups and owner filters must not scan the collection
+                vector_db_config = replace(vector_db_config, payload_indexes={
+                    OWNERS_KEY: "keyword", DEDUP_BANDS_KEY: "keyword", **vector_db_config.payload_indexes
+                })
+            return QdrantProvider(vector_db_config)
         else:
             raise ProviderError(f"Unsupported vector DB provider: {provider_name}")
     
@@ -58,10 +211,21 @@ class SearchService:
         provider_name = self.config.embedding.provider.lower()
         
         if provider_name == "ollama":
+            from ..providers.embedding.ollama import OllamaProvider
             return OllamaProvider(self.config.embedding)
         else:
             raise ProviderError(f"Unsupported embedding provider: {provider_name}")
     
+    def _create_multivector_provider(self) -> MultiVectorProvider:
+        """Create multi-vector provider based on config"""
+        provider_name = self.config.multivector.provider.lower()
+        
+        if provider_name == "bge_m3":
+            from ..providers.multivector.bge_m3 import BGEM3MultiVectorProvider
+            return BGEM3MultiVectorProvider(self.config.multivector)
+        else:
+            raise ProviderError(f"Unsupported multi-vector provider: {provider_name}")
+    
     async def health_check(self) -> Dict[str, bool]:
         """Check health of all providers"""
         health = {}
@@ -84,101 +248,315 @@ class SearchService:
         
         return health
     
-    async def index_documents(self, documents: List[Document]) -> None:
-        """Index documents into the vector database"""
+    async def index_documents(
+        self,
+        documents: List[Document],
+        progress: Optional[Callable[[str, int], None]] = None
+    ) -> None:
+        """Index documents into the vector database.
+        
+        `progress` is called as progress("embedded", n) and progress("upserted", n).
+        With dedup enabled, near-duplicates of stored chunks are not embedded or
+        stored; their files are added to the owners of the stored chunk.
+        """
         if not self._initialized:
             await self.initialize()
         
         try:
-            # Generate embeddings for all documents
-            texts = [doc.content for doc in documents]
-            embeddings = await self.embedding.embed_texts(texts)
-            
-            # Upsert into vector database
-            await self.vector_db.upsert_documents(
-                self.config.vector_db.collection,
-                documents,
-                embeddings
-            )
+            if self.deduplicator:
+                await self._index_deduplicated(documents, progress)
+                return
+            embeddings, multivectors = await self._embed_documents(documents)
+            if progress:
+                progress("embedded", len(embeddings))
+            await self._upsert(documents, embeddings, multivectors)
+            if progress:
+                progress("upserted", len(documents))
             
         except Exception as e:
             raise SearchError(f"Failed to index documents: {e}")
     
-    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
-        """Search for documents similar to the query"""
+    async def _embed_documents(
+        self,
+        documents: List[Document]
+    ) -> Tuple[List[List[float]], Optional[List[List[List[float]]]]]:
+        """Dense embeddings (and token vectors when rescoring) of the documents"""
+        if not documents:
+            return [], [] if self.rescoring else None
+        texts = [doc.content for doc in documents]
+        embeddings = await self.embedding.embed_texts(texts)
+        # Reject the whole batch if the model changed under us, rather than failing mid-upsert
+        dimension = self.embedding.get_dimension()
+        if any(len(embedding) != dimension for embedding in embeddings):
+            raise EmbeddingDimensionMismatchError(
+                f"Embedding model returned vectors that are not {dimension}-dimensional"
+            )
+        multivectors = None
+        if self.rescoring:
+            multivectors = await self.multivector.embed_documents(texts)
+        return embeddings, multivectors
+    
+    async def _upsert(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        multivectors: Optional[List[List[List[float]]]]
+    ) -> None:
+        if not documents:
+            return
+        await self.vector_db.upsert_documents(self.config.vector_db.collection, documents, embeddings, multivectors)
+        # Dual-write while a shadow collection is built, so the swap loses nothing
+        for shadow in list(self._shadow_collections):
+            await self.vector_db.upsert_documents(shadow, documents, embeddings, multivectors)
+    
+    async def _index_deduplicated(
+        self,
+        documents: List[Document],
+        progress: Optional[Callable[[str, int], None]] = None
+    ) -> None:
+        """Embed the chunks that look unique, then store them and update owners under the owners lock.
+        
+        Batches indexed concurrently may store or claim the same canonical chunks
+        while this one is embedding, so which chunks to store is decided again
+        under the lock; the rare chunk that became unique meanwhile is embedded there.
+        """
+        collection = self.config.vector_db.collection
+        batch_size = len(documents)
+        provisional = await self.deduplicator.split(self.vector_db, collection, documents)
+        embeddings, multivectors = await self._embed_documents(provisional.documents)
+        encoded = {
+            (doc.file_id, doc.content): (embedding, multivectors[i] if multivectors is not None else None)
+            for i, (doc, embedding) in enumerate(zip(provisional.documents, embeddings))
+        }
+        if progress:
+            progress("embedded", batch_size)
+        
+        async with self._owners_lock:
+            dedup = await self.deduplicator.split(self.vector_db, collection, documents)
+            near_duplicates = dedup.duplicates
+            missing = [doc for doc in dedup.documents if (doc.file_id, doc.content) not in encoded]
+            if missing:
+                embeddings, multivectors = await self._embed_documents(missing)
+                for i, (doc, embedding) in enumerate(zip(missing, embeddings)):
+                    encoded[(doc.file_id, doc.content)] = (embedding, multivectors[i] if multivectors is not None else None)
+            
+            documents = dedup.documents
+            if documents and self.config.dedup.embedding_threshold > 0:
+                kept = await self.deduplicator.split_by_embedding(
+                    self.vector_db, collection, dedup,
+                    [encoded[(doc.file_id, doc.content)][0] for doc in documents]
+                )
+                documents = [documents[i] for i in kept]
+            vectors = [encoded[(doc.file_id, doc.content)] for doc in documents]
+            await self._upsert(
+                documents,
+                [embedding for embedding, _ in vectors],
+                [token_vectors for _, token_vectors in vectors] if self.rescoring else None
+            )
+            owners = {point: {OWNERS_KEY: files} for point, files in dedup.owners.items()}
+            for target in [collection, *self._shadow_collections]:
+                await self.vector_db.update_payloads(target, owners)
+        
+        DEDUP_CHUNKS.inc(len(documents), result="unique")
+        if near_duplicates:
+            DEDUP_CHUNKS.inc(near_duplicates, result="near_duplicate")
+        if dedup.duplicates > near_duplicates:
+            DEDUP_CHUNKS.inc(dedup.duplicates - near_duplicates, result="embedding_duplicate")
+        if progress:
+            progress("upserted", batch_size)
+    
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None,
+        with_content: bool = True,
+        offset: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[SearchResult]:
+        """Search for documents similar to the query that match all `filters`"""
         if not self._initialized:
             await self.initialize()
         
         try:
-            # Generate embedding for query
-            query_embedding = await self.embedding.embed_text(query)
-            
-            # Search in vector database
-            results = await self.vector_db.search(
-                self.config.vector_db.collection,
-                query_embedding,
-                limit
-            )
+            with start_span("search.search", {"search.limit": limit, "search.offset": offset}) as span:
+                # Generate embedding for query
+                query_embedding = await self.embed_query(query)
+                
+                # Search in vector database
+                results = await self.vector_db.search(
+                    self.config.vector_db.collection,
+                    query_embedding,
+                    limit,
+                    filters=filters,
+                    with_content=with_content,
+                    offset=offset,
+                    score_threshold=score_threshold,
+                    rescore_query=await self.rescore_query(query),
+                    rescore_candidates=self.config.multivector.candidates
+                )
+                span.set_attribute("search.result_count", len(results))
             
             return results
             
         except Exception as e:
             raise SearchError(f"Failed to search documents: {e}")
     
-    async def search_by_file_id(self, query: str, k: int = 50, top_files: int = 5) -> List[Dict[str, Any]]:
+    async def search_by_file_id(
+        self,
+        query: str,
+        k: int = 50,
+        top_files: int = 5,
+        filters: Optional[List[MetadataFilter]] = None,
+        snippet_length: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """Search and group results by file_id, similar to original implementation"""
+        page = await self.search_files_page(
+            query, top_files=top_files, k=k, filters=filters,
+            snippet_length=snippet_length, score_threshold=score_threshold
+        )
+        return page.results
+    
+    async def search_files_page(
+        self,
+        query: str,
+        top_files: int = 5,
+        k: int = 50,
+        filters: Optional[List[MetadataFilter]] = None,
+        snippet_length: int = 0,
+        cursor: Optional[str] = None,
+        score_threshold: Optional[float] = None
+    ) -> FileSearchPage:
+        """One page of up to `top_files` files ranked by their best chunk.
+        
+        Candidates are fetched `k` at a time without payload, continuing at the
+        cursor's offset, and content is loaded only for the best chunk of each
+        returned file. With `snippet_length` the content is replaced by a
+        query-highlighted window of about that many characters. Raises
+        ValidationError for a cursor that is malformed or from another query.
+        """
+        fingerprint = query_fingerprint(query, filters or [], score_threshold)
+        state = decode_cursor(cursor, fingerprint) if cursor else PageCursor()
+        if not self._initialized:
+            await self.initialize()
+        
         try:
-            # Get search results
-            raw_results = await self.search(query, k)
+            query_embedding = await self.embed_query(query)
+            rescore_query = await self.rescore_query(query)
+            seen: Set[str] = set()
+            winners: List[SearchResult] = []
+            offset = state.offset
+            exhausted = False
             
-            # Group by file_id and get best score for each
-            file_scores = defaultdict(lambda: {"score": 0.0, "content": ""})
+            async def search_page(page_offset: int, limit: int, page_filters, threshold):
+                return await self.vector_db.search(
+                    self.config.vector_db.collection,
+                    query_embedding,
+                    limit,
+                    filters=page_filters,
+                    with_content=False,
+                    offset=page_offset,
+                    score_threshold=threshold,
+                    rescore_query=rescore_query,
+                    rescore_candidates=self.config.multivector.candidates
+                )
             
-            for result in raw_results:
-                file_id = result.file_id
-                if result.score > file_scores[file_id]["score"]:
-                    file_scores[file_id] = {
-                        "score": result.score,
-                        "content": result.content
-                    }
+            for _ in range(MAX_PAGE_FETCHES):
+                hits = await search_page(offset, k, filters, score_threshold)
+                
+                # Files met here for the first time below the boundary may still have a
+                # better chunk above it, i.e. have been returned already: their chunks at
+                # or above the boundary all ranked before the cursor's offset
+                fresh = {hit.file_id for hit in hits if hit.file_id not in seen}
+                if state.score is not None and fresh:
+                    above = await search_page(
+                        0,
+                        state.offset + k,
+                        [*(filters or []), MetadataFilter(key="file_id", any_of=sorted(fresh))],
+                        # The database compares in float32; the exact comparison happens below
+                        state.score - BOUNDARY_MARGIN
+                    )
+                    seen.update(hit.file_id for hit in above if state.returned(hit.file_id, hit.score))
+                
+                with SEARCH_GROUPING_LATENCY.time(), start_span("search.group_by_file", {"search.hits": len(hits)}):
+                    # Hits are ranked, so the first hit of a file is its best; later hits of
+                    # the file and hits above the previous page's last score are skipped
+                    for hit in hits:
+                        offset += 1
+                        if hit.file_id in seen or (state.score is not None and hit.score > state.score):
+                            continue
+                        seen.add(hit.file_id)
+                        winners.append(hit)
+                        if len(winners) == top_files:
+                            break
+                
+                if len(winners) == top_files:
+                    break
+                if len(hits) < k:
+                    exhausted = True
+                    break
             
-            # Sort by score and take top files
-            sorted_files = sorted(
-                file_scores.items(),
-                key=lambda x: x[1]["score"],
-                reverse=True
-            )[:top_files]
+            # Load content for the winners only
+            documents = await self.vector_db.retrieve(
+                self.config.vector_db.collection,
+                [hit.id for hit in winners]
+            )
+            contents = {document.id: document.content for document in documents}
             
             # Format results
             results = []
-            for file_id, data in sorted_files:
-                results.append({
-                    "file_id": file_id,
-                    "score": data["score"],
-                    "content": data["content"]
-                })
+            for hit in winners:
+                content = contents.get(hit.id, "")
+                item = {"file_id": hit.file_id, "score": hit.score, "content": content}
+                if snippet_length > 0:
+                    snippet = make_snippet(content, query, snippet_length)
+                    item["content"] = snippet.text
+                    item["highlights"] = snippet.highlights
+                results.append(item)
             
-            return results
+            next_cursor = None
+            if not exhausted:
+                boundary = winners[-1].score if winners else state.score
+                ties = state.ties if boundary == state.score else []
+                next_cursor = encode_cursor(PageCursor(
+                    offset=offset,
+                    score=boundary,
+                    ties=ties + [hit.file_id for hit in winners if hit.score == boundary]
+                ), fingerprint)
+            return FileSearchPage(results=results, next_cursor=next_cursor)
             
         except Exception as e:
             raise SearchError(f"Failed to search by file_id: {e}")
     
-    async def search_with_file_filter(self, query: str, file_ids: List[str], limit: int = 10) -> List[SearchResult]:
+    async def search_with_file_filter(
+        self,
+        query: str,
+        file_ids: List[str],
+        limit: int = 10,
+        filters: Optional[List[MetadataFilter]] = None
+    ) -> List[SearchResult]:
         """Search for documents similar to the query within specified files"""
         if not self._initialized:
             await self.initialize()
         
         try:
-            # Generate embedding for query
-            query_embedding = await self.embedding.embed_text(query)
-            
-            # Search in vector database with file filter
-            results = await self.vector_db.search_with_filter(
-                self.config.vector_db.collection,
-                query_embedding,
-                file_ids,
-                limit
-            )
+            span_attributes = {"search.limit": limit, "search.file_count": len(file_ids)}
+            with start_span("search.search_with_file_filter", span_attributes) as span:
+                # Generate embedding for query
+                query_embedding = await self.embed_query(query)
+                
+                # Search in vector database with file filter
+                results = await self.vector_db.search_with_filter(
+                    self.config.vector_db.collection,
+                    query_embedding,
+                    file_ids,
+                    limit,
+                    filters=filters,
+                    rescore_query=await self.rescore_query(query),
+                    rescore_candidates=self.config.multivector.candidates
+                )
+                span.set_attribute("search.result_count", len(results))
             
             return results
             
@@ -191,13 +569,36 @@ class SearchService:
             await self.initialize()
         
         try:
-            await self.vector_db.delete_documents(
-                self.config.vector_db.collection,
-                file_ids
-            )
+            if not self.deduplicator:
+                await self._delete(file_ids)
+                return
+            async with self._owners_lock:
+                # Shared chunks move to their remaining owners instead of being deleted
+                for target in [self.config.vector_db.collection, *self._shadow_collections]:
+                    handover = await self.deduplicator.release(self.vector_db, target, file_ids)
+                    await self.vector_db.update_payloads(target, handover)
+                await self._delete(file_ids)
         except Exception as e:
             raise SearchError(f"Failed to delete documents: {e}")
     
+    async def _delete(self, file_ids: List[str]) -> None:
+        await self.vector_db.delete_documents(self.config.vector_db.collection, file_ids)
+        for shadow, deleted in list(self._shadow_collections.items()):
+            await self.vector_db.delete_documents(shadow, file_ids)
+            deleted.update(file_ids)
+    
+    def add_shadow_collection(self, collection_name: str) -> None:
+        """Mirror writes into `collection_name` until it is removed"""
+        self._shadow_collections.setdefault(collection_name, set())
+    
+    def shadow_deletes(self, collection_name: str) -> Set[str]:
+        """file_ids deleted while `collection_name` was mirrored"""
+        return set(self._shadow_collections.get(collection_name, ()))
+    
+    def remove_shadow_collection(self, collection_name: str) -> None:
+        """Stop mirroring writes into `collection_name`"""
+        self._shadow_collections.pop(collection_name, None)
+    
     async def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection"""
         if not self._initialized:
@@ -212,16 +613,38 @@ class SearchService:
     
     async def close(self) -> None:
         """Close all connections"""
+        if not self._owns_providers:
+            return
         if hasattr(self.embedding, 'close'):
             await self.embedding.close()
+        if hasattr(self.multivector, 'close'):
+            await self.multivector.close()
+        if hasattr(self.vector_db, 'close'):
+            await self.vector_db.close()
 
 # Global search service instance
 _search_service: Optional[SearchService] = None
+_search_service_lock = asyncio.Lock()
 
 async def get_search_service() -> SearchService:
     """Get or create global search service instance"""
     global _search_service
     if _search_service is None:
-        _search_service = SearchService()
-        await _search_service.initialize()
+        # Requests arriving during startup wait for the same initialization
+        async with _search_service_lock:
+            if _search_service is None:
+                service = SearchService()
+                try:
+                    await service.initialize()
+                except Exception:
+                    await service.close()
+                    raise
+                _search_service = service
     return _search_service
+
+async def close_search_service() -> None:
+    """Close the global search service if it was created"""
+    global _search_service
+    if _search_service is not None:
+        await _search_service.close()
+        _search_service = None
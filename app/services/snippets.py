@@ -0,0 +1,90 @@
+"""
+Query-highlighted snippets for search results.
+Instead of cutting content at a fixed length (v1 `_truncate_content`), pick the
+window that covers the most distinct query terms, snap it to word boundaries
+and report where the terms occur so clients can highlight them.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+ELLIPSIS = "…"
+# Upper bound on term matches considered when choosing a window
+MAX_MATCHES = 500
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+@dataclass
+class Snippet:
+    text: str
+    # (start, end) character offsets of query terms within `text`
+    highlights: List[Tuple[int, int]] = field(default_factory=list)
+
+def query_terms(query: str) -> List[str]:
+    """Distinct lowercase query words, longest first so longer terms win overlaps"""
+    terms = {word.lower() for word in _WORD.findall(query) if len(word) > 1 or word.isdigit()}
+    return sorted(terms, key=len, reverse=True)
+
+def _find_matches(content: str, terms: List[str]) -> List[Tuple[int, int, str]]:
+    if not terms:
+        return []
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE | re.UNICODE)
+    matches = []
+    for match in pattern.finditer(content):
+        matches.append((match.start(), match.end(), match.group(0).lower()))
+        if len(matches) >= MAX_MATCHES:
+            break
+    return matches
+
+def _best_window(matches: List[Tuple[int, int, str]], max_chars: int) -> int:
+    """Start offset of the window covering the most distinct terms (then the most matches)"""
+    best_start, best_key = matches[0][0], (0, 0)
+    end_index = 0
+    for index, (start, _, _) in enumerate(matches):
+        # Two-pointer scan: matches[index:end_index] fit in [start, start + max_chars)
+        end_index = max(end_index, index)
+        while end_index < len(matches) and matches[end_index][1] <= start + max_chars:
+            end_index += 1
+        window = matches[index:end_index]
+        key = (len({term for _, _, term in window}), len(window))
+        if key > best_key:
+            best_start, best_key = start, key
+    return best_start
+
+def make_snippet(content: str, query: str, max_chars: int = 240) -> Snippet:
+    """Window of about `max_chars` characters around the densest query-term region"""
+    content = " ".join(content.split())
+    terms = query_terms(query)
+    matches = _find_matches(content, terms)
+
+    if len(content) <= max_chars:
+        start, end = 0, len(content)
+    elif not matches:
+        start, end = 0, max_chars
+    else:
+        first = _best_window(matches, max_chars)
+        # Lead in with a little context before the first term
+        start = max(0, first - max_chars // 6)
+        end = min(len(content), start + max_chars)
+        start = max(0, end - max_chars)
+
+    # Snap to word boundaries
+    if start > 0:
+        space = content.find(" ", start)
+        if space != -1 and space < end:
+            start = space + 1
+    if end < len(content):
+        space = content.rfind(" ", start, end)
+        if space > start:
+            end = space
+
+    prefix = ELLIPSIS if start > 0 else ""
+    suffix = ELLIPSIS if end < len(content) else ""
+    offset = len(prefix) - start
+    highlights = [
+        (match_start + offset, match_end + offset)
+        for match_start, match_end, _ in matches
+        if match_start >= start and match_end <= end
+    ]
+    return Snippet(text=prefix + content[start:end] + suffix, highlights=highlights)
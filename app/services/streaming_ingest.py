@@ -0,0 +1,161 @@
+"""
+Streaming NDJSON ingest.
+Documents are parsed line by line from the request body and indexed in fixed
+size batches, so memory stays bounded by one batch whatever the upload size.
+While a batch is being embedded no more of the body is read, which pushes back
+on the client through TCP flow control.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+
+from ..providers.base import Document
+from .indexing_jobs import IndexJob
+from .search_service import SearchService
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 1024 * 1024
+MAX_LINE_ERRORS = 1000
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[bytes]]:
+    """Split a byte stream into lines; yields None for a line over `max_line_bytes`"""
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        # Drop the rest of this line instead of buffering it
+                        oversized = True
+                        buffer.clear()
+                break
+            if oversized:
+                yield None
+            else:
+                buffer += chunk[start:newline]
+                yield bytes(buffer) if len(buffer) <= max_line_bytes else None
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+    if oversized:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+@dataclass
+class LineError:
+    line: int
+    error: str
+    end_line: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"line": self.line, "end_line": self.end_line, "error": self.error}
+
+@dataclass
+class StreamIngestResult:
+    """Summary of a streaming upload"""
+    job: IndexJob
+    lines: int = 0
+    rejected_lines: int = 0
+    errors: List[LineError] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job.job_id,
+            "status": self.job.status,
+            "lines": self.lines,
+            "rejected_lines": self.rejected_lines,
+            "documents": self.job.total_chunks,
+            "embedded": self.job.embedded,
+            "indexed": self.job.upserted,
+            "failed": self.job.failed,
+            "errors": [error.to_dict() for error in self.errors],
+            "errors_truncated": self.errors_truncated
+        }
+
+def parse_document(line: bytes) -> Document:
+    """Parse one NDJSON line into a Document, raising ValueError if it is invalid"""
+    data = orjson.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("line is not a JSON object")
+    content = data.get("content")
+    file_id = data.get("file_id")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("'content' must be a non-empty string")
+    if not isinstance(file_id, str) or not file_id:
+        raise ValueError("'file_id' must be a non-empty string")
+    metadata = data.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        raise ValueError("'metadata' must be an object")
+    return Document(content=content, file_id=file_id, metadata=metadata)
+
+class StreamIngestor:
+    """Feeds parsed lines into batched embedding and upsert"""
+
+    def __init__(self, search_service: SearchService, job: IndexJob, batch_size: int = 32):
+        self.search_service = search_service
+        self.batch_size = max(1, batch_size)
+        self.result = StreamIngestResult(job=job)
+        self._batch: List[Tuple[int, Document]] = []
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> StreamIngestResult:
+        job = self.result.job
+        async for line in iter_lines(chunks):
+            self.result.lines += 1
+            number = self.result.lines
+            if line is None:
+                self._line_error(number, f"line longer than {MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                document = parse_document(line)
+            except ValueError as e:
+                self._line_error(number, str(e))
+                continue
+
+            job.total_chunks += 1
+            self._batch.append((number, document))
+            if len(self._batch) >= self.batch_size:
+                await self._flush()
+
+        await self._flush()
+        job.finish(rejected=self.result.rejected_lines)
+        logger.info(
+            f"Streaming ingest {job.job_id}: {self.result.lines} lines, "
+            f"{job.upserted} indexed, {job.failed} failed"
+        )
+        return self.result
+
+    async def _flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            await self.search_service.index_documents(
+                [document for _, document in batch],
+                progress=self.result.job.record
+            )
+        except Exception as e:
+            self.result.job.fail(len(batch), e)
+            self._add_error(LineError(line=batch[0][0], end_line=batch[-1][0], error=str(e)))
+
+    def _line_error(self, number: int, message: str) -> None:
+        # Invalid lines are not documents, so they count as errors but not as failed chunks
+        self.result.rejected_lines += 1
+        self._add_error(LineError(line=number, error=message))
+
+    def _add_error(self, error: LineError) -> None:
+        if len(self.result.errors) < MAX_LINE_ERRORS:
+            self.result.errors.append(error)
+        else:
+            self.result.errors_truncated = True
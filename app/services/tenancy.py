@@ -0,0 +1,122 @@
+"""
+Tenant routing for one deployment serving several business units.
+A tenant is named by a request header and served from its own collection
+(`<collection>__<tenant>` unless mapped explicitly), so a large tenant's HNSW
+graph never slows another tenant's searches. Tenants share the provider
+clients but each gets its own search service (query embedding cache, shadow
+builds), chat session store and admission quota.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from ..core.admission import AdmissionLimiter, track_limiter
+from ..core.config import TENANT_ID_PATTERN, AdmissionConfig, TenancyConfig, get_config
+from ..core.exceptions import TenantNotFoundError, ValidationError
+from .search_service import SearchService
+
+class TenantRegistry:
+    """Resolves tenant ids and holds each tenant's search service and request quota"""
+
+    def __init__(self, config: TenancyConfig, admission: Optional[AdmissionConfig] = None):
+        self.config = config
+        self.admission = admission or AdmissionConfig()
+        self._services: Dict[str, SearchService] = {}
+        self._limiters: Dict[str, AdmissionLimiter] = {}
+        self._known = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def resolve(self, tenant_id: Optional[str]) -> str:
+        """Tenant for a header value; raises ValidationError or TenantNotFoundError"""
+        tenant = (tenant_id or "").strip() or self.config.default_tenant
+        if not TENANT_ID_PATTERN.match(tenant):
+            raise ValidationError(f"Invalid tenant id: {tenant!r}")
+        if tenant in self._known or tenant == self.config.default_tenant:
+            return tenant
+
+        if tenant not in self.config.tenants:
+            if not self.config.allow_unlisted:
+                raise TenantNotFoundError(f"Unknown tenant {tenant}")
+            if len(self._known) >= self.config.max_tenants:
+                # Bound the collections and limiters clients can create with made-up ids
+                raise TenantNotFoundError(f"Tenant limit of {self.config.max_tenants} reached; {tenant} is not served")
+        self._known.add(tenant)
+        return tenant
+
+    def collection_for(self, tenant: str, base_collection: str) -> str:
+        """Collection that holds `tenant`'s documents"""
+        mapped = self.config.tenants.get(tenant)
+        if mapped:
+            return mapped
+        if tenant == self.config.default_tenant:
+            return base_collection
+        # Double underscore keeps tenant collections apart from `<collection>_vN` versions
+        return f"{base_collection}__{tenant}"
+
+    async def search_service(self, tenant: str, base: SearchService) -> SearchService:
+        """Search service of `tenant`, sharing `base`'s providers; created on first use"""
+        collection = self.collection_for(tenant, base.config.vector_db.collection)
+        if collection == base.config.vector_db.collection:
+            return base
+
+        service = self._services.get(tenant)
+        if service is None:
+            async with self._lock:
+                service = self._services.get(tenant)
+                if service is None:
+                    service = await base.for_collection(collection)
+                    self._services[tenant] = service
+        return service
+
+    def services(self) -> List[SearchService]:
+        """Search services of the tenants served so far"""
+        return list(self._services.values())
+
+    def limiter(self, tenant_id: Optional[str]) -> Optional[AdmissionLimiter]:
+        """Quota of the tenant named by a header value, None if it is not a valid tenant"""
+        try:
+            tenant = self.resolve(tenant_id)
+        except (ValidationError, TenantNotFoundError):
+            # Rejected with a proper error once the route resolves the tenant
+            return None
+
+        limiter = self._limiters.get(tenant)
+        if limiter is None:
+            limiter = AdmissionLimiter(
+                f"tenant:{tenant}",
+                self.config.concurrency,
+                self.config.queue,
+                self.admission.queue_timeout_seconds,
+                self.admission.retry_after_seconds
+            )
+            self._limiters[tenant] = limiter
+            track_limiter(limiter)
+        return limiter
+
+    async def close(self) -> None:
+        """Drop tenant services; the shared providers are closed with the base service"""
+        for service in self._services.values():
+            await service.close()
+        self._services.clear()
+
+# Global tenant registry instance
+_tenant_registry: Optional[TenantRegistry] = None
+
+def get_tenant_registry() -> TenantRegistry:
+    """Get or create global tenant registry"""
+    global _tenant_registry
+    if _tenant_registry is None:
+        config = get_config()
+        _tenant_registry = TenantRegistry(config.tenancy, config.admission)
+    return _tenant_registry
+
+async def close_tenant_registry() -> None:
+    """Close tenant services"""
+    global _tenant_registry
+    if _tenant_registry is not None:
+        await _tenant_registry.close()
+        _tenant_registry = None
@@ -0,0 +1,3 @@
+"""
+Load and latency benchmarks run against deterministic fake backends
+"""
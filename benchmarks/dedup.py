@@ -0,0 +1,184 @@
+"""
+Ingest dedup benchmark: storage and search-time savings of folding near-duplicate
+chunks (boilerplate) into one stored chunk shared by every file containing it.
+
+Runs offline on the synthetic corpus with in-memory Qdrant. Every file also gets
+`--boilerplate-per-file` chunks drawn from a few templates (disclaimers,
+footers) with `--edits` words changed per copy, the way headers differ by a date
+or a name between documents:
+
+    python -m benchmarks.dedup --files 300 --boilerplate-per-file 3 --output dedup.json
+    python -m benchmarks.dedup --url http://localhost:6333
+
+Reported per run: chunks embedded and points stored, dense vector bytes
+(float32), indexing time, file search quality and latency, and the share of raw
+top-k hits that are boilerplate, which is the noise dedup removes from candidate
+lists. Local Qdrant ignores payload indexes, so there each batch's candidate
+lookup scans the collection and `index_seconds` overstates the cost of dedup;
+use `--url` for indexing times.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from app.core.config import AppConfig, DedupConfig, VectorDBConfig
+from app.providers.base import Document
+from app.services.search_service import SearchService
+
+from .load_test import percentile
+from .multivector import FLOAT_BYTES, HashedTokenEncoder, MeanPoolEmbedding
+from .retrieval_quality import LabelledQuery, reciprocal_rank, recall_at_k
+from .synthetic_corpus import FILLER, generate_corpus
+
+TEMPLATE_WORDS = 40
+
+def boilerplate_templates(count: int, rng: random.Random) -> List[List[str]]:
+    """Fixed texts repeated across files, e.g. a confidentiality notice"""
+    return [[f"notice{index}"] + [rng.choice(FILLER) for _ in range(TEMPLATE_WORDS - 1)] for index in range(count)]
+
+def with_boilerplate(
+    documents: List[Document],
+    per_file: int,
+    templates: int,
+    edits: int,
+    seed: int = 0
+) -> List[Document]:
+    """The corpus plus `per_file` edited template copies per file"""
+    rng = random.Random(seed)
+    texts = boilerplate_templates(templates, rng)
+    result = list(documents)
+    for file_id in sorted({document.file_id for document in documents}):
+        for template in rng.sample(texts, min(per_file, templates)):
+            words = list(template)
+            for _ in range(edits):
+                words[rng.randrange(1, len(words))] = rng.choice(FILLER) + str(rng.randrange(100))
+            result.append(Document(content=" ".join(words), file_id=file_id, metadata={"boilerplate": True}))
+    return result
+
+class CountingEmbedding(MeanPoolEmbedding):
+    """Mean-pooled embeddings that count the chunks embedded"""
+
+    def __init__(self, encoder: HashedTokenEncoder):
+        super().__init__(encoder)
+        self.embedded = 0
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return await super().embed_texts(texts)
+
+async def build_service(
+    encoder: HashedTokenEncoder,
+    documents: List[Document],
+    dedup: DedupConfig,
+    batch_size: int,
+    url: str = "",
+    collection: str = "bench"
+) -> Dict[str, Any]:
+    config = AppConfig(vector_db=VectorDBConfig(url=url or ":memory:", collection=collection), dedup=dedup)
+    config.embedding.query_cache_size = 0
+    service = SearchService(config)
+    service.vector_db = service._create_vector_db_provider()
+    service.embedding = CountingEmbedding(encoder)
+    await service.vector_db.initialize()
+    await service.prepare_collection()
+    service._initialized = True
+
+    started = time.perf_counter()
+    for start in range(0, len(documents), batch_size):
+        await service.index_documents(documents[start:start + batch_size])
+    index_seconds = time.perf_counter() - started
+    points = await service.vector_db.count_points(collection)
+    return {
+        "service": service,
+        "storage": {
+            "chunks": len(documents),
+            "embedded": service.embedding.embedded,
+            "points": points,
+            "vector_bytes": points * encoder.dimension * FLOAT_BYTES,
+            "index_seconds": round(index_seconds, 3)
+        }
+    }
+
+async def evaluate(service: SearchService, queries: List[LabelledQuery], k: int, top_files: int) -> Dict[str, Any]:
+    reciprocal_ranks, recalls, latencies, boilerplate = [], [], [], []
+    for labelled in queries:
+        started = time.perf_counter()
+        results = await service.search_by_file_id(labelled.query, k=k, top_files=top_files)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ranked = [result["file_id"] for result in results]
+        reciprocal_ranks.append(reciprocal_rank(ranked, labelled.relevant))
+        recalls.append(recall_at_k(ranked, labelled.relevant, top_files))
+        hits = await service.search(labelled.query, limit=k)
+        boilerplate.append(sum(1 for hit in hits if hit.metadata.get("boilerplate")) / max(len(hits), 1))
+    latencies.sort()
+    return {
+        "mrr": round(sum(reciprocal_ranks) / len(queries), 4),
+        f"recall@{top_files}": round(sum(recalls) / len(queries), 4),
+        f"boilerplate_share@{k}": round(sum(boilerplate) / len(queries), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3)
+    }
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = generate_corpus(files=args.files, chunks_per_file=args.chunks_per_file, queries=args.queries, seed=args.seed)
+    documents = [Document(content=row["content"], file_id=row["file_id"], metadata=row["metadata"]) for row in corpus.documents]
+    documents = with_boilerplate(documents, args.boilerplate_per_file, args.templates, args.edits, args.seed)
+    random.Random(args.seed).shuffle(documents)
+    queries = [LabelledQuery(query=row["query"], relevant=set(row["relevant"])) for row in corpus.queries]
+    encoder = HashedTokenEncoder(args.dimension, args.seed)
+
+    report: Dict[str, Any] = {"k": args.k, "top_files": args.top_files, "runs": {}}
+    runs = {
+        "off": DedupConfig(enabled=False),
+        "minhash": DedupConfig(enabled=True, threshold=args.threshold)
+    }
+    if args.embedding_threshold > 0:
+        runs["minhash+embedding"] = DedupConfig(
+            enabled=True, threshold=args.threshold, embedding_threshold=args.embedding_threshold
+        )
+    for name, dedup in runs.items():
+        collection = f"bench_dedup_{name.replace('+', '_')}"
+        built = await build_service(encoder, documents, dedup, args.batch_size, args.url, collection)
+        service = built["service"]
+        report["runs"][name] = {**built["storage"], **await evaluate(service, queries, args.k, args.top_files)}
+        if args.url:
+            await service.vector_db.delete_collection(await service.vector_db.resolve_collection(collection))
+        await service.close()
+
+    baseline = report["runs"]["off"]
+    for name, result in report["runs"].items():
+        result["storage_saved"] = round(1 - result["vector_bytes"] / baseline["vector_bytes"], 4)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest near-duplicate detection benchmark")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--chunks-per-file", type=int, default=4)
+    parser.add_argument("--boilerplate-per-file", type=int, default=3)
+    parser.add_argument("--templates", type=int, default=5, help="Distinct boilerplate texts")
+    parser.add_argument("--edits", type=int, default=1, help="Words changed in each boilerplate copy")
+    parser.add_argument("--url", default="", help="Qdrant server URL; in-memory Qdrant when empty")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Shingle Jaccard threshold")
+    parser.add_argument("--embedding-threshold", type=float, default=0.0, help="Also run with embedding dedup (0 skips)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per index_documents call")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--top-files", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Deterministic stand-in for the Ollama HTTP API used by the benchmarks.
+
+Serves /api/tags, /api/embeddings and /api/generate with configurable latency.
+Embeddings are deterministic unit vectors: in "random" mode they are seeded from
+the text, in "hashed" mode they are hashed bag-of-words vectors, so texts that
+share words are close and retrieval quality can be measured offline.
+
+Run standalone:
+    python -m benchmarks.fake_ollama --port 11500 --embed-latency 0.01
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import re
+from typing import List, Sequence
+
+from aiohttp import web
+
+DEFAULT_MODELS = ("bge-m3", "qwen2.5:1.5b")
+EMBEDDING_MODES = ("random", "hashed")
+
+class FakeOllama:
+    """Fake Ollama server with fixed latencies and seeded vectors"""
+
+    def __init__(
+        self,
+        models: Sequence[str] = DEFAULT_MODELS,
+        dimension: int = 1024,
+        embed_latency: float = 0.01,
+        generate_latency: float = 0.2,
+        jitter: float = 0.0,
+        seed: int = 0,
+        embedding_mode: str = "random"
+    ):
+        if embedding_mode not in EMBEDDING_MODES:
+            raise ValueError(f"Unknown embedding mode: {embedding_mode}")
+        self.models = list(models)
+        self.dimension = dimension
+        self.embed_latency = embed_latency
+        self.generate_latency = generate_latency
+        self.jitter = jitter
+        self.seed = seed
+        self.embedding_mode = embedding_mode
+        self._rng = random.Random(seed)
+        self._runner = None
+        self.requests = 0
+
+    def vector(self, text: str) -> List[float]:
+        """Unit vector derived from the text and the seed"""
+        if self.embedding_mode == "hashed":
+            values = self._hashed_vector(text)
+        else:
+            digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).digest()
+            rng = random.Random(int.from_bytes(digest[:8], "big"))
+            values = [rng.gauss(0.0, 1.0) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(value * value for value in values)) or 1.0
+        return [value / norm for value in values]
+
+    def _hashed_vector(self, text: str) -> List[float]:
+        """Signed feature hashing of lowercased words"""
+        values = [0.0] * self.dimension
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(f"{self.seed}:{word}".encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "big") % self.dimension
+            values[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return values
+
+    async def _delay(self, base: float) -> None:
+        if base <= 0:
+            return
+        spread = base * self.jitter
+        await asyncio.sleep(max(0.0, base + self._rng.uniform(-spread, spread)))
+
+    async def _tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": name} for name in self.models]})
+
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        payload = await request.json()
+        await self._delay(self.embed_latency)
+        return web.json_response({"embedding": self.vector(payload.get("prompt", ""))})
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        payload = await request.json()
+        prompt = payload.get("prompt", "")
+        state = payload.get("context") or []
+        prompt_tokens = len(prompt.split())
+        await self._delay(self.generate_latency)
+
+        answer = "Câu trả lời giả lập cho benchmark." if prompt else ""
+        eval_count = len(answer.split())
+        latency_ns = int(self.generate_latency * 1e9)
+        return web.json_response({
+            "model": payload.get("model", ""),
+            "response": answer,
+            "done": True,
+            "context": state + list(range(prompt_tokens + eval_count)),
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": eval_count,
+            "load_duration": 0,
+            "prompt_eval_duration": latency_ns // 2,
+            "eval_duration": latency_ns // 2,
+            "total_duration": latency_ns
+        })
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/tags", self._tags)
+        app.router.add_post("/api/embeddings", self._embeddings)
+        app.router.add_post("/api/generate", self._generate)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = FakeOllama(
+        dimension=args.dimension,
+        embed_latency=args.embed_latency,
+        generate_latency=args.generate_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+        embedding_mode=args.embedding_mode
+    )
+    url = await server.start(args.host, args.port)
+    print(f"Fake Ollama listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Seconds per embedding call")
+    parser.add_argument("--generate-latency", type=float, default=0.2, help="Seconds per generate call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative latency jitter, e.g. 0.2 for +/-20%%")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedding-mode", choices=EMBEDDING_MODES, default="random")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Microbenchmark of decoding Qdrant hits into SearchResult objects.
+
+Compares the previous per-hit decoding (mutable dataclass plus a filtered
+metadata dict comprehension for every hit) with the shared `_decode_hit` path
+(slotted results over a lazy payload view), reporting allocations and
+retained bytes per 1k hits as measured by tracemalloc, and CPU time:
+
+    python -m benchmarks.hit_decoding --hits 1000 --metadata-keys 6
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from qdrant_client.http import models
+
+from app.providers.vector_db.qdrant import _decode_hit
+
+from .load_test import VOCABULARY
+
+@dataclass
+class LegacySearchResult:
+    """SearchResult as it was before it became slotted"""
+    file_id: str
+    score: float
+    content: str
+    metadata: Dict[str, Any] = None
+    id: Optional[str] = None
+
+    def __post_init__(self):
+        if self.metadata is None:
+            self.metadata = {}
+
+def legacy_decode(hits: List[models.ScoredPoint]) -> List[LegacySearchResult]:
+    results = []
+    for hit in hits:
+        payload = hit.payload
+        file_id = payload.get("file_id") or payload.get("fileID", "")
+        content = payload.get("page_content") or payload.get("content") or payload.get("text") or payload.get("Content", "")
+        results.append(LegacySearchResult(
+            file_id=file_id,
+            score=hit.score,
+            content=content,
+            metadata={k: v for k, v in payload.items() if k not in ["file_id", "fileID", "page_content", "content", "text", "Content"]},
+            id=str(hit.id)
+        ))
+    return results
+
+def shared_decode(hits: List[models.ScoredPoint]) -> List[Any]:
+    return [_decode_hit(hit) for hit in hits]
+
+def build_hits(count: int, metadata_keys: int, words: int, seed: int = 0) -> List[models.ScoredPoint]:
+    rng = random.Random(seed)
+    hits = []
+    for index in range(count):
+        payload = {
+            "file_id": f"doc_{index % 200:05d}",
+            "content": " ".join(rng.choice(VOCABULARY) for _ in range(words)),
+        }
+        payload.update({f"meta_{key}": rng.randint(0, 1000) for key in range(metadata_keys)})
+        hits.append(models.ScoredPoint(id=f"00000000-0000-5000-8000-{index:012d}", version=0, score=rng.random(), payload=payload))
+    return hits
+
+def measure_allocations(decode: Callable[[List[Any]], List[Any]], hits: List[Any]) -> Dict[str, float]:
+    """Allocated blocks and bytes still held by the decoded results"""
+    decode(hits)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = decode(hits)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del results
+    return {"blocks": blocks, "bytes": size}
+
+def cpu_time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    hits = build_hits(args.hits, args.metadata_keys, args.words, args.seed)
+    legacy = legacy_decode(hits)
+    shared = shared_decode(hits)
+    assert [(r.file_id, r.score, r.content, r.metadata, r.id) for r in legacy] == \
+        [(r.file_id, r.score, r.content, dict(r.metadata), r.id) for r in shared], "decoders disagree"
+
+    per_1k = 1000 / len(hits)
+    report = {"hits": len(hits), "metadata_keys": args.metadata_keys, "decoders": {}}
+    for name, decode in (("legacy", legacy_decode), ("shared", shared_decode)):
+        allocations = measure_allocations(decode, hits)
+        seconds = cpu_time_per_call(lambda: decode(hits), args.iterations)
+        report["decoders"][name] = {
+            "blocks_per_1k_hits": round(allocations["blocks"] * per_1k),
+            "bytes_per_1k_hits": round(allocations["bytes"] * per_1k),
+            "us_per_1k_hits": round(seconds * 1e6 * per_1k, 1)
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit decoding allocation microbenchmark")
+    parser.add_argument("--hits", type=int, default=1000)
+    parser.add_argument("--metadata-keys", type=int, default=6, help="Metadata fields per payload")
+    parser.add_argument("--words", type=int, default=120, help="Words per chunk")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run(args)
+    for name, stats in report["decoders"].items():
+        print(
+            f"{name:>6}: {stats['blocks_per_1k_hits']} allocations, {stats['bytes_per_1k_hits']} bytes, "
+            f"{stats['us_per_1k_hits']}us per 1k hits"
+        )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Load test for the Document Search API against deterministic local backends.
+
+Starts a fake Ollama server (see `fake_ollama.py`) and the API in a subprocess
+with Qdrant in `:memory:` mode, seeds a synthetic corpus, then drives the
+search, index and chat endpoints at each concurrency level. Indexing runs as a
+background job, so an index request is timed until its job has finished, not
+just until the job is accepted. Throughput, latency percentiles and error rates
+are written as JSON so runs on different commits can be compared:
+
+    python -m benchmarks.load_test --output before.json
+    git checkout my-branch
+    python -m benchmarks.load_test --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from .fake_ollama import FakeOllama
+
+ROOT = Path(__file__).resolve().parent.parent
+# Seconds between polls of an index job; small next to the embedding latency
+JOB_POLL_INTERVAL = 0.005
+
+VOCABULARY = (
+    "tài liệu hợp đồng báo cáo tài chính nhân sự kế hoạch dự án ngân sách quy trình "
+    "chính sách khách hàng doanh thu chi phí kiểm toán bảo mật hệ thống dữ liệu "
+    "contract invoice report budget project policy security customer revenue audit "
+    "network storage backup deployment review meeting schedule training compliance"
+).split()
+
+@dataclass
+class ScenarioResult:
+    """Latency and error statistics for one scenario at one concurrency level"""
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration_seconds: float
+    latencies: List[float] = field(default_factory=list, repr=False)
+    error_samples: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "throughput_rps": round(self.requests / self.duration_seconds, 2) if self.duration_seconds else 0.0,
+            "latency_ms": {
+                "mean": round(1000 * sum(ordered) / len(ordered), 2) if ordered else 0.0,
+                "p50": round(1000 * percentile(ordered, 50), 2),
+                "p95": round(1000 * percentile(ordered, 95), 2),
+                "p99": round(1000 * percentile(ordered, 99), 2),
+                "max": round(1000 * ordered[-1], 2) if ordered else 0.0
+            },
+            "error_samples": self.error_samples
+        }
+
+def percentile(ordered: Sequence[float], pct: float) -> float:
+    """Linearly interpolated percentile of already sorted values"""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class Workload:
+    """Seeded request generator for each endpoint"""
+
+    def __init__(self, seed: int = 0, index_batch: int = 8):
+        self.rng = random.Random(seed)
+        self.index_batch = index_batch
+        self.file_ids: List[str] = []
+        self._next_doc = 0
+
+    def _sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(VOCABULARY) for _ in range(words))
+
+    def documents(self, count: int) -> List[Dict[str, Any]]:
+        docs = []
+        for _ in range(count):
+            file_id = f"bench_{self._next_doc // 4:05d}"
+            self._next_doc += 1
+            if file_id not in self.file_ids:
+                self.file_ids.append(file_id)
+            docs.append({
+                "file_id": file_id,
+                "content": self._sentence(self.rng.randint(40, 120)),
+                "metadata": {"source": "benchmark"}
+            })
+        return docs
+
+    def request(self, scenario: str) -> Tuple[str, str, Dict[str, Any]]:
+        if scenario == "search":
+            return "POST", "/search-files", {"query": self._sentence(self.rng.randint(3, 8))}
+        if scenario == "index":
+            return "POST", "/index-documents", {"documents": self.documents(self.index_batch)}
+        if scenario == "chat":
+            file_ids = self.rng.sample(self.file_ids, min(3, len(self.file_ids)))
+            return "POST", "/chat-with-files", {
+                "file_ids": file_ids,
+                "message": self._sentence(self.rng.randint(5, 12)),
+                "max_chunks": 5
+            }
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+async def wait_for_job(session: aiohttp.ClientSession, base_url: str, job_id: str) -> Dict[str, Any]:
+    """Poll /jobs/{job_id} until the job has finished and return its final status"""
+    while True:
+        async with session.get(f"{base_url}/jobs/{job_id}") as response:
+            job = await response.json()
+        if job["status"] in ("completed", "completed_with_errors", "failed"):
+            return job
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+async def run_scenario(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    total_requests: int,
+    make_request: Callable[[str], Tuple[str, str, Dict[str, Any]]]
+) -> ScenarioResult:
+    """Send `total_requests` requests with `concurrency` workers in flight"""
+    # Build payloads up front so generating them doesn't count as latency
+    requests = [make_request(scenario) for _ in range(total_requests)]
+    queue = iter(requests)
+    latencies: List[float] = []
+    error_samples: List[str] = []
+    errors = 0
+
+    def record_error(message: str) -> None:
+        nonlocal errors
+        errors += 1
+        if len(error_samples) < 5:
+            error_samples.append(message[:300])
+
+    async def worker():
+        for method, path, payload in queue:
+            started = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, json=payload) as response:
+                    body = await response.read()
+                    if response.status >= 400:
+                        record_error(f"{response.status} {body.decode('utf-8', 'replace')}")
+                    elif response.status == 202:
+                        # Time accepted index jobs to completion, as before indexing moved to the background
+                        job = await wait_for_job(session, base_url, json.loads(body)["job_id"])
+                        if job["status"] != "completed":
+                            record_error(f"job {job['status']}: {job['errors']}")
+            except aiohttp.ClientError as e:
+                record_error(f"{type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    return ScenarioResult(scenario, concurrency, total_requests, errors, duration, latencies, error_samples)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def _write_app_config(directory: Path, ollama_url: str, args: argparse.Namespace) -> Path:
+    config = {
+        "vector_db": {"provider": "qdrant", "url": ":memory:", "collection": "benchmark"},
+        "embedding": {"provider": "ollama", "model": "bge-m3", "base_url": ollama_url, "dimensions": args.dimension},
+        "chat": {
+            "provider": "ollama",
+            "model": "qwen2.5:1.5b",
+            "base_url": ollama_url,
+            "tokenizer": args.tokenizer,
+            "warmup": False
+        },
+        "api": {"log_level": "WARNING"},
+        "environment": "benchmark"
+    }
+    path = directory / "benchmark_config.json"
+    path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+    return path
+
+def _app_env(config_path: Path, ollama_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "CONFIG_PATH": str(config_path),
+        # Keep synthetic queries out of the repo's query log, which warms the next dev server
+        "QUERY_LOG_PATH": str(config_path.parent / "query_log.jsonl"),
+        "QDRANT_URL": ":memory:",
+        "QDRANT_API_KEY": "",
+        "OLLAMA_BASE_URL": ollama_url,
+        "CHAT_BASE_URL": ollama_url,
+        "CHAT_WARMUP": "false",
+        "PYTHONHASHSEED": "0"
+    })
+    for name in ("OLLAMA_BASE_URLS", "CHAT_BASE_URLS", "TRACING_ENABLED"):
+        env.pop(name, None)
+    return env
+
+async def _wait_ready(session: aiohttp.ClientSession, base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API process exited with code {process.returncode}")
+        try:
+            async with session.get(base_url + "/") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API did not become ready within {timeout} seconds")
+
+async def _seed_corpus(session: aiohttp.ClientSession, base_url: str, workload: Workload, size: int) -> None:
+    """Index the corpus that search and chat run against and wait for the jobs to finish"""
+    job_ids = []
+    remaining = size
+    while remaining > 0:
+        batch = workload.documents(min(remaining, 100))
+        async with session.post(base_url + "/index-documents", json={"documents": batch}) as response:
+            if response.status != 202:
+                raise RuntimeError(f"Seeding corpus failed: {response.status} {await response.text()}")
+            job_ids.append((await response.json())["job_id"])
+        remaining -= len(batch)
+
+    for job_id in job_ids:
+        job = await wait_for_job(session, base_url, job_id)
+        if job["status"] != "completed":
+            raise RuntimeError(f"Seeding corpus failed: {job['errors']}")
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    fake = FakeOllama(
+        dimension=args.dimension,
+        embed_latency=args.embed_latency,
+        generate_latency=args.generate_latency,
+        jitter=args.jitter,
+        seed=args.seed
+    )
+    ollama_url = await fake.start()
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    workload = Workload(seed=args.seed, index_batch=args.index_batch)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = _write_app_config(Path(tmp), ollama_url, args)
+        log_path = Path(tmp) / "api.log"
+        with open(log_path, "w", encoding="utf-8") as log_file:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app",
+                 "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+                cwd=ROOT, env=_app_env(config_path, ollama_url), stdout=log_file, stderr=subprocess.STDOUT
+            )
+            results: List[ScenarioResult] = []
+            connector = aiohttp.TCPConnector(limit=0)
+            timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+            try:
+                async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                    await _wait_ready(session, base_url, process, args.startup_timeout)
+
+                    await _seed_corpus(session, base_url, workload, args.corpus_size)
+
+                    for scenario in args.scenarios:
+                        # Warm up connections and lazy initialisation outside the measurement
+                        await run_scenario(session, base_url, scenario, 1, args.warmup_requests, workload.request)
+                        for concurrency in args.concurrency:
+                            result = await run_scenario(
+                                session, base_url, scenario, concurrency, args.requests, workload.request
+                            )
+                            results.append(result)
+                            summary = result.to_dict()
+                            print(
+                                f"{scenario:>7} c={concurrency:<4} {summary['throughput_rps']:>8.1f} req/s  "
+                                f"p50={summary['latency_ms']['p50']:.1f}ms p95={summary['latency_ms']['p95']:.1f}ms "
+                                f"p99={summary['latency_ms']['p99']:.1f}ms errors={summary['errors']}"
+                            )
+            except Exception:
+                log_file.flush()
+                print(log_path.read_text(encoding="utf-8")[-4000:], file=sys.stderr)
+                raise
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                await fake.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "seed": args.seed,
+                "corpus_size": args.corpus_size,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "index_batch": args.index_batch,
+                "dimension": args.dimension,
+                "embed_latency": args.embed_latency,
+                "generate_latency": args.generate_latency,
+                "jitter": args.jitter
+            }
+        },
+        "results": [result.to_dict() for result in results]
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Per scenario and concurrency changes against a baseline report"""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    lines = [f"{'scenario':>8} {'conc':>5} {'rps':>16} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18}"]
+
+    def change(new: float, old: float) -> str:
+        if not old:
+            return f"{new:.1f}"
+        return f"{new:.1f} ({(new - old) / old:+.0%})"
+
+    for result in current["results"]:
+        old = previous.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        lines.append(
+            f"{result['scenario']:>8} {result['concurrency']:>5} "
+            f"{change(result['throughput_rps'], old['throughput_rps']):>16} "
+            + " ".join(
+                f"{change(result['latency_ms'][key], old['latency_ms'][key]):>18}" for key in ("p50", "p95", "p99")
+            )
+        )
+    return lines
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the Document Search API with fake backends")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=["search", "index", "chat"],
+                        help="Comma separated scenarios: search, index, chat")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32], help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--warmup-requests", type=int, default=5)
+    parser.add_argument("--corpus-size", type=int, default=500, help="Chunks indexed before measuring")
+    parser.add_argument("--index-batch", type=int, default=8, help="Chunks per request in the index scenario")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--embed-latency", type=float, default=0.005)
+    parser.add_argument("--generate-latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tokenizer", default="", help="Chat tokenizer (empty uses the offline approximation)")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print("\n".join(compare(report, baseline)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Multi-vector rescoring benchmark: retrieval quality, latency and storage of
+dense-only search against dense candidates rescored by late-interaction MaxSim.
+
+Runs offline on the synthetic corpus with in-memory Qdrant. Token vectors are
+seeded per word, and the dense vector of a text is the normalised mean of its
+token vectors, so dense search blurs every word of a chunk together while MaxSim
+matches query words one by one, which is the gap BGE-M3's ColBERT head closes:
+
+    python -m benchmarks.multivector --candidates 20,50,100 --output multivector.json
+
+Storage is computed from the stored vectors (float32), and projected to BGE-M3's
+1024-dimensional vectors so the overhead of enabling it can be sized.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+from app.core.config import AppConfig, MultiVectorConfig, VectorDBConfig
+from app.providers.base import Document, MultiVectorProvider
+from app.providers.vector_db.qdrant import QdrantProvider
+from app.services.search_service import SearchService
+
+from .load_test import _int_list, percentile
+from .retrieval_quality import LabelledQuery, reciprocal_rank, recall_at_k
+from .synthetic_corpus import generate_corpus
+
+BGE_M3_DIMENSION = 1024
+FLOAT_BYTES = 4
+
+class HashedTokenEncoder(MultiVectorProvider):
+    """Deterministic token vectors: one seeded unit vector per lowercased word"""
+
+    def __init__(self, dimension: int = 128, seed: int = 0):
+        self.dimension = dimension
+        self.seed = seed
+        self._vectors: Dict[str, List[float]] = {}
+
+    def token_vector(self, word: str) -> List[float]:
+        vector = self._vectors.get(word)
+        if vector is None:
+            digest = hashlib.blake2b(f"{self.seed}:{word}".encode("utf-8"), digest_size=8).digest()
+            rng = random.Random(int.from_bytes(digest, "big"))
+            values = [rng.gauss(0.0, 1.0) for _ in range(self.dimension)]
+            norm = math.sqrt(sum(value * value for value in values))
+            vector = self._vectors[word] = [value / norm for value in values]
+        return vector
+
+    def encode(self, text: str) -> List[List[float]]:
+        return [self.token_vector(word) for word in re.findall(r"\w+", text.lower())] or [self.token_vector("")]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def embed_documents(self, texts: List[str]) -> List[List[List[float]]]:
+        return [self.encode(text) for text in texts]
+
+    async def embed_query(self, text: str) -> List[List[float]]:
+        return self.encode(text)
+
+    def get_dimension(self) -> int:
+        return self.dimension
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {"provider": "hashed_tokens", "dimensions": self.dimension}
+
+class MeanPoolEmbedding:
+    """Dense embedding provider: the normalised mean of the encoder's token vectors"""
+
+    def __init__(self, encoder: HashedTokenEncoder):
+        self.encoder = encoder
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for text in texts:
+            tokens = self.encoder.encode(text)
+            summed = [sum(column) for column in zip(*tokens)]
+            norm = math.sqrt(sum(value * value for value in summed)) or 1.0
+            embeddings.append([value / norm for value in summed])
+        return embeddings
+
+    async def embed_text(self, text: str) -> List[float]:
+        return (await self.embed_texts([text]))[0]
+
+    def get_dimension(self) -> int:
+        return self.encoder.dimension
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {"model": "mean_pooled_tokens"}
+
+async def build_service(
+    encoder: HashedTokenEncoder,
+    documents: List[Document],
+    rescore: bool,
+    candidates: int
+) -> SearchService:
+    config = AppConfig(
+        vector_db=VectorDBConfig(url=":memory:", collection="bench"),
+        multivector=MultiVectorConfig(enabled=rescore, candidates=candidates)
+    )
+    config.embedding.query_cache_size = 0
+    service = SearchService(config)
+    service.vector_db = QdrantProvider(config.vector_db)
+    service.embedding = MeanPoolEmbedding(encoder)
+    service.multivector = encoder if rescore else None
+    await service.vector_db.initialize()
+    await service.prepare_collection()
+    service._initialized = True
+    for start in range(0, len(documents), 256):
+        await service.index_documents(documents[start:start + 256])
+    return service
+
+async def evaluate(service: SearchService, queries: List[LabelledQuery], k: int, top_files: int) -> Dict[str, Any]:
+    reciprocal_ranks, recalls, latencies = [], [], []
+    for labelled in queries:
+        started = time.perf_counter()
+        results = await service.search_by_file_id(labelled.query, k=k, top_files=top_files)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ranked = [result["file_id"] for result in results]
+        reciprocal_ranks.append(reciprocal_rank(ranked, labelled.relevant))
+        recalls.append(recall_at_k(ranked, labelled.relevant, top_files))
+    latencies.sort()
+    return {
+        "mrr": round(sum(reciprocal_ranks) / len(queries), 4),
+        f"recall@{top_files}": round(sum(recalls) / len(queries), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3)
+    }
+
+def storage_report(encoder: HashedTokenEncoder, documents: List[Document]) -> Dict[str, Any]:
+    """Bytes of dense and token vectors per chunk, at this run's size and at BGE-M3's"""
+    tokens = sum(len(encoder.encode(document.content)) for document in documents) / len(documents)
+    dense = encoder.dimension * FLOAT_BYTES
+    return {
+        "chunks": len(documents),
+        "tokens_per_chunk": round(tokens, 1),
+        "dense_bytes_per_chunk": dense,
+        "multivector_bytes_per_chunk": round(tokens * dense),
+        "overhead_factor": round(1 + tokens, 1),
+        "bge_m3_multivector_bytes_per_chunk": round(tokens * BGE_M3_DIMENSION * FLOAT_BYTES)
+    }
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = generate_corpus(files=args.files, chunks_per_file=args.chunks_per_file, queries=args.queries, seed=args.seed)
+    documents = [Document(content=row["content"], file_id=row["file_id"], metadata=row["metadata"]) for row in corpus.documents]
+    queries = [LabelledQuery(query=row["query"], relevant=set(row["relevant"])) for row in corpus.queries]
+    encoder = HashedTokenEncoder(args.dimension, args.seed)
+
+    report: Dict[str, Any] = {"storage": storage_report(encoder, documents), "k": args.k, "top_files": args.top_files, "runs": {}}
+    dense = await build_service(encoder, documents, rescore=False, candidates=0)
+    report["runs"]["dense"] = await evaluate(dense, queries, args.k, args.top_files)
+    await dense.close()
+
+    # Each page rescores max(candidates, k) dense hits
+    for candidates in args.candidates:
+        rescored = await build_service(encoder, documents, rescore=True, candidates=candidates)
+        report["runs"][f"rescored@{candidates}"] = await evaluate(rescored, queries, args.k, args.top_files)
+        await rescored.close()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-vector rescoring benchmark")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--chunks-per-file", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dimension", type=int, default=128, help="Size of the token and dense vectors")
+    parser.add_argument("--candidates", type=_int_list, default=[20, 50, 100], help="Dense candidates rescored")
+    parser.add_argument("--k", type=int, default=20, help="Hits fetched per page by search_by_file_id")
+    parser.add_argument("--top-files", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Retrieval quality benchmark for `SearchService.search_by_file_id`.
+
+Runs labelled queries (JSON lines of {"query": ..., "relevant": [file_id, ...]})
+under each combination of search parameters and reports recall@k, MRR and
+nDCG@k next to latency. Without arguments it indexes a synthetic corpus into
+in-memory Qdrant with hashed bag-of-words embeddings, so it runs offline:
+
+    python -m benchmarks.retrieval_quality --k 10,50 --top-files 5,10
+    python -m benchmarks.retrieval_quality --corpus corpus.jsonl --queries queries.jsonl \\
+        --ollama-url http://localhost:11434 --output quality.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from app.core.config import AppConfig, EmbeddingConfig, VectorDBConfig
+from app.providers.base import Document
+from app.services.search_service import SearchService
+
+from .fake_ollama import FakeOllama
+from .load_test import _git_revision, _int_list, percentile
+from .synthetic_corpus import generate_corpus, read_jsonl
+
+@dataclass
+class LabelledQuery:
+    query: str
+    relevant: Set[str]
+
+def recall_at_k(ranked: Sequence[str], relevant: Set[str], k: int) -> float:
+    """Share of relevant files found in the top k"""
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+def reciprocal_rank(ranked: Sequence[str], relevant: Set[str]) -> float:
+    """1 / rank of the first relevant file, 0 if none was returned"""
+    for position, file_id in enumerate(ranked, start=1):
+        if file_id in relevant:
+            return 1.0 / position
+    return 0.0
+
+def ndcg_at_k(ranked: Sequence[str], relevant: Set[str], k: int) -> float:
+    """Normalised discounted cumulative gain with binary relevance"""
+    dcg = sum(1.0 / math.log2(position + 1) for position, file_id in enumerate(ranked[:k], start=1) if file_id in relevant)
+    ideal = sum(1.0 / math.log2(position + 1) for position in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+async def evaluate(
+    search_service: SearchService,
+    queries: List[LabelledQuery],
+    k: int,
+    top_files: int
+) -> Dict[str, Any]:
+    """Run every query once with the given parameters and aggregate the metrics"""
+    recalls, reciprocal_ranks, ndcgs, latencies = [], [], [], []
+    for labelled in queries:
+        started = time.perf_counter()
+        results = await search_service.search_by_file_id(labelled.query, k=k, top_files=top_files)
+        latencies.append(time.perf_counter() - started)
+
+        ranked = [result["file_id"] for result in results]
+        recalls.append(recall_at_k(ranked, labelled.relevant, top_files))
+        reciprocal_ranks.append(reciprocal_rank(ranked, labelled.relevant))
+        ndcgs.append(ndcg_at_k(ranked, labelled.relevant, top_files))
+
+    count = len(queries) or 1
+    ordered = sorted(latencies)
+    return {
+        "k": k,
+        "top_files": top_files,
+        "queries": len(queries),
+        f"recall@{top_files}": round(sum(recalls) / count, 4),
+        "mrr": round(sum(reciprocal_ranks) / count, 4),
+        f"ndcg@{top_files}": round(sum(ndcgs) / count, 4),
+        "latency_ms": {
+            "mean": round(1000 * sum(ordered) / count, 2),
+            "p50": round(1000 * percentile(ordered, 50), 2),
+            "p95": round(1000 * percentile(ordered, 95), 2)
+        }
+    }
+
+async def index_corpus(search_service: SearchService, documents: List[Dict[str, Any]], batch_size: int = 100) -> None:
+    for start in range(0, len(documents), batch_size):
+        batch = [
+            Document(content=doc["content"], file_id=doc["file_id"], metadata=doc.get("metadata", {}))
+            for doc in documents[start:start + batch_size]
+        ]
+        await search_service.index_documents(batch)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.corpus or args.queries:
+        documents = read_jsonl(Path(args.corpus)) if args.corpus else []
+        raw_queries = read_jsonl(Path(args.queries)) if args.queries else []
+    else:
+        synthetic = generate_corpus(args.files, args.chunks_per_file, args.query_count, seed=args.seed)
+        documents, raw_queries = synthetic.documents, synthetic.queries
+    queries = [LabelledQuery(row["query"], set(row["relevant"])) for row in raw_queries]
+    if not queries:
+        raise SystemExit("No labelled queries to evaluate")
+
+    fake = None
+    ollama_url = args.ollama_url
+    if not ollama_url:
+        fake = FakeOllama(dimension=args.dimension, embed_latency=0.0, embedding_mode="hashed", seed=args.seed)
+        ollama_url = await fake.start()
+
+    config = AppConfig(
+        vector_db=VectorDBConfig(url=args.qdrant_url, api_key=args.qdrant_api_key, collection=args.collection),
+        embedding=EmbeddingConfig(model=args.embedding_model, base_url=ollama_url, dimensions=args.dimension)
+    )
+    search_service = SearchService(config)
+    try:
+        await search_service.initialize()
+        if documents and not args.skip_index:
+            await index_corpus(search_service, documents)
+
+        results = []
+        for k in args.k:
+            for top_files in args.top_files:
+                summary = await evaluate(search_service, queries, k, top_files)
+                results.append(summary)
+                print(
+                    f"k={k:<4} top_files={top_files:<3} recall@{top_files}={summary[f'recall@{top_files}']:.3f} "
+                    f"mrr={summary['mrr']:.3f} ndcg@{top_files}={summary[f'ndcg@{top_files}']:.3f} "
+                    f"p50={summary['latency_ms']['p50']:.1f}ms p95={summary['latency_ms']['p95']:.1f}ms"
+                )
+    finally:
+        await search_service.close()
+        if fake is not None:
+            await fake.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "corpus": args.corpus or "synthetic",
+            "queries": args.queries or "synthetic",
+            "chunks": len(documents),
+            "embedding": args.embedding_model if args.ollama_url else "fake-hashed"
+        },
+        "results": results
+    }
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure retrieval quality of search_by_file_id")
+    parser.add_argument("--corpus", help="JSON lines of {file_id, content, metadata} to index")
+    parser.add_argument("--queries", help="JSON lines of {query, relevant: [file_id, ...]}")
+    parser.add_argument("--k", type=_int_list, default=[50], help="Comma separated chunk counts to retrieve")
+    parser.add_argument("--top-files", type=_int_list, default=[5], help="Comma separated numbers of files to return")
+    parser.add_argument("--files", type=int, default=200, help="Synthetic corpus: number of files")
+    parser.add_argument("--chunks-per-file", type=int, default=4, help="Synthetic corpus: chunks per file")
+    parser.add_argument("--query-count", type=int, default=100, help="Synthetic corpus: number of queries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-url", default="", help="Real Ollama server (default: fake hashed embeddings)")
+    parser.add_argument("--embedding-model", default="bge-m3")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--qdrant-url", default=":memory:")
+    parser.add_argument("--qdrant-api-key", default="")
+    parser.add_argument("--collection", default="retrieval_benchmark")
+    parser.add_argument("--skip-index", action="store_true", help="Query an already indexed collection")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Microbenchmark of the response serialization path.
+
+Compares per-response CPU time for a search response with 50 results (and a
+chat response with the same chunks as `source_chunks`) between FastAPI's
+default path (pydantic model -> response-model validation -> jsonable_encoder
+-> json.dumps) and the trusted path used by the routes (dict -> orjson):
+
+    python -m benchmarks.serialization --results 50 --iterations 2000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.models import ChatWithFilesResponse, FileSearchResponse
+from app.api.responses import FastJSONResponse
+
+from .load_test import VOCABULARY
+
+def build_payloads(results: int, words: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(seed)
+    chunks = [
+        {
+            "file_id": f"doc_{index:05d}",
+            "score": rng.random(),
+            "content": " ".join(rng.choice(VOCABULARY) for _ in range(words))
+        }
+        for index in range(results)
+    ]
+    return {
+        "search": {
+            "query": "báo cáo tài chính",
+            "results": [{**chunk, "highlights": None} for chunk in chunks],
+            "total_results": len(chunks),
+            "next_cursor": None
+        },
+        "chat": {
+            "response": "Dựa trên các tài liệu được cung cấp...",
+            "source_chunks": chunks,
+            "total_chunks": len(chunks),
+            "context_tokens": 2900,
+            "session_id": None,
+            "reused_tokens": None
+        }
+    }
+
+def fastapi_default(model_cls, payload: Dict[str, Any]) -> bytes:
+    """What a route returning a pydantic model costs with the stdlib JSONResponse"""
+    model = model_cls(**payload)
+    # Response-model validation of the returned object, then encoding
+    validated = model_cls.model_validate(model.model_dump())
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def trusted_fast(payload: Dict[str, Any]) -> bytes:
+    """Route returning a dict through FastJSONResponse"""
+    return FastJSONResponse(payload).body
+
+def cpu_time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    payloads = build_payloads(args.results, args.words, args.seed)
+    models = {"search": FileSearchResponse, "chat": ChatWithFilesResponse}
+    report = {"results": args.results, "iterations": args.iterations, "responses": {}}
+
+    for name, payload in payloads.items():
+        model_cls = models[name]
+        body = trusted_fast(payload)
+        assert json.loads(body) == json.loads(fastapi_default(model_cls, payload)), "serializers disagree"
+
+        before = cpu_time_per_call(lambda: fastapi_default(model_cls, payload), args.iterations)
+        after = cpu_time_per_call(lambda: trusted_fast(payload), args.iterations)
+        gzip_cost = cpu_time_per_call(
+            lambda: gzip.compress(body, compresslevel=args.gzip_level), max(1, args.iterations // 10)
+        )
+        report["responses"][name] = {
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=args.gzip_level)),
+            "before_us": round(before * 1e6, 1),
+            "after_us": round(after * 1e6, 1),
+            "speedup": round(before / after, 1) if after else None,
+            "gzip_us": round(gzip_cost * 1e6, 1)
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization microbenchmark")
+    parser.add_argument("--results", type=int, default=50, help="Results per response")
+    parser.add_argument("--words", type=int, default=120, help="Words per result content")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gzip-level", type=int, default=1)
+    args = parser.parse_args()
+
+    report = run(args)
+    for name, stats in report["responses"].items():
+        print(
+            f"{name:>6}: {stats['bytes']} bytes ({stats['gzip_bytes']} gzipped)  "
+            f"before={stats['before_us']}us after={stats['after_us']}us x{stats['speedup']}  gzip={stats['gzip_us']}us"
+        )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Sharding benchmark: filtered search and delete latency when requests are
+routed to the shard keys owning their files versus fanned out to every shard.
+
+Without `--url` it runs in-process: each shard is a separate in-memory Qdrant
+behind its own `QdrantProvider`, files are placed with `shard_key_for`, and
+"fan-out" queries every shard while "targeted" queries only the owners. With
+`--url` it runs against a real cluster (see docker/docker-compose.cluster.yml),
+comparing a collection with custom shard keys to one with automatic sharding:
+
+    python -m benchmarks.sharding --shards 3 --files 600
+    docker compose -f docker/docker-compose.cluster.yml up -d
+    python -m benchmarks.sharding --url http://localhost:6333 --shards 3 --replication-factor 2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.core.config import VectorDBConfig
+from app.providers.base import CollectionSettings, Document
+from app.providers.vector_db.qdrant import QdrantProvider, shard_key_for
+
+from .load_test import VOCABULARY, percentile
+
+DIMENSION = 64
+
+def build_corpus(files: int, chunks_per_file: int, seed: int = 0):
+    """Documents and random unit vectors, `chunks_per_file` chunks per file"""
+    rng = random.Random(seed)
+    documents, vectors = [], []
+    for file_index in range(files):
+        for chunk in range(chunks_per_file):
+            documents.append(Document(
+                content=" ".join(rng.choice(VOCABULARY) for _ in range(20)),
+                file_id=f"doc_{file_index:05d}",
+                metadata={"chunk": chunk}
+            ))
+            vector = [rng.gauss(0, 1) for _ in range(DIMENSION)]
+            norm = sum(value * value for value in vector) ** 0.5
+            vectors.append([value / norm for value in vector])
+    return documents, vectors
+
+async def measure(operation: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await operation()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3)
+    }
+
+async def run_in_process(args: argparse.Namespace) -> Dict[str, Any]:
+    """Separate in-memory stores stand in for the nodes holding each shard key"""
+    documents, vectors = build_corpus(args.files, args.chunks_per_file, args.seed)
+    shards = []
+    for _ in range(args.shards):
+        provider = QdrantProvider(VectorDBConfig(url=":memory:", collection="bench"))
+        await provider.initialize()
+        await provider.ensure_collection("bench", DIMENSION)
+        shards.append(provider)
+
+    owner = {}
+    placed: List[List[int]] = [[] for _ in shards]
+    for index, document in enumerate(documents):
+        key = shard_key_for(document.file_id, args.shards)
+        owner[document.file_id] = int(key.rsplit("_", 1)[1])
+        placed[owner[document.file_id]].append(index)
+    for shard, indexes in zip(shards, placed):
+        if indexes:
+            await shard.upsert_documents("bench", [documents[i] for i in indexes], [vectors[i] for i in indexes])
+
+    rng = random.Random(args.seed + 1)
+    file_ids = sorted(owner)
+
+    async def filtered_search(targeted: bool):
+        chosen = rng.sample(file_ids, args.files_per_query)
+        query = vectors[rng.randrange(len(vectors))]
+        targets = sorted({owner[file_id] for file_id in chosen}) if targeted else range(len(shards))
+        hits = await asyncio.gather(*(
+            shards[index].search_with_filter("bench", query, chosen, args.limit) for index in targets
+        ))
+        return sorted((hit for shard_hits in hits for hit in shard_hits), key=lambda hit: -hit.score)[:args.limit]
+
+    async def delete(targeted: bool):
+        # Deleting files that are absent still costs each shard a filtered scan
+        chosen = [f"missing_{rng.randrange(10 ** 9)}" for _ in range(args.files_per_query)]
+        targets = sorted({int(shard_key_for(file_id, args.shards).rsplit("_", 1)[1]) for file_id in chosen}) \
+            if targeted else range(len(shards))
+        await asyncio.gather(*(shards[index].delete_documents("bench", chosen) for index in targets))
+
+    report = {
+        "mode": "in_process",
+        "shards": args.shards,
+        "points": len(documents),
+        "points_per_shard": [len(indexes) for indexes in placed],
+        "files_per_query": args.files_per_query,
+        "search": {},
+        "delete": {}
+    }
+    for name, targeted in (("fan_out", False), ("targeted", True)):
+        report["search"][name] = await measure(lambda: filtered_search(targeted), args.iterations)
+        report["delete"][name] = await measure(lambda: delete(targeted), args.iterations)
+    for shard in shards:
+        await shard.close()
+    return report
+
+async def run_cluster(args: argparse.Namespace) -> Dict[str, Any]:
+    """Custom shard keys versus automatic sharding on a real Qdrant cluster"""
+    documents, vectors = build_corpus(args.files, args.chunks_per_file, args.seed)
+    file_ids = sorted({document.file_id for document in documents})
+    layouts = {
+        "automatic": CollectionSettings(
+            shard_number=args.shards,
+            replication_factor=args.replication_factor,
+            write_consistency_factor=args.write_consistency_factor
+        ),
+        "shard_keys": CollectionSettings(
+            shard_number=1,
+            replication_factor=args.replication_factor,
+            write_consistency_factor=args.write_consistency_factor,
+            shard_keys=args.shards
+        )
+    }
+    report: Dict[str, Any] = {
+        "mode": "cluster",
+        "url": args.url,
+        "shards": args.shards,
+        "replication_factor": args.replication_factor,
+        "points": len(documents),
+        "files_per_query": args.files_per_query,
+        "layouts": {}
+    }
+    for layout, settings in layouts.items():
+        provider = QdrantProvider(VectorDBConfig(url=args.url, api_key=args.api_key, collection="bench", shard_keys=settings.shard_keys))
+        await provider.initialize()
+        collection = f"bench_sharding_{layout}"
+        if await provider.collection_exists(collection):
+            await provider.delete_collection(collection)
+        await provider.create_collection(collection, DIMENSION, settings)
+
+        started = time.perf_counter()
+        for start in range(0, len(documents), 256):
+            await provider.upsert_documents(collection, documents[start:start + 256], vectors[start:start + 256])
+        upsert_seconds = time.perf_counter() - started
+
+        rng = random.Random(args.seed + 1)
+        search = await measure(
+            lambda: provider.search_with_filter(
+                collection, vectors[rng.randrange(len(vectors))], rng.sample(file_ids, args.files_per_query), args.limit
+            ),
+            args.iterations
+        )
+        delete = await measure(
+            lambda: provider.delete_documents(collection, [f"missing_{rng.randrange(10 ** 9)}" for _ in range(args.files_per_query)]),
+            args.iterations
+        )
+        report["layouts"][layout] = {"upsert_seconds": round(upsert_seconds, 3), "search": search, "delete": delete}
+        if not args.keep:
+            await provider.delete_collection(collection)
+        await provider.close()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard key routing benchmark")
+    parser.add_argument("--url", default="", help="Qdrant cluster URL; in-process stand-ins when empty")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--shards", type=int, default=3, help="Shard keys (or automatic shards)")
+    parser.add_argument("--replication-factor", type=int, default=1)
+    parser.add_argument("--write-consistency-factor", type=int, default=1)
+    parser.add_argument("--files", type=int, default=600)
+    parser.add_argument("--chunks-per-file", type=int, default=8)
+    parser.add_argument("--files-per-query", type=int, default=2, help="Files a filtered chat or delete targets")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections on the cluster")
+    parser.add_argument("--output", default="", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_cluster(args) if args.url else run_in_process(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Seeded synthetic corpus and labelled queries for offline retrieval benchmarks.
+
+Files are grouped into topics. Each file has its own keywords plus keywords
+shared with the other files of its topic, so neighbouring files compete for
+the same queries and recall is not trivially perfect.
+
+    python -m benchmarks.synthetic_corpus --files 200 --out-dir bench-data
+"""
+
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+SYLLABLES = (
+    "an", "ba", "chi", "do", "en", "fa", "gi", "ho", "ka", "lo", "mi", "na", "on",
+    "pha", "qui", "ra", "so", "tha", "un", "va", "xe", "yo", "zu", "nguy", "tru"
+)
+FILLER = (
+    "tài liệu này mô tả các nội dung chính về quy trình và kết quả trong kỳ báo cáo "
+    "the document describes the main process and results for the reporting period with notes"
+).split()
+
+@dataclass
+class SyntheticCorpus:
+    """Chunks to index and queries labelled with their relevant file ids"""
+    documents: List[Dict[str, Any]]
+    queries: List[Dict[str, Any]]
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def generate_corpus(
+    files: int = 200,
+    chunks_per_file: int = 4,
+    queries: int = 100,
+    files_per_topic: int = 5,
+    seed: int = 0
+) -> SyntheticCorpus:
+    """Generate chunks for `files` files and `queries` labelled queries"""
+    rng = random.Random(seed)
+    topics = max(1, files // files_per_topic)
+    topic_words = [[_word(rng) for _ in range(6)] for _ in range(topics)]
+
+    documents = []
+    file_words: List[Tuple[str, List[str], List[str]]] = []
+    for index in range(files):
+        file_id = f"syn_{index:05d}"
+        shared = topic_words[index % topics]
+        own = [_word(rng) for _ in range(8)]
+        file_words.append((file_id, own, shared))
+        for _ in range(chunks_per_file):
+            words = (
+                rng.sample(own, 4)
+                + rng.sample(shared, 3)
+                + [rng.choice(FILLER) for _ in range(rng.randint(8, 16))]
+            )
+            rng.shuffle(words)
+            documents.append({
+                "file_id": file_id,
+                "content": " ".join(words),
+                "metadata": {"topic": index % topics}
+            })
+
+    labelled = []
+    for _ in range(queries):
+        file_id, own, shared = rng.choice(file_words)
+        words = rng.sample(own, 2) + rng.sample(shared, 2) + [rng.choice(FILLER)]
+        rng.shuffle(words)
+        labelled.append({"query": " ".join(words), "relevant": [file_id]})
+
+    return SyntheticCorpus(documents=documents, queries=labelled)
+
+def write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+def read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic labelled retrieval corpus")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--chunks-per-file", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--files-per-topic", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="bench-data")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.files, args.chunks_per_file, args.queries, args.files_per_topic, args.seed)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_jsonl(out_dir / "corpus.jsonl", corpus.documents)
+    write_jsonl(out_dir / "queries.jsonl", corpus.queries)
+    print(f"Wrote {len(corpus.documents)} chunks and {len(corpus.queries)} queries to {out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -95,8 +95,9 @@ async def process_sqs_messages():
                         timeout=30
                     )
                     
-                    if response.status_code == 200:
-                        print(f"✅ Indexed: {file_key} -> {file_id}")
+                    if response.status_code == 202:
+                        job_id = response.json()["job_id"]
+                        print(f"✅ Queued for indexing: {file_key} -> {file_id} (job {job_id})")
                     else:
                         print(f"❌ Failed to index {file_key}: {response.text}")
                     
@@ -10,6 +10,50 @@ import sys
 # Add the app directory to the path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.core.config import AppConfig, VectorDBConfig
+from app.providers.vector_db.qdrant import QdrantProvider
+from app.services.search_service import SearchService
+
+class FakeEmbedding:
+    """Deterministic embedding provider that records every batch it embeds"""
+
+    def __init__(self, vectorize=None, dimension=2):
+        self.vectorize = vectorize or (lambda text: [1.0, float(len(text) % 7)])
+        self.dimension = dimension
+        self.batches = []
+
+    @property
+    def embedded(self):
+        return sum(len(batch) for batch in self.batches)
+
+    async def embed_texts(self, texts):
+        self.batches.append(list(texts))
+        return [self.vectorize(text) for text in texts]
+
+    async def embed_text(self, text):
+        return (await self.embed_texts([text]))[0]
+
+    def get_dimension(self):
+        return self.dimension
+
+    def get_model_info(self):
+        return {"model": "fake"}
+
+class FakeSearchService:
+    """Search service stub that records indexed batches and fails on demand"""
+
+    def __init__(self, fail_file_id=None):
+        self.batches = []
+        self.fail_file_id = fail_file_id
+
+    async def index_documents(self, documents, progress=None):
+        self.batches.append([doc.file_id for doc in documents])
+        if any(doc.file_id == self.fail_file_id for doc in documents):
+            raise RuntimeError("embedding server unavailable")
+        if progress is not None:
+            progress("embedded", len(documents))
+            progress("upserted", len(documents))
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for the test session."""
@@ -32,3 +76,25 @@ def sample_documents():
             "metadata": {"category": "ml", "priority": "medium"}
         }
     ]
+
+@pytest.fixture
+def make_search_service():
+    """Build a SearchService over in-memory Qdrant with a FakeEmbedding; callers close it"""
+    async def build(config=None, vectorize=None, dimension=2, multivector=None, prepare=True):
+        config = config or AppConfig(vector_db=VectorDBConfig(url=":memory:", collection="docs"))
+        service = SearchService(config)
+        service.vector_db = QdrantProvider(config.vector_db)
+        service.embedding = FakeEmbedding(vectorize, dimension)
+        service.multivector = multivector
+        await service.vector_db.initialize()
+        if prepare:
+            await service.prepare_collection()
+        service._initialized = True
+        return service
+
+    return build
+
+@pytest.fixture
+def make_fake_search_service():
+    """Build a FakeSearchService for code that only indexes through the service"""
+    return FakeSearchService
@@ -0,0 +1,67 @@
+"""
+Tests for per route class admission control
+"""
+
+import asyncio
+import pytest
+
+from app.api.middleware import AdmissionMiddleware
+from app.core.admission import AdmissionLimiter
+from app.core.exceptions import AdmissionRejectedError
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_beyond_queue():
+    """Test that requests past concurrency plus queue are rejected at once with 429"""
+    limiter = AdmissionLimiter("chat", concurrency=1, queue_size=1, queue_timeout=5)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.status_code == 429
+
+    limiter.release()
+    await waiter
+    assert (limiter.in_flight, limiter.waiting) == (1, 0)
+
+@pytest.mark.asyncio
+async def test_limiter_times_out_queued_requests():
+    """Test that a request waiting longer than the queue timeout gets 503"""
+    limiter = AdmissionLimiter("search", concurrency=1, queue_size=4, queue_timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(AdmissionRejectedError) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.status_code == 503
+    assert limiter.waiting == 0
+
+class _Route:
+    """Route stand-in matching every request"""
+    path = "/chat-with-files"
+
+    def matches(self, scope):
+        from starlette.routing import Match
+        return Match.FULL, {}
+
+@pytest.mark.asyncio
+async def test_middleware_returns_retry_after():
+    """Test that a saturated route class answers with Retry-After without calling the app"""
+    limiter = AdmissionLimiter("chat", concurrency=1, queue_size=0, queue_timeout=1, retry_after=3)
+    await limiter.acquire()
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope)
+
+    middleware = AdmissionMiddleware(app, routes=[_Route()], limiters={"/chat-with-files": limiter})
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware({"type": "http", "path": "/chat-with-files", "method": "POST"}, None, send)
+
+    assert not called
+    assert messages[0]["status"] == 429
+    assert (b"retry-after", b"3") in messages[0]["headers"]
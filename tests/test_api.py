@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 
 from app.main import create_app
+from app.services.search_service import get_search_service
 
 @pytest.fixture
 def client():
@@ -70,8 +71,36 @@ def test_search_files_endpoint(mock_get_service, client):
 
 def test_search_files_validation_error(client):
     """Test search files endpoint with invalid input"""
+    # Validation must not depend on the providers being reachable
+    client.app.dependency_overrides[get_search_service] = lambda: AsyncMock()
     response = client.post(
         "/search-files",
         json={"query": ""}  # Empty query should fail validation
     )
     assert response.status_code == 422
+
+def test_search_files_large_response_is_gzipped():
+    """Test that large search responses are compressed and keep their shape"""
+    from app.services.search_service import get_search_service
+    
+    from app.services.pagination import FileSearchPage
+    
+    mock_service = AsyncMock()
+    mock_service.search_files_page.return_value = FileSearchPage(results=[
+        {"file_id": f"doc_{i:03d}", "score": 0.5, "content": "nội dung tài liệu " * 20}
+        for i in range(50)
+    ])
+    app = create_app()
+    app.dependency_overrides[get_search_service] = lambda: mock_service
+    
+    response = TestClient(app).post(
+        "/search-files",
+        json={"query": "tài liệu"},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    data = response.json()
+    assert data["total_results"] == 50
+    assert data["results"][0] == {"file_id": "doc_000", "score": 0.5, "content": "nội dung tài liệu " * 20}
@@ -0,0 +1,128 @@
+"""
+Tests for the S3 backfill tool and alias switching
+"""
+
+import io
+import uuid
+
+import pytest
+
+from app.core.config import VectorDBConfig
+from app.providers.base import Document
+from app.providers.vector_db.qdrant import QdrantProvider, point_id
+from tools import backfill
+from tools.backfill import Backfill, Checkpoint, parse_object
+
+class FakeS3:
+    """list_objects_v2 paginator and get_object over an in-memory bucket"""
+
+    def __init__(self, objects, page_size=2, broken=()):
+        self.objects = objects
+        self.page_size = page_size
+        self.broken = set(broken)
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        for start in range(0, len(keys), self.page_size):
+            yield {"Contents": [{"Key": key} for key in keys[start:start + self.page_size]]}
+
+    def get_object(self, Bucket, Key):
+        if Key in self.broken:
+            raise IOError("connection reset")
+        return {"Body": io.BytesIO(self.objects[Key].encode("utf-8")), "Metadata": {}}
+
+def test_parse_object_packs_paragraphs():
+    """Test that long documents are split on paragraph boundaries"""
+    body = "\n\n".join(["a" * 40, "b" * 40, "c" * 120]).encode("utf-8")
+
+    assert parse_object(body, 0) == [body.decode()]
+    assert parse_object(body, 100) == ["a" * 40 + "\n\n" + "b" * 40, "c" * 100, "c" * 20]
+    assert parse_object(b"   ", 100) == []
+
+def test_point_id_is_stable():
+    """Test that point ids do not depend on the process hash seed"""
+    document = Document(content="same text", file_id="doc_1")
+
+    assert point_id(document) == point_id(Document(content="same text", file_id="doc_1"))
+    assert point_id(document) != point_id(Document(content="same text", file_id="doc_2"))
+    assert uuid.UUID(point_id(document)).version == 5
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(tmp_path, make_fake_search_service):
+    """Test that a rerun only retries the objects that failed"""
+    objects = {f"docs/file_{i}.txt": f"content {i}" for i in range(5)}
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json")
+    checkpoint.collection = "docs_v2"
+    search_service = make_fake_search_service()
+
+    stats = await Backfill(
+        FakeS3(objects, broken={"docs/file_3.txt"}), search_service, checkpoint,
+        bucket="bucket", prefix="docs/", download_workers=2, batch_size=2
+    ).run()
+
+    assert (stats.listed, stats.files, stats.failed) == (5, 4, 1)
+    assert sorted(file_id for batch in search_service.batches for file_id in batch) == ["file_0", "file_1", "file_2", "file_4"]
+
+    resumed = Checkpoint.load(tmp_path / "checkpoint.json")
+    assert resumed.collection == "docs_v2"
+    assert list(resumed.failed) == ["docs/file_3.txt"]
+
+    search_service.batches.clear()
+    stats = await Backfill(FakeS3(objects), search_service, resumed, bucket="bucket", prefix="docs/").run()
+
+    assert (stats.skipped, stats.files, stats.failed) == (4, 1, 0)
+    assert [file_id for batch in search_service.batches for file_id in batch] == ["file_3"]
+    assert Checkpoint.load(tmp_path / "checkpoint.json").failed == {}
+
+def test_checkpoint_appends_batches_and_compacts(tmp_path, monkeypatch):
+    """Test that saves append only new keys to the journal, which is folded into the snapshot as it grows"""
+    monkeypatch.setattr(backfill, "JOURNAL_COMPACT_MIN", 4)
+    path = tmp_path / "checkpoint.json"
+    checkpoint = Checkpoint.load(path)
+    checkpoint.collection = "docs_v2"
+    checkpoint.save()
+    snapshot = path.read_text()
+
+    checkpoint.mark_completed("a")
+    checkpoint.mark_failed("b", "boom")
+    checkpoint.save()
+    checkpoint.mark_completed("b")
+    checkpoint.save()
+    assert path.read_text() == snapshot
+    assert len(checkpoint.journal_path.read_text().splitlines()) == 3
+    # A line cut short by a crash is ignored
+    with open(checkpoint.journal_path, "a") as f:
+        f.write('["completed", "c')
+
+    resumed = Checkpoint.load(path)
+    assert (resumed.collection, resumed.completed, resumed.failed) == ("docs_v2", {"a", "b"}, {})
+    assert not resumed.journal_path.exists()
+
+    # Retries of a failing object grow the journal but not the completed keys
+    for attempt in range(4):
+        resumed.mark_failed("c", f"attempt {attempt}")
+        resumed.save()
+    assert len(resumed.journal_path.read_text().splitlines()) == 4
+    resumed.mark_completed("c")
+    resumed.save()
+    assert not resumed.journal_path.exists()
+    assert Checkpoint.load(path).completed == {"a", "b", "c"}
+
+@pytest.mark.asyncio
+async def test_switch_alias_is_atomic_swap():
+    """Test that the alias moves to the new collection and reports the old one"""
+    provider = QdrantProvider(VectorDBConfig(url=":memory:"))
+    await provider.initialize()
+    try:
+        await provider.create_collection("docs_v1", 4)
+        await provider.create_collection("docs_v2", 4)
+
+        assert await provider.switch_alias("docs", "docs_v1") is None
+        assert await provider.switch_alias("docs", "docs_v2") == "docs_v1"
+        assert await provider.get_alias_target("docs") == "docs_v2"
+    finally:
+        await provider.close()
@@ -0,0 +1,110 @@
+"""
+Tests for the benchmark helpers
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.hit_decoding import run as run_hit_decoding
+from benchmarks.load_test import ScenarioResult, Workload, percentile
+from benchmarks.dedup import run as run_dedup
+from benchmarks.multivector import run as run_multivector
+from benchmarks.retrieval_quality import ndcg_at_k, recall_at_k, reciprocal_rank
+from benchmarks.sharding import run_in_process
+from benchmarks.synthetic_corpus import generate_corpus
+
+def test_fake_embeddings_are_deterministic_unit_vectors():
+    """Test that the same text and seed always give the same normalised vector"""
+    server = FakeOllama(dimension=16, seed=7)
+
+    vector = server.vector("hợp đồng")
+
+    assert vector == FakeOllama(dimension=16, seed=7).vector("hợp đồng")
+    assert vector != FakeOllama(dimension=16, seed=8).vector("hợp đồng")
+    assert abs(sum(value * value for value in vector) - 1.0) < 1e-9
+
+def test_percentiles_and_report():
+    """Test percentile interpolation and the JSON summary"""
+    latencies = [i / 1000 for i in range(1, 101)]
+    result = ScenarioResult("search", 4, requests=100, errors=5, duration_seconds=2.0, latencies=latencies)
+
+    summary = result.to_dict()
+
+    assert percentile(sorted(latencies), 50) == 0.0505
+    assert summary["throughput_rps"] == 50.0
+    assert summary["error_rate"] == 0.05
+    assert summary["latency_ms"]["p99"] == 99.01
+
+def test_workload_is_reproducible():
+    """Test that a seed fixes the generated requests"""
+    first, second = Workload(seed=3), Workload(seed=3)
+    first.documents(10)
+    second.documents(10)
+
+    assert first.request("chat") == second.request("chat")
+
+def test_ranking_metrics():
+    """Test recall, reciprocal rank and nDCG on a known ranking"""
+    ranked = ["a", "b", "c", "d"]
+    relevant = {"b", "d"}
+
+    assert recall_at_k(ranked, relevant, 2) == 0.5
+    assert reciprocal_rank(ranked, relevant) == 0.5
+    assert ndcg_at_k(["b", "d"], relevant, 2) == 1.0
+    assert 0 < ndcg_at_k(ranked, relevant, 4) < 1
+
+def test_synthetic_queries_point_at_existing_files():
+    """Test that every labelled query refers to an indexed file"""
+    corpus = generate_corpus(files=20, chunks_per_file=2, queries=10, seed=1)
+    file_ids = {doc["file_id"] for doc in corpus.documents}
+
+    assert len(corpus.documents) == 40
+    assert all(set(query["relevant"]) <= file_ids for query in corpus.queries)
+    assert corpus.queries == generate_corpus(files=20, chunks_per_file=2, queries=10, seed=1).queries
+
+def test_shared_hit_decoding_allocates_less():
+    """Test that decoded hits match the legacy decoder and allocate fewer objects"""
+    args = argparse.Namespace(hits=200, metadata_keys=4, words=20, iterations=1, seed=0)
+
+    report = run_hit_decoding(args)
+
+    legacy, shared = report["decoders"]["legacy"], report["decoders"]["shared"]
+    assert shared["blocks_per_1k_hits"] < legacy["blocks_per_1k_hits"]
+    assert shared["bytes_per_1k_hits"] < legacy["bytes_per_1k_hits"]
+
+def test_sharding_benchmark_targets_fewer_shards():
+    """Test that the in-process sharding benchmark places every point and reports both strategies"""
+    args = argparse.Namespace(
+        shards=3, files=30, chunks_per_file=2, files_per_query=1, limit=5, iterations=3, seed=0
+    )
+
+    report = asyncio.run(run_in_process(args))
+
+    assert sum(report["points_per_shard"]) == report["points"] == 60
+    assert set(report["search"]) == set(report["delete"]) == {"fan_out", "targeted"}
+
+def test_multivector_benchmark_reports_storage_and_quality():
+    """Test that the multi-vector benchmark reports token vector storage and rescoring beats dense-only"""
+    args = argparse.Namespace(
+        files=40, chunks_per_file=2, queries=20, dimension=32, candidates=[20], k=20, top_files=5, seed=0
+    )
+
+    report = asyncio.run(run_multivector(args))
+
+    assert report["storage"]["multivector_bytes_per_chunk"] > report["storage"]["dense_bytes_per_chunk"]
+    assert report["runs"]["rescored@20"]["mrr"] >= report["runs"]["dense"]["mrr"]
+
+def test_dedup_benchmark_reports_savings():
+    """Test that the dedup benchmark stores boilerplate once and reports the savings"""
+    args = argparse.Namespace(
+        files=20, chunks_per_file=2, boilerplate_per_file=2, templates=3, edits=1, threshold=0.7,
+        embedding_threshold=0.0, queries=10, dimension=16, batch_size=32, k=10, top_files=5, seed=0, url=""
+    )
+
+    report = asyncio.run(run_dedup(args))
+
+    off, minhash = report["runs"]["off"], report["runs"]["minhash"]
+    assert off["points"] == 80
+    assert minhash["points"] < off["points"] and minhash["storage_saved"] > 0
+    assert minhash["boilerplate_share@10"] <= off["boilerplate_share@10"]
@@ -0,0 +1,94 @@
+"""
+Tests for the Ollama chat provider and chat warm-up against the fake Ollama server
+"""
+
+import pytest
+
+from app.core.config import AppConfig, ChatConfig
+from app.core.exceptions import ChatError
+from app.providers.chat.ollama import OllamaChatProvider
+from app.services.chat_service import ChatService
+from app.services.context_packer import ApproximateTokenCounter, ContextPacker
+from benchmarks.fake_ollama import FakeOllama
+
+class RecordingOllama(FakeOllama):
+    """Fake Ollama that keeps every /api/generate payload"""
+
+    def __init__(self, **kwargs):
+        super().__init__(embed_latency=0, generate_latency=0, **kwargs)
+        self.payloads = []
+
+    async def _generate(self, request):
+        self.payloads.append(await request.json())
+        return await super()._generate(request)
+
+@pytest.mark.asyncio
+async def test_turns_send_configured_options_and_continue_state():
+    """Test that generation options come from ChatConfig and follow-ups send only the new prompt with the state"""
+    server = RecordingOllama()
+    url = await server.start()
+    config = ChatConfig(
+        base_url=url, keep_alive="5m", num_ctx=2048, num_predict=64, num_thread=4, temperature=0.3, top_p=0.8
+    )
+    provider = OllamaChatProvider(config)
+    try:
+        await provider.initialize()
+        first = await provider.generate_turn("Doanh thu quý 3 tăng 12%.", "Doanh thu tăng bao nhiêu?")
+
+        assert first.response == "Câu trả lời giả lập cho benchmark."
+        assert first.endpoint == url and first.state and first.reused_tokens == 0
+        payload = server.payloads[0]
+        assert payload["model"] == "qwen2.5:1.5b" and payload["keep_alive"] == "5m"
+        assert payload["options"] == {"temperature": 0.3, "top_p": 0.8, "num_ctx": 2048, "num_predict": 64, "num_thread": 4}
+        assert "context" not in payload
+        assert payload["prompt"].endswith("Câu hỏi: Doanh thu tăng bao nhiêu?\n\nTrả lời:")
+
+        second = await provider.generate_turn("", "Còn quý 4?", state=first.state, endpoint=first.endpoint)
+        followup = server.payloads[1]
+        assert followup["context"] == first.state
+        assert followup["prompt"] == "Câu hỏi: Còn quý 4?\n\nTrả lời:"
+        assert second.reused_tokens == len(first.state) and len(second.state) > len(first.state)
+        # Without num_thread the option is left to Ollama
+        assert "num_thread" not in OllamaChatProvider(ChatConfig(base_url=url))._build_options()
+    finally:
+        await provider.close()
+        await server.stop()
+
+@pytest.mark.asyncio
+async def test_initialize_requires_the_chat_model():
+    """Test that a server without the configured chat model fails initialization"""
+    server = RecordingOllama(models=("bge-m3",))
+    url = await server.start()
+    provider = OllamaChatProvider(ChatConfig(base_url=url))
+    try:
+        with pytest.raises(ChatError):
+            await provider.initialize()
+    finally:
+        await provider.close()
+        await server.stop()
+
+@pytest.mark.asyncio
+async def test_warmup_loads_the_model_on_every_endpoint():
+    """Test that ChatService.warmup sends an empty prompt with the real options to each endpoint"""
+    servers = [RecordingOllama(), RecordingOllama()]
+    urls = [await server.start() for server in servers]
+    service = ChatService(AppConfig(chat=ChatConfig(base_urls=urls, num_ctx=2048)))
+    service.packer = ContextPacker(tokenizer=ApproximateTokenCounter())
+    try:
+        await service.warmup()
+
+        for server in servers:
+            assert len(server.payloads) == 1
+            assert server.payloads[0]["prompt"] == ""
+            assert server.payloads[0]["options"]["num_ctx"] == 2048
+
+        # Warm-up fails only when no endpoint could load the model
+        await servers[0].stop()
+        await service.warmup()
+        await servers[1].stop()
+        with pytest.raises(ChatError):
+            await service.warmup()
+    finally:
+        await service.close()
+        for server in servers:
+            await server.stop()
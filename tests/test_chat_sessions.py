@@ -0,0 +1,102 @@
+"""
+Tests for multi-turn chat sessions
+"""
+
+import time
+import pytest
+
+from app.core.config import AppConfig
+from app.core.exceptions import ChatError
+from app.providers.base import ChatTurn, SearchResult
+from app.services.chat_service import ChatService
+from app.services.chat_sessions import ChatSessionStore
+from app.services.context_packer import ApproximateTokenCounter, ContextPacker
+
+class RecordingChatProvider:
+    """Chat provider stub that records the context sent on each turn"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_turn(self, context, message, state=None, endpoint=None):
+        self.calls.append({"context": context, "state": state, "endpoint": endpoint})
+        new_state = (state or []) + list(range(len(context.split()) + len(message.split())))
+        return ChatTurn(
+            response="ok",
+            state=new_state,
+            endpoint="http://node-1",
+            reused_tokens=len(state) if state else 0
+        )
+
+def test_store_evicts_idle_sessions():
+    """Test idle sessions are dropped after the TTL"""
+    store = ChatSessionStore(ttl_seconds=60)
+    session = store.create(["doc_1"])
+    session.last_used = time.monotonic() - 120
+
+    assert store.get(session.session_id) is None
+    assert len(store) == 0
+
+def test_store_caps_session_count():
+    """Test the least recently used session is evicted at capacity"""
+    store = ChatSessionStore(max_sessions=2)
+    first = store.create(["doc_1"])
+    second = store.create(["doc_2"])
+    store.get(first.session_id)
+    store.create(["doc_3"])
+
+    assert store.get(first.session_id) is not None
+    assert store.get(second.session_id) is None
+
+@pytest.mark.asyncio
+async def test_followup_turn_sends_only_new_chunks():
+    """Test that follow-up turns reuse model state and skip already sent chunks"""
+    service = ChatService(AppConfig())
+    service.packer = ContextPacker(tokenizer=ApproximateTokenCounter())
+    service.chat_provider = RecordingChatProvider()
+    session = service.sessions.create(["doc_1"])
+
+    first_chunks = [SearchResult(file_id="doc_1", score=0.9, content="alpha beta gamma")]
+    await service._session_turn(session, first_chunks, "first question")
+
+    second_chunks = first_chunks + [SearchResult(file_id="doc_1", score=0.8, content="delta epsilon")]
+    _, turn, used_chunks = await service._session_turn(session, second_chunks, "second question")
+
+    first_call, second_call = service.chat_provider.calls
+    assert first_call["state"] is None
+    assert "alpha" in first_call["context"]
+    assert second_call["state"] is not None
+    assert second_call["endpoint"] == "http://node-1"
+    assert "alpha" not in second_call["context"]
+    assert "delta" in second_call["context"]
+    assert turn.reused_tokens == len(second_call["state"])
+    assert len(used_chunks) == 2
+
+class FailingSearchService:
+    async def search_with_file_filter(self, query, file_ids, limit, filters=None):
+        raise RuntimeError("vector database unavailable")
+
+class FixedSearchService:
+    async def search_with_file_filter(self, query, file_ids, limit, filters=None):
+        return [SearchResult(file_id="doc_1", score=0.9, content="alpha beta gamma")]
+
+class FailingChatProvider:
+    async def generate_turn(self, context, message, state=None, endpoint=None):
+        raise RuntimeError("model unavailable")
+
+@pytest.mark.asyncio
+async def test_failed_first_turn_leaves_no_session():
+    """Test that a session is only kept once its first turn succeeded"""
+    service = ChatService(AppConfig())
+    service.packer = ContextPacker(tokenizer=ApproximateTokenCounter())
+    service.chat_provider = FailingChatProvider()
+    service._initialized = True
+
+    for search_service in (FailingSearchService(), FixedSearchService()):
+        with pytest.raises(ChatError):
+            await service.chat_with_files(["doc_1"], "question", start_session=True, search_service=search_service)
+        assert len(service.sessions) == 0
+
+    service.chat_provider = RecordingChatProvider()
+    result = await service.chat_with_files(["doc_1"], "question", start_session=True, search_service=FixedSearchService())
+    assert service.sessions.get(result["session_id"]) is not None
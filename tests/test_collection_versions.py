@@ -0,0 +1,106 @@
+"""
+Tests for alias-based collection versioning
+"""
+
+import pytest
+
+from app.core.config import AppConfig, DedupConfig, VectorDBConfig
+from app.core.exceptions import ConfigurationError, EmbeddingDimensionMismatchError, ValidationError
+from app.providers.base import CollectionSettings, Document
+from app.providers.vector_db.qdrant import next_version_name
+from app.services.collection_versions import CollectionVersionManager
+
+def _length_vector(text):
+    """Embeds text by its length so documents get distinct, deterministic vectors"""
+    return [float(len(text)), 1.0, 0.5, 0.25]
+
+def test_next_version_name():
+    """Test that version numbers increase and unversioned names start at v2"""
+    assert next_version_name("docs", "docs_v1") == "docs_v2"
+    assert next_version_name("docs", "docs_v9") == "docs_v10"
+    assert next_version_name("docs", "docs_20250101") == "docs_v2"
+
+@pytest.mark.asyncio
+async def test_rebuild_mirrors_writes_and_swaps_alias(make_search_service):
+    """Test that a rebuild copies points, keeps live writes and deletes, then moves the alias"""
+    service = await make_search_service(vectorize=_length_vector, dimension=4)
+    try:
+        assert await service.vector_db.get_alias_target("docs") == "docs_v1"
+        await service.index_documents([Document(content=f"text {'x' * i}", file_id=f"doc_{i}") for i in range(5)])
+
+        async def factory():
+            return service
+
+        manager = CollectionVersionManager(factory)
+        manager.start(CollectionSettings(hnsw_m=32, quantization="scalar"), swap=False)
+        build = await manager.wait()
+        assert build.status == "ready"
+        assert (build.source, build.target, build.copied_points) == ("docs_v1", "docs_v2", 5)
+
+        # Writes while the build waits for its swap reach both versions
+        await service.index_documents([Document(content="late arrival", file_id="doc_new")])
+        await service.delete_documents(["doc_0"])
+
+        await manager.swap()
+        assert build.status == "swapped"
+        assert await service.vector_db.get_alias_target("docs") == "docs_v2"
+        assert await service.vector_db.count_points("docs_v2") == 5
+
+        info = await service.get_collection_info()
+        assert info["target"] == "docs_v2"
+        results = await service.search("late arrival", limit=10)
+        assert {result.file_id for result in results} == {"doc_1", "doc_2", "doc_3", "doc_4", "doc_new"}
+
+        # The next build picks the next version number
+        manager.start(CollectionSettings())
+        build = await manager.wait()
+        assert (build.status, build.target) == ("swapped", "docs_v3")
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_dimension_mismatch_is_detected_at_startup(make_search_service):
+    """Test that a model whose dimension differs from the collection's vectors is refused"""
+    service = await make_search_service(vectorize=_length_vector, dimension=4)
+    try:
+        assert await service.vector_db.get_vector_size("docs") == 4
+        assert await service.vector_db.get_vector_size("missing") is None
+        await service._check_dimension(4)
+
+        service.embedding.get_model_info = lambda: {"model": "other-model"}
+        with pytest.raises(EmbeddingDimensionMismatchError):
+            await service._check_dimension(8)
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_build_fails_cleanly_when_the_service_is_unavailable():
+    """Test that a build whose search service cannot be created is reported as failed"""
+    async def factory():
+        raise RuntimeError("qdrant is down")
+
+    manager = CollectionVersionManager(factory)
+    manager.start(CollectionSettings())
+    build = await manager.wait()
+    assert (build.status, build.error, build.target) == ("failed", "qdrant is down", None)
+    assert build.finished_at is not None
+
+@pytest.mark.asyncio
+async def test_dedup_refuses_custom_shard_keys(make_search_service):
+    """Test that dedup is refused both for a sharded rebuild and on a collection that is already sharded"""
+    config = AppConfig(vector_db=VectorDBConfig(url=":memory:", collection="docs"), dedup=DedupConfig(enabled=True))
+    service = await make_search_service(config)
+    try:
+        manager = CollectionVersionManager(dedup=config.dedup)
+        with pytest.raises(ValidationError):
+            manager.start(CollectionSettings(shard_keys=4))
+        assert manager.build is None
+
+        async def sharded(collection):
+            return 4
+
+        service.vector_db._shard_keys = sharded
+        with pytest.raises(ConfigurationError):
+            await service.prepare_collection()
+    finally:
+        await service.close()
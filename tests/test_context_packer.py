@@ -0,0 +1,73 @@
+"""
+Tests for token-budgeted context packing
+"""
+
+from app.providers.base import SearchResult
+from app.services.context_packer import ContextPacker, ApproximateTokenCounter
+
+class WhitespaceTokenizer:
+    """Deterministic tokenizer: one token per whitespace separated word"""
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return " ".join(text.split()[:max_tokens])
+
+def make_chunk(file_id: str, words: int, score: float, word: str = "w") -> SearchResult:
+    return SearchResult(
+        file_id=file_id,
+        score=score,
+        content=" ".join(f"{word}{i}" for i in range(words))
+    )
+
+def test_pack_respects_token_budget():
+    """Test that the packed context never exceeds the budget"""
+    packer = ContextPacker(tokenizer=WhitespaceTokenizer(), min_fill_tokens=5)
+    chunks = [make_chunk(f"doc_{i}", 40, 1.0 - i / 10, word=f"d{i}x") for i in range(5)]
+
+    packed = packer.pack(chunks, max_tokens=100)
+
+    assert packed.tokens <= 100
+    assert packed.tokens == WhitespaceTokenizer().count(packed.text)
+    # Two whole chunks (42 tokens each with header) plus a truncated third
+    assert [chunk.file_id for chunk in packed.chunks] == ["doc_0", "doc_1", "doc_2"]
+    assert packed.truncated
+
+def test_pack_skips_large_chunk_for_smaller_ones():
+    """Test that a chunk too big for the remaining budget doesn't block smaller ones"""
+    packer = ContextPacker(tokenizer=WhitespaceTokenizer(), min_fill_tokens=1000)
+    chunks = [
+        make_chunk("big", 80, 0.9, word="b"),
+        make_chunk("small_1", 10, 0.8, word="s"),
+        make_chunk("small_2", 10, 0.7, word="t"),
+    ]
+
+    packed = packer.pack(chunks, max_tokens=30)
+
+    assert [chunk.file_id for chunk in packed.chunks] == ["small_1", "small_2"]
+    assert not packed.truncated
+
+def test_pack_drops_near_duplicates():
+    """Test that repeated boilerplate chunks are only included once"""
+    packer = ContextPacker(tokenizer=WhitespaceTokenizer())
+    chunks = [
+        make_chunk("doc_1", 30, 0.9, word="same"),
+        make_chunk("doc_2", 30, 0.8, word="same"),
+        make_chunk("doc_3", 30, 0.7, word="other"),
+    ]
+
+    packed = packer.pack(chunks, max_tokens=1000)
+
+    assert packed.duplicates_dropped == 1
+    assert [chunk.file_id for chunk in packed.chunks] == ["doc_1", "doc_3"]
+
+def test_approximate_counter_truncates_to_budget():
+    """Test the fallback counter stays within its own budget"""
+    counter = ApproximateTokenCounter()
+    text = "Học máy là một nhánh của trí tuệ nhân tạo, nghiên cứu các thuật toán."
+
+    truncated = counter.truncate(text, 5)
+
+    assert counter.count(truncated) <= 5
+    assert text.startswith(truncated)
@@ -0,0 +1,136 @@
+"""
+Tests for near-duplicate chunk detection at ingest
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import AppConfig, DedupConfig, VectorDBConfig
+from app.providers.base import Document
+from app.services.dedup import Deduplicator, jaccard
+
+NOTICE = (
+    "this document is confidential and intended only for the named recipient "
+    "do not copy forward or disclose its contents without written approval from legal"
+)
+
+def _config(dedup: DedupConfig) -> AppConfig:
+    return AppConfig(vector_db=VectorDBConfig(url=":memory:", collection="docs"), dedup=dedup)
+
+def test_near_duplicates_share_a_band():
+    """Test that a one-word edit keeps a shared band key while unrelated text has none"""
+    deduplicator = Deduplicator(DedupConfig(enabled=True))
+    original, original_bands = deduplicator.fingerprint(NOTICE)
+    edited, edited_bands = deduplicator.fingerprint(NOTICE.replace("legal", "compliance"))
+    other, other_bands = deduplicator.fingerprint("quarterly revenue grew in every region except the north east office")
+
+    assert jaccard(original, edited) >= 0.8
+    assert set(original_bands) & set(edited_bands)
+    assert not set(original_bands) & set(other_bands)
+    # Too short to fingerprint reliably
+    assert deduplicator.fingerprint("page 1")[1] == []
+
+@pytest.mark.asyncio
+async def test_boilerplate_is_stored_once_and_shared_by_its_files(make_search_service):
+    """Test that near-duplicates join the canonical chunk's owners and survive its file's deletion"""
+    service = await make_search_service(_config(DedupConfig(enabled=True)))
+    try:
+        await service.index_documents([
+            Document(content=NOTICE, file_id="a"),
+            Document(content="alpha project budget for the spring release cycle", file_id="a")
+        ])
+        await service.index_documents([
+            Document(content=NOTICE.replace("legal", "compliance"), file_id="b"),
+            Document(content="beta rollout plan covering the support teams", file_id="b")
+        ])
+
+        assert service.embedding.embedded == 3
+        assert await service.vector_db.count_points("docs") == 3
+        shared = await service.search_with_file_filter("confidential", ["b"], limit=5)
+        assert NOTICE in [hit.content for hit in shared]
+        notice = next(hit for hit in shared if hit.content == NOTICE)
+        assert notice.metadata["file_ids"] == ["a", "b"]
+        assert "dedup_bands" not in notice.metadata
+
+        # Deleting the canonical chunk's file hands it over to the remaining owner
+        await service.delete_documents(["a"])
+        hits = await service.search_with_file_filter("confidential", ["b"], limit=5)
+        notice = next(hit for hit in hits if hit.content == NOTICE)
+        assert notice.file_id == "b" and notice.metadata["file_ids"] == ["b"]
+
+        await service.delete_documents(["b"])
+        assert await service.vector_db.count_points("docs") == 0
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_reindexing_keeps_owners_and_dedup_off_stores_everything(make_search_service):
+    """Test that re-indexing the canonical chunk keeps its sharers, and that dedup is opt-in"""
+    service = await make_search_service(_config(DedupConfig(enabled=True)))
+    try:
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+        await service.index_documents([Document(content=NOTICE, file_id="b"), Document(content=NOTICE, file_id="c")])
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+
+        hits = await service.search_with_file_filter("confidential", ["c"], limit=5)
+        assert len(hits) == 1 and hits[0].metadata["file_ids"] == ["a", "b", "c"]
+    finally:
+        await service.close()
+
+    plain = await make_search_service(_config(DedupConfig(enabled=False)))
+    try:
+        await plain.index_documents([Document(content=NOTICE, file_id="a"), Document(content=NOTICE, file_id="b")])
+        assert await plain.vector_db.count_points("docs") == 2
+    finally:
+        await plain.close()
+
+@pytest.mark.asyncio
+async def test_reindexing_after_a_handover_keeps_one_point(make_search_service):
+    """Test that a chunk handed over to another owner is recognised by its id when either file is re-indexed"""
+    service = await make_search_service(_config(DedupConfig(enabled=True)))
+    try:
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+        await service.index_documents([Document(content=NOTICE, file_id="b")])
+        await service.delete_documents(["a"])
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+        await service.index_documents([Document(content=NOTICE, file_id="b")])
+
+        assert await service.vector_db.count_points("docs") == 1
+        for file_id in ("a", "b"):
+            hits = await service.search_with_file_filter("confidential", [file_id], limit=5)
+            assert len(hits) == 1 and sorted(hits[0].metadata["file_ids"]) == ["a", "b"]
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_reindexing_an_edited_chunk_stores_the_new_text(make_search_service):
+    """Test that a file's edited chunk is not folded into the file's own stored version"""
+    service = await make_search_service(_config(DedupConfig(enabled=True)))
+    edited = NOTICE.replace("legal", "compliance")
+    try:
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+        await service.index_documents([Document(content=edited, file_id="a")])
+
+        assert await service.vector_db.count_points("docs") == 2
+        hits = await service.search_with_file_filter("confidential", ["a"], limit=5)
+        assert edited in [hit.content for hit in hits]
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_batches_keep_every_owner(make_search_service):
+    """Test that batches folding into the same chunk at once don't overwrite each other's owners"""
+    service = await make_search_service(_config(DedupConfig(enabled=True)))
+    try:
+        await service.index_documents([Document(content=NOTICE, file_id="a")])
+        await asyncio.gather(*(
+            service.index_documents([Document(content=NOTICE, file_id=file_id)]) for file_id in ("b", "c", "d")
+        ))
+
+        for file_id in ("b", "c", "d"):
+            assert len(await service.search_with_file_filter("confidential", [file_id], limit=5)) == 1
+        hits = await service.search_with_file_filter("confidential", ["a"], limit=5)
+        assert sorted(hits[0].metadata["file_ids"]) == ["a", "b", "c", "d"]
+    finally:
+        await service.close()
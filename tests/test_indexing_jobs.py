@@ -0,0 +1,60 @@
+"""
+Tests for background indexing jobs
+"""
+
+import pytest
+
+from app.core.config import IndexingConfig
+from app.core.exceptions import JobNotFoundError, JobQueueFullError
+from app.providers.base import Document
+from app.services.indexing_jobs import IndexJobManager
+
+def _manager(search_service, **overrides):
+    async def factory():
+        return search_service
+    return IndexJobManager(IndexingConfig(**{"workers": 1, "batch_size": 2, **overrides}), factory)
+
+def _documents(prefix, count):
+    return [Document(content=f"{prefix} {i}", file_id=f"{prefix}_{i}") for i in range(count)]
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_partial_failures(make_fake_search_service):
+    """Test that a failing batch is counted without losing the other batches"""
+    manager = _manager(make_fake_search_service(fail_file_id="doc_2"))
+    job = manager.submit(_documents("doc", 5))
+
+    await manager.join()
+    await manager.close()
+
+    assert job.status == "completed_with_errors"
+    assert (job.embedded, job.upserted, job.failed) == (3, 3, 2)
+    assert job.errors == ["embedding server unavailable"]
+    assert manager.get(job.job_id) is job
+
+@pytest.mark.asyncio
+async def test_higher_priority_jobs_run_first(make_fake_search_service):
+    """Test that queued jobs are drained by priority, FIFO within a level"""
+    search_service = make_fake_search_service()
+    manager = _manager(search_service)
+    manager.submit(_documents("first", 1))
+    manager.submit(_documents("low", 1), priority=-1)
+    manager.submit(_documents("high", 1), priority=5)
+    manager.submit(_documents("second", 1))
+
+    await manager.join()
+    await manager.close()
+
+    assert [batch[0] for batch in search_service.batches] == ["high_0", "first_0", "second_0", "low_0"]
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_unknown_job_raises(make_fake_search_service):
+    """Test backpressure and lookups of unknown jobs"""
+    manager = _manager(make_fake_search_service(), max_queued_jobs=1)
+    manager.submit(_documents("a", 1))
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit(_documents("b", 1))
+    with pytest.raises(JobNotFoundError):
+        manager.get("missing")
+
+    await manager.close()
@@ -0,0 +1,68 @@
+"""
+Tests for metadata-filtered search
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.models import MetadataFilterModel, SearchFileRequest
+from app.core.config import VectorDBConfig
+from app.providers.base import Document
+from app.providers.vector_db.qdrant import QdrantProvider
+
+DOCUMENTS = [
+    Document(content="alpha", file_id="doc_1", metadata={"category": "ai", "priority": "high", "year": 2021, "published_at": "2021-03-01T00:00:00Z"}),
+    Document(content="beta", file_id="doc_2", metadata={"category": "ml", "priority": "high", "year": 2023, "published_at": "2023-06-01T00:00:00Z"}),
+    Document(content="gamma", file_id="doc_3", metadata={"category": "ai", "priority": "low", "year": 2024, "published_at": "2024-01-15T00:00:00Z"}),
+    Document(content="delta", file_id="doc_4", metadata={"category": "cv", "priority": "medium", "year": 2024, "published_at": "2024-09-30T00:00:00Z"}),
+]
+
+def _filters(*items):
+    return [MetadataFilterModel(**item).to_filter() for item in items]
+
+def test_filter_model_requires_one_condition():
+    """Test that a filter must have exactly one kind of condition"""
+    request = SearchFileRequest(query="q", filters=[{"key": "category", "in": ["ai", "ml"]}])
+    assert request.filters[0].to_filter().any_of == ["ai", "ml"]
+
+    with pytest.raises(ValidationError):
+        MetadataFilterModel(key="category")
+    with pytest.raises(ValidationError):
+        MetadataFilterModel(key="year", eq=2024, gte=2020)
+    with pytest.raises(ValidationError):
+        MetadataFilterModel(key="year", gte=2020, lt="2024-01-01T00:00:00Z")
+    with pytest.raises(ValidationError):
+        MetadataFilterModel(key="bad key", eq="x")
+
+@pytest.mark.asyncio
+async def test_filters_are_applied_inside_search():
+    """Test equality, membership, numeric and date ranges against indexed payload fields"""
+    config = VectorDBConfig(
+        url=":memory:",
+        collection="docs",
+        payload_indexes={"category": "keyword", "priority": "keyword", "year": "integer", "published_at": "datetime"}
+    )
+    provider = QdrantProvider(config)
+    await provider.initialize()
+    try:
+        await provider.ensure_collection("docs", 2)
+        await provider.upsert_documents("docs", DOCUMENTS, [[1.0, float(i)] for i in range(len(DOCUMENTS))])
+
+        async def file_ids(filters, limit=1):
+            results = await provider.search("docs", [1.0, 0.0], limit=limit, filters=filters)
+            return sorted(result.file_id for result in results)
+
+        # top-k is taken among matching points, not filtered afterwards
+        assert await file_ids(_filters({"key": "category", "eq": "cv"})) == ["doc_4"]
+        assert await file_ids(_filters({"key": "category", "in": ["ai", "ml"]}), limit=10) == ["doc_1", "doc_2", "doc_3"]
+        assert await file_ids(_filters({"key": "year", "gte": 2023, "lt": 2024.5}), limit=10) == ["doc_2", "doc_3", "doc_4"]
+        assert await file_ids(
+            _filters({"key": "published_at", "gte": "2024-01-01T00:00:00Z"}, {"key": "priority", "eq": "low"}), limit=10
+        ) == ["doc_3"]
+
+        results = await provider.search_with_filter(
+            "docs", [1.0, 0.0], ["doc_1", "doc_2"], limit=10, filters=_filters({"key": "priority", "eq": "high"})
+        )
+        assert sorted(result.file_id for result in results) == ["doc_1", "doc_2"]
+    finally:
+        await provider.close()
@@ -0,0 +1,47 @@
+"""
+Tests for the Prometheus metrics surface
+"""
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry
+from app.main import create_app
+
+def test_histogram_renders_cumulative_buckets():
+    """Test histogram exposition format"""
+    metrics = MetricsRegistry()
+    histogram = metrics.histogram("op_seconds", "Operation latency", ["op"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, op="search")
+    histogram.observe(0.5, op="search")
+
+    text = metrics.render()
+
+    assert '# TYPE op_seconds histogram' in text
+    assert 'op_seconds_bucket{op="search",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="search",le="1"} 2' in text
+    assert 'op_seconds_bucket{op="search",le="+Inf"} 2' in text
+    assert 'op_seconds_count{op="search"} 2' in text
+
+def test_disabled_registry_records_nothing():
+    """Test that instrumentation is a no-op when metrics are off"""
+    metrics = MetricsRegistry(enabled=False)
+    counter = metrics.counter("calls_total", "Calls", ["route"])
+    histogram = metrics.histogram("calls_seconds", "Call latency")
+
+    counter.inc(route="/")
+    with histogram.time():
+        pass
+
+    assert counter.value(route="/") == 0
+    assert histogram.count() == 0
+
+def test_metrics_endpoint_counts_requests():
+    """Test that requests show up per route and status on /metrics"""
+    client = TestClient(create_app())
+    client.get("/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'http_requests_total{route="/",method="GET",status="200"}' in response.text
+    assert "http_requests_in_progress" in response.text
@@ -0,0 +1,129 @@
+"""
+Tests for late-interaction (multi-vector) rescoring of dense candidates
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import AppConfig, MultiVectorConfig, VectorDBConfig
+from app.providers.base import CollectionSettings, Document
+from app.providers.multivector.bge_m3 import BGEM3MultiVectorProvider
+
+# Word -> token vector; the dense vector of a text is its first word's vector
+WORDS = {"alpha": [1.0, 0.0, 0.0], "beta": [0.0, 1.0, 0.0], "gamma": [0.0, 0.0, 1.0]}
+
+def _first_word_vector(text):
+    return WORDS[text.split()[0]]
+
+class FakeTokenEncoder:
+    def __init__(self):
+        self.documents = 0
+
+    async def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [[WORDS[word] for word in text.split()] for text in texts]
+
+    async def embed_query(self, text):
+        return [WORDS[word] for word in text.split()]
+
+    def get_dimension(self):
+        return 3
+
+async def _service(make_search_service, encoder, candidates=10):
+    config = AppConfig(
+        vector_db=VectorDBConfig(url=":memory:", collection="docs"),
+        multivector=MultiVectorConfig(enabled=encoder is not None, candidates=candidates)
+    )
+    return await make_search_service(config, vectorize=_first_word_vector, dimension=3, multivector=encoder)
+
+@pytest.mark.asyncio
+async def test_token_vectors_rescore_dense_candidates(make_search_service):
+    """Test that MaxSim over token vectors reorders the dense candidates"""
+    encoder = FakeTokenEncoder()
+    service = await _service(make_search_service, encoder)
+    try:
+        assert service.rescoring
+        assert await service.vector_db.get_multivector_size("docs") == 3
+        await service.index_documents([
+            Document(content="alpha", file_id="dense_match"),
+            Document(content="alpha beta gamma", file_id="token_match"),
+        ])
+        assert encoder.documents == 2
+
+        # Dense scores tie on "alpha"; only the second file also matches "beta" token by token
+        hits = await service.search("alpha beta", limit=2)
+        assert [hit.file_id for hit in hits] == ["token_match", "dense_match"]
+        # MaxSim sums are reported per query token
+        assert hits[0].score == pytest.approx(1.0)
+        assert hits[1].score == pytest.approx(0.5)
+        assert [hit.file_id for hit in await service.search("alpha beta", limit=2, score_threshold=0.75)] == ["token_match"]
+
+        chat_hits = await service.search_with_file_filter("alpha beta", ["dense_match"], limit=5)
+        assert [hit.file_id for hit in chat_hits] == ["dense_match"]
+        page = await service.search_files_page("alpha beta", top_files=1, k=1)
+        assert [item["file_id"] for item in page.results] == ["token_match"]
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_collection_without_token_vectors_stays_dense(make_search_service):
+    """Test that an existing dense-only collection is searched without rescoring"""
+    config = AppConfig(
+        vector_db=VectorDBConfig(url=":memory:", collection="docs", use_alias=False),
+        multivector=MultiVectorConfig(enabled=True)
+    )
+    service = await make_search_service(
+        config, vectorize=_first_word_vector, dimension=3, multivector=FakeTokenEncoder(), prepare=False
+    )
+    try:
+        await service.vector_db.create_collection("docs", 3)
+        await service.prepare_collection()
+        assert not service.rescoring
+
+        await service.index_documents([Document(content="alpha beta", file_id="doc_1")])
+        assert service.multivector.documents == 0
+        assert [hit.file_id for hit in await service.search("alpha")] == ["doc_1"]
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_copy_keeps_token_vectors_only_where_they_fit(make_search_service):
+    """Test that a rebuild copies token vectors into a multi-vector target and drops them otherwise"""
+    service = await _service(make_search_service, FakeTokenEncoder())
+    vector_db = service.vector_db
+    try:
+        await service.index_documents([Document(content="alpha beta", file_id="doc_1")])
+        source = await vector_db.resolve_collection("docs")
+
+        await vector_db.create_collection("with_tokens", 3, CollectionSettings(multivector_size=3))
+        await vector_db.create_collection("dense_only", 3, CollectionSettings())
+        assert await vector_db.copy_points(source, "with_tokens") == 1
+        assert await vector_db.copy_points(source, "dense_only") == 1
+
+        rescored = await vector_db.search("with_tokens", [1.0, 0.0, 0.0], rescore_query=[[0.0, 1.0, 0.0]], rescore_candidates=5)
+        assert rescored[0].score == pytest.approx(1.0)
+        assert await vector_db.get_multivector_size("dense_only") is None
+        assert [hit.file_id for hit in await vector_db.search("dense_only", [1.0, 0.0, 0.0])] == ["doc_1"]
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_bge_m3_queries_overtake_document_batches():
+    """Test that a query waits for one document slice, not for the whole ingest batch"""
+    class SlowModel:
+        def encode(self, texts, **kwargs):
+            time.sleep(0.02)
+            return {"colbert_vecs": [np.ones((1, 3)) for _ in texts]}
+
+    provider = BGEM3MultiVectorProvider(MultiVectorConfig(enabled=True, batch_size=2))
+    provider._model = SlowModel()
+    documents = asyncio.create_task(provider.embed_documents(["text"] * 40))
+    await asyncio.sleep(0.03)
+    started = time.perf_counter()
+    assert await provider.embed_query("alpha") == [[1.0, 1.0, 1.0]]
+    assert time.perf_counter() - started < 0.15
+    assert not documents.done()
+    assert len(await documents) == 40
@@ -0,0 +1,143 @@
+"""
+Tests for multi-endpoint Ollama routing
+"""
+
+import asyncio
+import pytest
+from aiohttp import web
+
+from app.core.config import EmbeddingConfig
+from app.core.exceptions import ProviderError
+from app.providers.embedding.ollama import OllamaProvider
+from app.providers.ollama_pool import OllamaEndpointPool, parse_endpoint_urls
+
+
+async def start_fake_ollama(status: int = 200, delay: float = 0.0, digest: str = ""):
+    """Start a fake Ollama server on a free local port"""
+    state = {"embeddings": 0}
+
+    async def tags(request):
+        return web.json_response({"models": [{"name": "bge-m3:latest", "digest": digest}]})
+
+    async def embeddings(request):
+        state["embeddings"] += 1
+        if delay:
+            await asyncio.sleep(delay)
+        if status != 200:
+            return web.json_response({"error": "boom"}, status=status)
+        return web.json_response({"embedding": [0.1, 0.2, 0.3]})
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/api/embeddings", embeddings)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}", state, runner
+
+
+def test_parse_endpoint_urls():
+    """Test endpoint list parsing and fallbacks"""
+    assert parse_endpoint_urls("http://a:1/, http://b:2") == ["http://a:1", "http://b:2"]
+    assert parse_endpoint_urls("http://a:1", ["http://c:3", "http://c:3"]) == ["http://c:3"]
+    with pytest.raises(ProviderError):
+        parse_endpoint_urls("", [])
+
+
+def test_pick_prefers_least_outstanding():
+    """Test least-outstanding-requests routing"""
+    pool = OllamaEndpointPool(["http://a", "http://b", "http://c"])
+    pool.endpoints[0].outstanding = 3
+    pool.endpoints[1].outstanding = 1
+    pool.endpoints[2].outstanding = 2
+    assert pool.pick().url == "http://b"
+
+
+@pytest.mark.asyncio
+async def test_embeddings_spread_across_endpoints():
+    """Test that embedding traffic reaches every node"""
+    url_a, state_a, runner_a = await start_fake_ollama(delay=0.01)
+    url_b, state_b, runner_b = await start_fake_ollama(delay=0.01)
+    provider = OllamaProvider(EmbeddingConfig(base_urls=[url_a, url_b]))
+    try:
+        embeddings = await provider.embed_texts([f"text {i}" for i in range(20)])
+        assert len(embeddings) == 20
+        assert state_a["embeddings"] > 0
+        assert state_b["embeddings"] > 0
+    finally:
+        await provider.close()
+        await runner_a.cleanup()
+        await runner_b.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_retried_and_ejected():
+    """Test retry on another node and ejection of a failing node"""
+    good_url, good_state, good_runner = await start_fake_ollama()
+    bad_url, bad_state, bad_runner = await start_fake_ollama(status=500)
+    provider = OllamaProvider(EmbeddingConfig(base_urls=[bad_url, good_url], concurrency_per_endpoint=1))
+    try:
+        # Initialization probes the dimension with one embedding call of its own
+        await provider.initialize()
+        probes = good_state["embeddings"]
+        embeddings = await provider.embed_texts([f"text {i}" for i in range(10)])
+        assert all(embedding == [0.1, 0.2, 0.3] for embedding in embeddings)
+
+        bad = provider.pool.get_endpoint(bad_url)
+        assert bad.ejections == 1
+        # Once ejected the bad node stops receiving traffic
+        assert bad_state["embeddings"] <= provider.pool.failure_threshold + 1
+        assert good_state["embeddings"] - probes == 10
+    finally:
+        await provider.close()
+        await good_runner.cleanup()
+        await bad_runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_dimension_is_probed_once_per_model_digest(tmp_path):
+    """Test that the probed dimension is cached by digest and re-probed when the model changes"""
+    cache_path = str(tmp_path / "model-metadata.json")
+    url, state, runner = await start_fake_ollama(digest="sha256:aaa")
+    try:
+        for expected_probes in (1, 1):
+            provider = OllamaProvider(EmbeddingConfig(base_url=url, metadata_cache_path=cache_path))
+            await provider.initialize()
+            assert provider.get_dimension() == 3
+            assert state["embeddings"] == expected_probes
+            await provider.close()
+    finally:
+        await runner.cleanup()
+
+    url, state, runner = await start_fake_ollama(digest="sha256:bbb")
+    provider = OllamaProvider(EmbeddingConfig(base_url=url, metadata_cache_path=cache_path))
+    try:
+        await provider.initialize()
+        assert state["embeddings"] == 1
+        assert provider.model_digest == "sha256:bbb"
+    finally:
+        await provider.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_queries_do_not_wait_behind_bulk_embedding():
+    """Test that a query embedding uses the reserved permit while a large batch is in flight"""
+    url, state, runner = await start_fake_ollama(delay=0.05)
+    provider = OllamaProvider(EmbeddingConfig(base_url=url, concurrency_per_endpoint=2, query_reserved_per_endpoint=1))
+    try:
+        await provider.initialize()
+        bulk = asyncio.create_task(provider.embed_texts([f"chunk {i}" for i in range(40)]))
+        await asyncio.sleep(0.01)
+
+        started = asyncio.get_running_loop().time()
+        assert await provider.embed_text("query") == [0.1, 0.2, 0.3]
+        # One bulk permit: the batch takes about two seconds, the query one round trip
+        assert asyncio.get_running_loop().time() - started < 0.3
+        assert not bulk.done()
+        assert len(await bulk) == 40
+    finally:
+        await provider.close()
+        await runner.cleanup()
@@ -0,0 +1,120 @@
+"""
+Tests for cursor pagination of file-grouped search results
+"""
+
+import math
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.providers.base import Document
+from app.services.pagination import PageCursor, decode_cursor, encode_cursor, query_fingerprint
+
+def _vector(angle: float):
+    return [math.cos(angle), math.sin(angle)]
+
+async def _search_service(make_search_service, files: int, chunks_per_file: int):
+    """Service over an in-memory collection where file i's chunks rank below file i-1's best chunk"""
+    service = await make_search_service(vectorize=lambda text: [1.0, 0.0])
+
+    documents, vectors = [], []
+    for file_index in range(files):
+        for chunk in range(chunks_per_file):
+            documents.append(Document(content=f"file {file_index} chunk {chunk}", file_id=f"doc_{file_index}"))
+            # Chunks of one file interleave with the next file's, so offsets cross file boundaries
+            vectors.append(_vector(0.1 * file_index + 0.15 * chunk))
+    await service.vector_db.upsert_documents("docs", documents, vectors)
+    return service
+
+def test_cursor_round_trip_and_query_binding():
+    """Test that cursors decode to their state and are rejected for another query"""
+    token = encode_cursor(PageCursor(offset=7, score=0.5, ties=["a", "b"]), "fp1")
+
+    assert decode_cursor(token, "fp1") == PageCursor(offset=7, score=0.5, ties=["a", "b"])
+    with pytest.raises(ValidationError):
+        decode_cursor(token, "fp2")
+    with pytest.raises(ValidationError):
+        decode_cursor("not-a-cursor", "fp1")
+
+@pytest.mark.asyncio
+async def test_pages_are_disjoint_and_cover_every_file(make_search_service):
+    """Test that following next_cursor returns each file once, in score order, then stops"""
+    service = await _search_service(make_search_service, files=7, chunks_per_file=3)
+    try:
+        pages, cursor = [], None
+        while True:
+            page = await service.search_files_page("query", top_files=3, k=4, cursor=cursor, snippet_length=0)
+            pages.append(page.results)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        file_ids = [item["file_id"] for results in pages for item in results]
+        assert file_ids == [f"doc_{i}" for i in range(7)]
+        scores = [item["score"] for results in pages for item in results]
+        assert scores == sorted(scores, reverse=True)
+        assert pages[0][0]["content"] == "file 0 chunk 0"
+
+        # A cursor is bound to the query (and filters) it was issued for
+        first = await service.search_files_page("query", top_files=3, k=4)
+        with pytest.raises(ValidationError):
+            await service.search_files_page("another query", top_files=3, cursor=first.next_cursor)
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_score_threshold_stops_early(make_search_service):
+    """Test that files whose best chunk scores below the threshold are not returned"""
+    service = await _search_service(make_search_service, files=7, chunks_per_file=2)
+    try:
+        # File i scores cos(0.1 * i) at best: only files 0-3 reach 0.935
+        page = await service.search_files_page("query", top_files=5, k=4, score_threshold=0.935)
+
+        assert [item["file_id"] for item in page.results] == ["doc_0", "doc_1", "doc_2", "doc_3"]
+        assert page.next_cursor is None
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_cursor_stays_small_and_breaks_ties(make_search_service):
+    """Test that deep paging keeps the cursor at its boundary and returns tied files once each"""
+    service = await _search_service(make_search_service, files=0, chunks_per_file=0)
+    try:
+        # Ten files share one score; each also has a weaker chunk ranked after all of them
+        documents, vectors = [], []
+        for file_index in range(10):
+            documents.append(Document(content=f"best {file_index}", file_id=f"tie_{file_index}"))
+            vectors.append(_vector(0.2))
+            documents.append(Document(content=f"weak {file_index}", file_id=f"tie_{file_index}"))
+            vectors.append(_vector(0.5 + 0.01 * file_index))
+        await service.vector_db.upsert_documents("docs", documents, vectors)
+
+        file_ids, cursors, cursor = [], [], None
+        while True:
+            page = await service.search_files_page("query", top_files=3, k=4, cursor=cursor)
+            file_ids.extend(item["file_id"] for item in page.results)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+            cursors.append(cursor)
+
+        assert sorted(file_ids) == [f"tie_{i}" for i in range(10)]
+        # Files at the boundary score accumulate across pages until the score changes
+        assert len(decode_cursor(cursors[-1], query_fingerprint("query", [], None)).ties) == 9
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_cursor_does_not_grow_with_depth(make_search_service):
+    """Test that the cursor holds the boundary, not every file returned so far"""
+    service = await _search_service(make_search_service, files=30, chunks_per_file=2)
+    try:
+        cursor, sizes = None, []
+        while True:
+            page = await service.search_files_page("query", top_files=2, k=4, cursor=cursor)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+            sizes.append(len(cursor))
+        assert max(sizes) - min(sizes) <= 8
+    finally:
+        await service.close()
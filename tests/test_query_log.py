@@ -0,0 +1,99 @@
+"""
+Tests for the query log and query cache warm-up
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.core.config import QueryLogConfig
+from app.services import query_log as query_log_module
+from app.services.query_log import QueryLog, normalize_query, warm_up
+
+def test_counts_survive_restarts_and_compaction(tmp_path, monkeypatch):
+    """Test that normalized counts are appended, summed on load and compacted to one line per query"""
+    path = tmp_path / "queries.jsonl"
+    log = QueryLog(str(path))
+    for query in ["  annual   report ", "annual report", "ＡＰＩ keys", "annual report"]:
+        log.record("docs", query)
+    log.record("other", "annual report")
+    log.flush()
+    log.record("docs", "API keys")
+    log.flush()
+    assert len(path.read_text().splitlines()) == 4
+
+    restarted = QueryLog(str(path))
+    restarted.load()
+    assert normalize_query(" ＡＰＩ\tkeys ") == "API keys"
+    assert restarted.top("docs", 10) == ["annual report", "API keys"]
+    assert restarted.top("other", 10) == ["annual report"]
+
+    # Many flushes of few queries rewrite the file instead of growing it without bound
+    monkeypatch.setattr(query_log_module, "COMPACT_RATIO", 0)
+    restarted.record("docs", "API keys")
+    restarted.flush()
+    assert len(path.read_text().splitlines()) == 3
+    compacted = QueryLog(str(path))
+    compacted.load()
+    # Both docs queries now have 3 searches; ties are ordered by text
+    assert compacted.top("docs", 10) == ["API keys", "annual report"] and len(compacted) == 3
+
+def test_rare_queries_are_forgotten_beyond_the_bound():
+    """Test that only the most frequent max_queries entries are kept"""
+    log = QueryLog("", max_queries=10)
+    for index in range(30):
+        for _ in range(index):
+            log.record("docs", f"query {index}")
+
+    assert len(log) <= 11
+    assert log.top("docs", 3) == ["query 29", "query 28", "query 27"]
+
+@pytest.mark.asyncio
+async def test_warm_up_pre_embeds_top_queries_in_batches(make_search_service):
+    """Test that warm-up embeds the most frequent queries in batches and later searches hit the cache"""
+    service = await make_search_service()
+    log = QueryLog("")
+    for index in range(5):
+        for _ in range(index + 1):
+            log.record("docs", f"query {index}")
+    log.record("elsewhere", "not for this collection")
+    try:
+        config = QueryLogConfig(path="", warmup_top_n=3, warmup_batch_size=2, warmup_search=True)
+        assert await warm_up(service, config, log) == 3
+        assert service.embedding.batches == [["query 4", "query 3"], ["query 2"]]
+
+        await service.search("query  4")
+        assert len(service.embedding.batches) == 2
+        # Already cached queries are not embedded again
+        assert await warm_up(service, config, log) == 0
+    finally:
+        await service.close()
+
+def test_record_does_not_wait_for_a_flush(tmp_path, monkeypatch):
+    """Test that recording never takes the lock a flush holds while writing"""
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    log.record("docs", "annual report")
+    written = threading.Event()
+    release = threading.Event()
+    write = log._write
+
+    def slow_write(entries, mode):
+        written.set()
+        release.wait(5)
+        write(entries, mode)
+
+    monkeypatch.setattr(log, "_write", slow_write)
+    flusher = threading.Thread(target=log.flush)
+    flusher.start()
+    try:
+        assert written.wait(5)
+        started = time.perf_counter()
+        log.record("docs", "annual report")
+        assert log.top("docs", 1) == ["annual report"]
+        assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+        flusher.join()
+    log.flush()
+    assert len((tmp_path / "queries.jsonl").read_text().splitlines()) == 2
@@ -0,0 +1,108 @@
+"""
+Tests for shard key routing in the Qdrant provider
+"""
+
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from qdrant_client.http import models
+
+from app.core.config import VectorDBConfig
+from app.providers.base import CollectionSettings, Document
+from app.providers.vector_db.qdrant import QdrantProvider, shard_key_for
+
+def _sharded_provider(shard_keys: int = 4, configured: int = None) -> QdrantProvider:
+    """Provider over a mock cluster whose collections use `shard_keys` custom shard keys"""
+    configured = shard_keys if configured is None else configured
+    provider = QdrantProvider(VectorDBConfig(url="http://qdrant:6333", collection="docs", shard_keys=configured))
+    provider.client = MagicMock()
+    provider.client.get_aliases.return_value = SimpleNamespace(aliases=[])
+    provider.client.get_collection.return_value = SimpleNamespace(
+        config=SimpleNamespace(
+            params=SimpleNamespace(sharding_method=models.ShardingMethod.CUSTOM),
+            metadata={"file_shard_keys": shard_keys}
+        )
+    )
+    return provider
+
+def test_shard_keys_are_stable_and_spread():
+    """Test that a file always maps to the same key and files spread over all keys"""
+    assert shard_key_for("doc_1", 4) == shard_key_for("doc_1", 4)
+    counts = Counter(shard_key_for(f"doc_{i}", 4) for i in range(2000))
+    assert set(counts) == {f"file_shard_{i}" for i in range(4)}
+    assert min(counts.values()) > 400
+
+@pytest.mark.asyncio
+async def test_create_collection_passes_cluster_settings():
+    """Test that shard, replication and write consistency settings reach Qdrant and keys are created"""
+    provider = _sharded_provider()
+    provider.client.collection_exists.return_value = False
+    settings = CollectionSettings(shard_number=2, replication_factor=2, write_consistency_factor=2, shard_keys=3)
+
+    await provider.create_collection("docs_v1", 8, settings)
+
+    kwargs = provider.client.create_collection.call_args.kwargs
+    assert (kwargs["shard_number"], kwargs["replication_factor"], kwargs["write_consistency_factor"]) == (2, 2, 2)
+    assert kwargs["sharding_method"] == models.ShardingMethod.CUSTOM
+    assert kwargs["metadata"] == {"file_shard_keys": 3}
+    keys = [call.args[1] for call in provider.client.create_shard_key.call_args_list]
+    assert keys == ["file_shard_0", "file_shard_1", "file_shard_2"]
+
+@pytest.mark.asyncio
+async def test_writes_deletes_and_filtered_search_target_owning_shards():
+    """Test that each request only carries the shard keys of the files it touches"""
+    provider = _sharded_provider()
+    documents = [Document(content=f"chunk {i}", file_id=f"doc_{i % 3}") for i in range(6)]
+
+    await provider.upsert_documents("docs", documents, [[1.0, 0.0]] * 6)
+    for call in provider.client.upsert.call_args_list:
+        key = call.kwargs["shard_key_selector"]
+        assert {point.payload["file_id"] for point in call.args[1]} == \
+            {f"doc_{i}" for i in range(3) if shard_key_for(f"doc_{i}", 4) == key}
+    assert sum(len(call.args[1]) for call in provider.client.upsert.call_args_list) == 6
+
+    await provider.delete_documents("docs", ["doc_0", "doc_1"])
+    deleted = {call.kwargs["shard_key_selector"] for call in provider.client.delete.call_args_list}
+    assert deleted == {shard_key_for("doc_0", 4), shard_key_for("doc_1", 4)}
+
+    provider.client.query_points.return_value = SimpleNamespace(points=[])
+    await provider.search_with_filter("docs", [1.0, 0.0], ["doc_2"], limit=5)
+    assert provider.client.query_points.call_args.kwargs["shard_key_selector"] == [shard_key_for("doc_2", 4)]
+    # Sharding is looked up once per collection
+    assert provider.client.get_collection.call_count == 1
+
+@pytest.mark.asyncio
+async def test_shard_key_count_comes_from_the_collection():
+    """Test that routing follows the collection's shard keys when the config disagrees"""
+    provider = _sharded_provider(shard_keys=3, configured=0)
+
+    await provider.upsert_documents("docs", [Document(content="hello", file_id="doc_7")], [[1.0, 0.0]])
+    assert provider.client.upsert.call_args.kwargs["shard_key_selector"] == shard_key_for("doc_7", 3)
+
+    # Older collections without the metadata: the keys held by the cluster are counted
+    legacy = _sharded_provider(shard_keys=3, configured=8)
+    legacy.client.get_collection.return_value.config.metadata = None
+    legacy.client.http.distributed_api.collection_cluster_info.return_value = SimpleNamespace(result=SimpleNamespace(
+        local_shards=[SimpleNamespace(shard_key=f"file_shard_{i}") for i in range(2)],
+        remote_shards=[SimpleNamespace(shard_key="file_shard_2"), SimpleNamespace(shard_key="file_shard_0")]
+    ))
+    await legacy.delete_documents("docs", ["doc_7"])
+    assert legacy.client.delete.call_args.kwargs["shard_key_selector"] == shard_key_for("doc_7", 3)
+
+@pytest.mark.asyncio
+async def test_local_mode_ignores_shard_keys():
+    """Test that in-memory Qdrant, which cannot shard, still indexes and searches normally"""
+    provider = QdrantProvider(VectorDBConfig(url=":memory:", collection="docs", shard_keys=4))
+    await provider.initialize()
+    try:
+        await provider.ensure_collection("docs", 2)
+        await provider.upsert_documents("docs", [Document(content="hello", file_id="doc_1")], [[1.0, 0.0]])
+
+        hits = await provider.search_with_filter("docs", [1.0, 0.0], ["doc_1"], limit=5)
+        assert [hit.file_id for hit in hits] == ["doc_1"]
+        await provider.delete_documents("docs", ["doc_1"])
+        assert await provider.search_with_filter("docs", [1.0, 0.0], ["doc_1"], limit=5) == []
+    finally:
+        await provider.close()
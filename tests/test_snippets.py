@@ -0,0 +1,54 @@
+"""
+Tests for snippet generation and trimmed search payloads
+"""
+
+import pytest
+
+from app.providers.base import Document
+from app.services.snippets import make_snippet
+
+FILLER = "lorem ipsum dolor sit amet " * 20
+
+def test_snippet_picks_window_with_most_query_terms():
+    """Test that the window covering both terms wins over a lone early match"""
+    content = "neural at the start. " + FILLER + "Deep neural networks learn layered features. " + FILLER
+
+    snippet = make_snippet(content, "deep neural", max_chars=80)
+
+    assert snippet.text.startswith("…") and snippet.text.endswith("…")
+    assert "Deep neural networks" in snippet.text
+    assert len(snippet.text) <= 82
+    assert [snippet.text[start:end] for start, end in snippet.highlights] == ["Deep", "neural"]
+
+def test_snippet_without_matches_keeps_the_beginning():
+    """Test that content without query terms is cut at a word boundary"""
+    snippet = make_snippet(FILLER, "transformer", max_chars=30)
+
+    assert snippet.text == "lorem ipsum dolor sit amet…"
+    assert snippet.highlights == []
+    assert make_snippet("short text", "text").text == "short text"
+
+@pytest.mark.asyncio
+async def test_search_by_file_id_fetches_content_for_winners_only(make_search_service):
+    """Test that grouped search returns snippets of the best chunk per file"""
+    service = await make_search_service(vectorize=lambda text: [1.0, 0.0])
+    try:
+        documents = [
+            Document(content=FILLER + "best chunk about qdrant filters " + FILLER, file_id="doc_1"),
+            Document(content="weaker chunk of doc_1", file_id="doc_1"),
+            Document(content="doc_2 mentions qdrant once", file_id="doc_2"),
+        ]
+        await service.vector_db.upsert_documents("docs", documents, [[1.0, 0.0], [1.0, 1.0], [1.0, 0.5]])
+
+        candidates = await service.search("qdrant", limit=3, with_content=False)
+        assert all(result.content == "" and result.id for result in candidates)
+
+        results = await service.search_by_file_id("qdrant filters", k=10, top_files=2, snippet_length=60)
+        assert [result["file_id"] for result in results] == ["doc_1", "doc_2"]
+        assert "qdrant filters" in results[0]["content"] and len(results[0]["content"]) <= 62
+        assert results[1]["content"] == "doc_2 mentions qdrant once"
+
+        full = await service.search_by_file_id("qdrant", k=10, top_files=1)
+        assert full[0]["content"] == documents[0].content and "highlights" not in full[0]
+    finally:
+        await service.close()
@@ -0,0 +1,114 @@
+"""
+Tests for startup tracking, liveness/readiness and service initialization
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.api import routes
+from app.core.config import AppConfig, ChatConfig, QueryLogConfig
+from app.core.startup import StartupState
+from app.main import create_app
+from app.services import search_service as search_module
+
+@pytest.mark.asyncio
+async def test_timed_records_phases_and_errors():
+    """Test that timed phases are recorded, including the error of a failed phase"""
+    state = StartupState()
+
+    async def fail():
+        raise RuntimeError("connection refused")
+
+    assert await state.timed("vector_db", asyncio.sleep(0, result="ok")) == "ok"
+    with pytest.raises(RuntimeError):
+        await state.timed("embedding", fail())
+
+    assert set(state.phases) == {"vector_db", "embedding"}
+    assert state.errors == {"embedding": "connection refused"}
+    assert state.to_dict()["status"] == "starting"
+
+    state.mark_ready()
+    assert state.ready and state.phases["total"] == state.ready_after
+
+def test_live_and_ready_endpoints(monkeypatch):
+    """Test that /live answers while starting and /ready turns 200 only once ready"""
+    state = StartupState()
+    monkeypatch.setattr(routes, "startup_state", state)
+    client = TestClient(create_app())
+
+    assert client.get("/live").json() == {"status": "alive"}
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    state.mark_ready()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert "total" in response.json()["phases"]
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_initialization(monkeypatch):
+    """Test that concurrent get_search_service calls initialize once and failures are not cached"""
+    calls = []
+
+    async def initialize(self):
+        calls.append(self)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("qdrant is down")
+
+    async def close(self):
+        pass
+
+    monkeypatch.setattr(search_module.SearchService, "initialize", initialize)
+    monkeypatch.setattr(search_module.SearchService, "close", close)
+    monkeypatch.setattr(search_module, "_search_service", None)
+
+    with pytest.raises(RuntimeError):
+        await search_module.get_search_service()
+    assert search_module._search_service is None
+
+    services = await asyncio.gather(*(search_module.get_search_service() for _ in range(5)))
+    assert len(calls) == 2
+    assert all(service is services[0] for service in services)
+    await search_module.close_search_service()
+
+@pytest.mark.asyncio
+async def test_ready_once_search_is_up_while_chat_is_degraded(monkeypatch):
+    """Test that a chat backend that is down delays chat, not readiness"""
+    state = StartupState()
+    chat_up = asyncio.Event()
+    chat_attempts = []
+
+    async def get_search_service():
+        return object()
+
+    async def get_chat_service():
+        chat_attempts.append(1)
+        if not chat_up.is_set():
+            raise RuntimeError("ollama is down")
+        return object()
+
+    monkeypatch.setattr(main, "startup_state", state)
+    monkeypatch.setattr(main, "get_search_service", get_search_service)
+    monkeypatch.setattr(main, "get_chat_service", get_chat_service)
+    monkeypatch.setattr(main, "get_query_log", lambda: None)
+    monkeypatch.setattr(main, "STARTUP_RETRY_SECONDS", (0.01,))
+    config = AppConfig(
+        chat=ChatConfig(warmup=False),
+        query_log=QueryLogConfig(path="", flush_seconds=0, warmup_top_n=0)
+    )
+
+    task = asyncio.create_task(main._initialize_services(config))
+    while not state.ready:
+        await asyncio.sleep(0.01)
+    assert state.to_dict()["status"] == "degraded"
+    assert state.degraded["chat"].startswith("unavailable: ollama is down")
+
+    chat_up.set()
+    await asyncio.wait_for(task, 1)
+    assert state.to_dict()["status"] == "ready" and state.degraded == {}
+    assert len(chat_attempts) >= 2
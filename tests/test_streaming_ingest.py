@@ -0,0 +1,73 @@
+"""
+Tests for streaming NDJSON ingest
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import get_tenant_search_service
+from app.core.config import IndexingConfig
+from app.core.metrics import INDEX_JOBS
+from app.main import create_app
+from app.services.indexing_jobs import IndexJobManager, get_job_manager
+from app.services.streaming_ingest import StreamIngestor, iter_lines
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+async def _collect(stream):
+    return [line async for line in stream]
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_chunks_and_drops_oversized_lines():
+    """Test that lines split across chunks are reassembled and long lines are replaced by None"""
+    lines = await _collect(iter_lines(_chunks(b"ab", b"c\nde", b"f\n", b"x" * 8, b"yy\nlast"), max_line_bytes=5))
+
+    assert lines == [b"abc", b"def", None, b"last"]
+
+@pytest.mark.asyncio
+async def test_stream_ingest_reports_line_errors(make_fake_search_service):
+    """Test that invalid lines and failed batches are reported with their line numbers"""
+    search_service = make_fake_search_service(fail_file_id="doc_3")
+    manager = IndexJobManager(IndexingConfig(), None)
+    job = manager.track("upload-1")
+
+    rows = [json.dumps({"content": f"text {i}", "file_id": f"doc_{i}"}) for i in range(5)]
+    rows.insert(2, "{not json")
+    rows.insert(4, json.dumps({"content": "", "file_id": "empty"}))
+    body = ("\n".join(rows) + "\n").encode("utf-8")
+
+    result = await StreamIngestor(search_service, job, batch_size=2).ingest(_chunks(body[:17], body[17:]))
+
+    assert search_service.batches == [["doc_0", "doc_1"], ["doc_2", "doc_3"], ["doc_4"]]
+    payload = result.to_dict()
+    assert payload["lines"] == 7
+    assert payload["rejected_lines"] == 2
+    assert payload["indexed"] == 3
+    assert payload["failed"] == 2
+    assert payload["status"] == "completed_with_errors"
+    assert [(error["line"], error["end_line"]) for error in payload["errors"]] == [(3, None), (5, None), (4, 6)]
+    assert manager.get("upload-1") is job
+
+def test_aborted_stream_finishes_the_job_as_failed(monkeypatch, make_fake_search_service):
+    """Test that an upload that errors out ends its job through finish(), so it is counted"""
+    manager = IndexJobManager(IndexingConfig(), None)
+    app = create_app()
+    app.dependency_overrides[get_tenant_search_service] = lambda: make_fake_search_service()
+    app.dependency_overrides[get_job_manager] = lambda: manager
+
+    async def abort(self, stream):
+        raise RuntimeError("client disconnected")
+
+    monkeypatch.setattr(StreamIngestor, "ingest", abort)
+    failed_jobs = INDEX_JOBS.value(status="failed")
+
+    response = TestClient(app).post("/index-documents/stream?job_id=upload-2", content=b"")
+
+    assert response.status_code == 500
+    job = manager.get("upload-2")
+    assert job.status == "failed" and job.finished_at is not None
+    assert INDEX_JOBS.value(status="failed") == failed_jobs + 1
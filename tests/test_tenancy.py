@@ -0,0 +1,82 @@
+"""
+Tests for tenant routing, per-tenant collections and quotas
+"""
+
+import pytest
+
+from app.core.config import AppConfig, TenancyConfig
+from app.core.exceptions import AdmissionRejectedError, TenantNotFoundError, ValidationError
+from app.providers.base import Document
+from app.services.chat_service import ChatService
+from app.services.tenancy import TenantRegistry
+
+def test_resolve_validates_and_bounds_tenants():
+    """Test default tenant fallback, id validation, allow-list and the tenant cap"""
+    registry = TenantRegistry(TenancyConfig(enabled=True, allow_unlisted=True, max_tenants=2))
+    assert registry.resolve(None) == "default"
+    assert registry.resolve("acme") == "acme"
+    with pytest.raises(ValidationError):
+        registry.resolve("../etc")
+
+    registry.resolve("globex")
+    with pytest.raises(TenantNotFoundError):
+        registry.resolve("initech")
+    # Tenants already served keep working
+    assert registry.resolve("acme") == "acme"
+
+    allow_listed = TenantRegistry(TenancyConfig(enabled=True, tenants={"acme": "acme_docs"}))
+    assert allow_listed.collection_for("acme", "docs") == "acme_docs"
+    with pytest.raises(TenantNotFoundError):
+        allow_listed.resolve("globex")
+    # Without allow_unlisted, made-up ids never create collections
+    assert TenantRegistry(TenancyConfig(enabled=True)).limiter("globex") is None
+
+@pytest.mark.asyncio
+async def test_tenants_are_isolated_in_their_own_collections(make_search_service):
+    """Test that a tenant's documents, query cache and service are separate from the default's"""
+    base = await make_search_service()
+    registry = TenantRegistry(TenancyConfig(enabled=True))
+    try:
+        assert await registry.search_service("default", base) is base
+        acme = await registry.search_service("acme", base)
+        assert acme is await registry.search_service("acme", base)
+        assert acme.config.vector_db.collection == "docs__acme"
+        assert await base.vector_db.get_alias_target("docs__acme") == "docs__acme_v1"
+
+        await acme.index_documents([Document(content="acme quarterly report", file_id="acme_1")])
+        await base.index_documents([Document(content="shared handbook", file_id="base_1")])
+
+        assert [hit.file_id for hit in await acme.search("report")] == ["acme_1"]
+        assert [hit.file_id for hit in await base.search("report")] == ["base_1"]
+        assert len(acme.query_cache) == 1 and len(base.query_cache) == 1
+
+        # Closing tenant services leaves the shared providers to the base service
+        await registry.close()
+        assert [hit.file_id for hit in await base.search("handbook")] == ["base_1"]
+    finally:
+        await base.close()
+
+@pytest.mark.asyncio
+async def test_tenant_quota_does_not_affect_other_tenants():
+    """Test that one tenant exhausting its quota is shed while another tenant is admitted"""
+    registry = TenantRegistry(TenancyConfig(enabled=True, tenants={"acme": "", "globex": ""}, concurrency=1, queue=0))
+    acme = registry.limiter("acme")
+    assert acme is registry.limiter("acme")
+    assert registry.limiter("bad id!") is None
+
+    await acme.acquire()
+    with pytest.raises(AdmissionRejectedError):
+        await acme.acquire()
+    globex = registry.limiter("globex")
+    await globex.acquire()
+    globex.release()
+    acme.release()
+
+def test_chat_sessions_are_per_tenant():
+    """Test that a session id from one tenant is not visible to another"""
+    chat_service = ChatService(AppConfig())
+    session = chat_service.sessions_for("acme").create(["doc_1"])
+
+    assert chat_service.sessions_for("acme").get(session.session_id) is session
+    assert chat_service.sessions_for("globex").get(session.session_id) is None
+    assert chat_service.sessions_for(None) is chat_service.sessions_for("default")
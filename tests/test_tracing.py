@@ -0,0 +1,50 @@
+"""
+Tests for OpenTelemetry request tracing
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.tracing import configure_tracing, start_span
+from app.main import create_app
+
+def test_disabled_tracing_yields_noop_span():
+    """Test that spans cost nothing when tracing is off"""
+    configure_tracing(False)
+
+    with start_span("noop", {"key": "value"}) as span:
+        span.set_attribute("other", 1)
+
+def test_request_span_continues_incoming_trace(tmp_path):
+    """Test that the HTTP span joins a W3C traceparent and records the route"""
+    trace_file = tmp_path / "traces.jsonl"
+    client = TestClient(create_app())
+    assert configure_tracing(True, exporter="file", file_path=str(trace_file))
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    try:
+        client.get("/", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    finally:
+        configure_tracing(False)
+
+    spans = {span["name"]: span for span in map(json.loads, trace_file.read_text().splitlines())}
+    request_span = spans["GET /"]
+    assert request_span["context"]["trace_id"] == f"0x{trace_id}"
+    assert request_span["attributes"]["http.route"] == "/"
+    assert request_span["attributes"]["http.status_code"] == 200
+
+def test_reconfiguring_closes_the_trace_file(tmp_path):
+    """Test that a new configuration flushes and closes the previous file exporter"""
+    assert configure_tracing(True, exporter="file", file_path=str(tmp_path / "first.jsonl"))
+    first = tracing._trace_file
+    with start_span("first"):
+        pass
+    try:
+        assert configure_tracing(True, exporter="file", file_path=str(tmp_path / "second.jsonl"))
+        assert first.closed and not tracing._trace_file.closed
+        assert len((tmp_path / "first.jsonl").read_text().splitlines()) == 1
+    finally:
+        configure_tracing(False)
+    assert tracing._trace_file is None
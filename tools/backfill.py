@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Bulk backfill: re-embed every object under an S3 prefix into a new collection.
+
+Objects are listed page by page, downloaded on a bounded thread pool, parsed in
+worker processes and embedded/upserted in large batches. Completed keys are
+appended to a checkpoint journal after every batch, so an interrupted run
+resumes where it stopped. When every object is indexed, the serving alias is switched
+to the new collection in one atomic update, so searches never see a partial
+collection:
+
+    python tools/backfill.py --bucket document-storage --prefix docs/ --alias documents
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import ConfigManager, get_config
+from app.providers.base import Document
+from app.services.search_service import SearchService
+
+# Rewrite the checkpoint once its journal holds more lines than this and the completed keys
+JOURNAL_COMPACT_MIN = 10000
+
+@dataclass
+class Checkpoint:
+    """Keys already indexed into `collection`, persisted after every batch.
+
+    `path` holds a snapshot; each save appends only the changes since the last
+    one to `<path>.journal` (one JSON line per key), and the snapshot is
+    rewritten once the journal has grown past the number of completed keys.
+    """
+    path: Path
+    collection: Optional[str] = None
+    completed: Set[str] = field(default_factory=set)
+    failed: Dict[str, str] = field(default_factory=dict)
+    _changes: List[list] = field(default_factory=list, repr=False)
+    _journal_lines: int = field(default=0, repr=False)
+    _saved_collection: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".journal")
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint":
+        checkpoint = cls(path=path)
+        if path.exists():
+            data = json.loads(path.read_text())
+            checkpoint.collection = checkpoint._saved_collection = data.get("collection")
+            checkpoint.completed = set(data.get("completed", []))
+            checkpoint.failed = dict(data.get("failed", {}))
+        if checkpoint.journal_path.exists():
+            torn = False
+            with open(checkpoint.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; its batch is simply redone
+                        torn = True
+                        continue
+                    checkpoint._apply(change)
+                    checkpoint._journal_lines += 1
+            checkpoint._changes.clear()
+            if torn:
+                # Appending after a partial line would corrupt the next one
+                checkpoint._compact()
+        return checkpoint
+
+    def _apply(self, change: list) -> None:
+        if change[0] == "completed":
+            self.mark_completed(change[1])
+        else:
+            self.mark_failed(change[1], change[2])
+
+    def save(self) -> None:
+        """Append the changes since the last save, compacting into the snapshot when the journal has grown"""
+        if (
+            not self.path.exists()
+            or self.collection != self._saved_collection
+            or self._journal_lines + len(self._changes) > max(JOURNAL_COMPACT_MIN, len(self.completed))
+        ):
+            self._compact()
+            return
+        if not self._changes:
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(change) + "\n" for change in self._changes))
+        self._journal_lines += len(self._changes)
+        self._changes.clear()
+
+    def _compact(self) -> None:
+        data = {
+            "collection": self.collection,
+            "completed": sorted(self.completed),
+            "failed": self.failed,
+            "updated_at": time.time()
+        }
+        # Write then rename, so a crash never leaves a truncated checkpoint; replaying
+        # a journal that outlived the rename is harmless
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+        self.journal_path.unlink(missing_ok=True)
+        self._saved_collection = self.collection
+        self._journal_lines = 0
+        self._changes.clear()
+
+    def mark_completed(self, key: str) -> None:
+        self.completed.add(key)
+        self.failed.pop(key, None)
+        self._changes.append(["completed", key])
+
+    def mark_failed(self, key: str, error: str) -> None:
+        self.failed[key] = error
+        self._changes.append(["failed", key, error])
+
+@dataclass
+class BackfillStats:
+    listed: int = 0
+    skipped: int = 0
+    files: int = 0
+    chunks: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    def summary(self) -> str:
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return (
+            f"{self.files} files / {self.chunks} chunks indexed, {self.skipped} skipped, "
+            f"{self.failed} failed in {elapsed:.1f}s ({self.chunks / elapsed:.1f} chunks/s)"
+        )
+
+def parse_object(body: bytes, chunk_chars: int) -> List[str]:
+    """Decode an object and split it into chunks; runs in a worker process"""
+    text = body.decode("utf-8", errors="replace").strip()
+    if not text:
+        return []
+    if chunk_chars <= 0 or len(text) <= chunk_chars:
+        return [text]
+
+    # Pack paragraphs into chunks of at most chunk_chars, hard-splitting long paragraphs
+    chunks: List[str] = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        while len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:].lstrip()
+        if not paragraph:
+            continue
+        if current and len(current) + 2 + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+def file_id_for_key(key: str, prefix: str, metadata: Dict[str, str]) -> str:
+    """The file_id stored with the object, or the key below the prefix without extension"""
+    if metadata.get("file_id"):
+        return metadata["file_id"]
+    relative = key[len(prefix):] if prefix and key.startswith(prefix) else key
+    stem, _ = os.path.splitext(relative.lstrip("/"))
+    return stem or relative
+
+class Backfill:
+    """Download -> parse -> embed/upsert pipeline over one S3 prefix"""
+
+    def __init__(
+        self,
+        s3_client: Any,
+        search_service: SearchService,
+        checkpoint: Checkpoint,
+        bucket: str,
+        prefix: str = "",
+        download_workers: int = 16,
+        parse_workers: int = 0,
+        batch_size: int = 256,
+        chunk_chars: int = 0
+    ):
+        self.s3_client = s3_client
+        self.search_service = search_service
+        self.checkpoint = checkpoint
+        self.bucket = bucket
+        self.prefix = prefix
+        self.download_workers = max(1, download_workers)
+        self.parse_workers = parse_workers
+        self.batch_size = max(1, batch_size)
+        self.chunk_chars = chunk_chars
+        self.stats = BackfillStats()
+        self._downloads: Optional[ThreadPoolExecutor] = None
+        self._parsers: Optional[Executor] = None
+        self._batch: List[Document] = []
+        self._batch_keys: List[str] = []
+
+    async def run(self) -> BackfillStats:
+        self._downloads = ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="backfill-s3")
+        # parse_workers=0 parses on the download threads (small buckets, tests)
+        self._parsers = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        try:
+            pending: Set[asyncio.Task] = set()
+            # Bounded read-ahead: enough in flight to keep every download thread busy
+            max_in_flight = self.download_workers * 2
+            async for key in self._list_keys():
+                self.stats.listed += 1
+                if key in self.checkpoint.completed:
+                    self.stats.skipped += 1
+                    continue
+                if len(pending) >= max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await self._collect(done)
+                pending.add(asyncio.create_task(self._fetch(key)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                await self._collect(done)
+            await self._flush()
+            return self.stats
+
+        finally:
+            self._downloads.shutdown(wait=False, cancel_futures=True)
+            if self._parsers:
+                self._parsers.shutdown(wait=False, cancel_futures=True)
+
+    async def _list_keys(self):
+        """Keys under the prefix, one list_objects_v2 page at a time"""
+        loop = asyncio.get_running_loop()
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        pages = iter(paginator.paginate(Bucket=self.bucket, Prefix=self.prefix))
+        while True:
+            page = await loop.run_in_executor(self._downloads, next, pages, None)
+            if page is None:
+                return
+            for item in page.get("Contents", []):
+                if not item["Key"].endswith("/"):
+                    yield item["Key"]
+
+    def _download(self, key: str) -> Tuple[bytes, Dict[str, str]]:
+        response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read(), response.get("Metadata", {})
+
+    async def _fetch(self, key: str) -> Tuple[str, Optional[List[Document]], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        try:
+            body, metadata = await loop.run_in_executor(self._downloads, self._download, key)
+            if self._parsers:
+                chunks = await loop.run_in_executor(self._parsers, parse_object, body, self.chunk_chars)
+            else:
+                chunks = parse_object(body, self.chunk_chars)
+        except Exception as e:
+            return key, None, f"download/parse failed: {e}"
+
+        file_id = file_id_for_key(key, self.prefix, metadata)
+        documents = [
+            Document(
+                content=chunk,
+                file_id=file_id,
+                metadata={"source_key": key, "chunk_index": index} if len(chunks) > 1 else {"source_key": key}
+            )
+            for index, chunk in enumerate(chunks)
+        ]
+        return key, documents, None
+
+    async def _collect(self, done: Set[asyncio.Task]) -> None:
+        for task in done:
+            key, documents, error = task.result()
+            if error:
+                self._record_failure([key], error)
+                continue
+            if not documents:
+                # Empty object: nothing to index, but done
+                self.checkpoint.mark_completed(key)
+                continue
+            self._batch.extend(documents)
+            self._batch_keys.append(key)
+            if len(self._batch) >= self.batch_size:
+                await self._flush()
+
+    async def _flush(self) -> None:
+        if self._batch:
+            batch, keys = self._batch, self._batch_keys
+            self._batch, self._batch_keys = [], []
+            try:
+                await self.search_service.index_documents(batch)
+            except Exception as e:
+                self._record_failure(keys, f"indexing failed: {e}")
+            else:
+                for key in keys:
+                    self.checkpoint.mark_completed(key)
+                self.stats.files += len(keys)
+                self.stats.chunks += len(batch)
+                print(f"📦 {self.stats.summary()}")
+        self.checkpoint.save()
+
+    def _record_failure(self, keys: List[str], error: str) -> None:
+        for key in keys:
+            self.checkpoint.mark_failed(key, error)
+        self.stats.failed += len(keys)
+        print(f"❌ {len(keys)} object(s) failed, first {keys[0]}: {error}")
+
+def _s3_client():
+    import boto3
+
+    return boto3.client(
+        's3',
+        endpoint_url=os.getenv('AWS_ENDPOINT_URL', 'http://localhost:4566'),
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', 'test'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'test'),
+        region_name=os.getenv('AWS_REGION', 'us-east-1')
+    )
+
+async def run_backfill(args: argparse.Namespace) -> bool:
+    config = ConfigManager(args.config).load_config() if args.config else get_config()
+    alias = args.alias or config.vector_db.collection
+    checkpoint = Checkpoint.load(Path(args.checkpoint))
+
+    collection = args.collection or checkpoint.collection or f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+    if checkpoint.collection and checkpoint.collection != collection:
+        print(f"❌ Checkpoint {args.checkpoint} belongs to collection {checkpoint.collection}; use another --checkpoint")
+        return False
+    if collection == alias:
+        print("❌ The target collection must differ from the alias it will be served under")
+        return False
+    checkpoint.collection = collection
+    print(f"🔄 Backfilling s3://{args.bucket}/{args.prefix} into {collection} (alias {alias})")
+    if checkpoint.completed:
+        print(f"   Resuming: {len(checkpoint.completed)} objects already indexed")
+
+    # Write into the new collection; the embedding settings come from the config as usual
+    # (a physical collection, not another alias: the serving alias is switched at the end)
+    target_config = replace(config, vector_db=replace(config.vector_db, collection=collection, use_alias=False))
+    search_service = SearchService(target_config)
+    try:
+        await search_service.initialize()
+        backfill = Backfill(
+            _s3_client(),
+            search_service,
+            checkpoint,
+            bucket=args.bucket,
+            prefix=args.prefix,
+            download_workers=args.download_workers,
+            parse_workers=args.parse_workers,
+            batch_size=args.batch_size,
+            chunk_chars=args.chunk_chars
+        )
+        stats = await backfill.run()
+        print(f"✅ {stats.summary()}")
+
+        if checkpoint.failed:
+            print(f"⚠️ {len(checkpoint.failed)} objects failed; rerun to retry them. Alias {alias} left unchanged")
+            return False
+        if args.no_switch:
+            print(f"ℹ️ Alias {alias} left unchanged (--no-switch)")
+            return True
+
+        previous = await search_service.vector_db.switch_alias(alias, collection)
+        print(f"🔀 Alias {alias} now points to {collection}" + (f" (was {previous})" if previous else ""))
+        return True
+
+    finally:
+        await search_service.close()
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Re-embed an S3 prefix into a new collection and switch the alias")
+    parser.add_argument("--bucket", required=True, help="S3 bucket")
+    parser.add_argument("--prefix", default="", help="Key prefix to backfill")
+    parser.add_argument("--alias", help="Alias searches use (default: vector_db.collection)")
+    parser.add_argument("--collection", help="Target collection (default: <alias>_<timestamp>, or the checkpoint's)")
+    parser.add_argument("--checkpoint", default="backfill-checkpoint.json", help="Checkpoint file for resuming")
+    parser.add_argument("--download-workers", type=int, default=16, help="Concurrent S3 downloads")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1, help="Parser processes (0 = inline)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding/upsert batch")
+    parser.add_argument("--chunk-chars", type=int, default=0, help="Split documents into chunks of this size (0 = whole document)")
+    parser.add_argument("--no-switch", action="store_true", help="Build the collection without switching the alias")
+    parser.add_argument("--config", help="Path to configuration file")
+    args = parser.parse_args()
+
+    try:
+        success = asyncio.run(run_backfill(args))
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n🔄 Backfill interrupted; rerun with the same --checkpoint to resume")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()